@@ -1,7 +1,14 @@
+import hashlib
+import os
+import tempfile
+import time
+from datetime import date
 import streamlit as st
 import pandas as pd
 import plotly.express as px
 from logic_engine import HRLogicEngine
+from ingest_cache import IngestCache
+from parallel_ingest import SOURCES, ParallelIngest
 
 # Page Config
 st.set_page_config(page_title="LogicHR - 인사 데이터 분석", page_icon="📊", layout="wide")
@@ -19,15 +26,212 @@ st.markdown("---")
 st.sidebar.header("📂 데이터 업로드")
 st.sidebar.info("분석할 HR 데이터(CSV, Excel)를 업로드하세요.")
 
-# Helper function to load data
-def load_file(uploaded_file):
-    if uploaded_file is None:
-        return None
-    if uploaded_file.name.endswith('.csv'):
-        return pd.read_csv(uploaded_file)
-    elif uploaded_file.name.endswith(('.xls', '.xlsx')):
-        return pd.read_excel(uploaded_file)
-    return None
+# Engines are large (a full SQLite copy of the data): least-recently-used ones are evicted
+# once the cache is full. Results are memoized by each engine (HRLogicEngine memo_size).
+ENGINE_CACHE_ENTRIES = 4
+
+DEMO_FILES = ['data/employees.csv', 'data/attendance.csv', 'data/performance.csv']
+
+# Sidebar load progress (see show_load_progress): refresh interval and labels
+LOAD_POLL_SECONDS = 0.2
+LOAD_LABELS = {'employees': '직원 정보', 'attendance': '근태 기록', 'performance': '성과 지표'}
+STAGE_LABELS = {
+    'parsing': '파일 3개를 동시에 읽는 중...',
+    'reference': '직원 / 성과 데이터 적재 중...',
+    'attendance': '근태 기록을 읽는 대로 적재 중...',
+    'done': '적재 완료',
+}
+
+# Ranking metrics of HRLogicEngine.get_employee_ranking -> label in the ranking tab
+RANKING_METRIC_LABELS = {'hours': '총 근무시간', 'cost': '인건비', 'overtime_days': '초과근무일 (8시간 초과)'}
+
+# Reasons of quarantined attendance rows (validation.REASONS) -> label in the data quality section
+QUARANTINE_REASON_LABELS = {
+    'bad_time': '날짜·시각 형식 오류',
+    'orphan_emp': '직원 명단에 없는 사번',
+    'checkout_before_checkin': '퇴근이 출근보다 빠름',
+    'duplicate': '중복 기록 (같은 직원·날짜)',
+}
+# Quarantined rows listed in the data quality section
+QUARANTINE_PREVIEW_ROWS = 1000
+
+# Directory for the file-backed engines (one SQLite file per data content hash, override with
+# LOGICHR_DB_DIR). WAL files let other sessions keep querying while a load is written, which
+# an in-memory database cannot; after a restart, data that was already loaded opens instantly
+# instead of being re-ingested.
+ENGINE_DB_DIR = os.environ.get('LOGICHR_DB_DIR') or os.path.join(tempfile.gettempdir(), 'logichr_db')
+
+# Check for required columns (Basic Validation)
+required_cols = {
+    'employees': ['emp_id', 'department', 'hourly_rate', 'name'],
+    'attendance': ['emp_id', 'check_in', 'check_out', 'date'],
+    'performance': ['department', 'target_achievement_rate']
+}
+
+# Simple validation function
+def validate_columns(df, name, required):
+    missing = [col for col in required if col not in df.columns]
+    if missing:
+        raise ValueError(f"'{name}' 데이터에 다음 컬럼이 누락되었습니다: {missing}")
+
+@st.cache_resource
+def get_ingest_cache():
+    """Parquet cache shared by every session: each distinct file is parsed only once."""
+    return IngestCache()
+
+def content_hash(sources):
+    """Cache key: SHA-256 over the names and bytes of the three input files."""
+    digest = hashlib.sha256()
+    for name, data in sources:
+        digest.update(name.encode('utf-8'))
+        digest.update(data)
+    return digest.hexdigest()
+
+def cost_export(engine, file_type, start, end):
+    """Deferred download body for st.download_button: the cost detail for the period, streamed to a temp file."""
+    def build():
+        handle = tempfile.TemporaryFile()
+        engine.export_cost_calculation(handle, file_type, start, end)
+        handle.seek(0)
+        return handle
+    return build
+
+@st.cache_resource
+def get_cache_stats():
+    """Process-wide hit/miss counters for the engine cache."""
+    return {'engine': {'calls': 0, 'misses': 0}}
+
+def validate_reference(df_emp, df_perf):
+    validate_columns(df_emp, "직원 정보", required_cols['employees'])
+    validate_columns(df_perf, "성과 지표", required_cols['performance'])
+    # The ingest cache stores an emp_id that is not a number as missing
+    if df_emp['emp_id'].isna().any():
+        raise ValueError("'직원 정보' 데이터에 사번(emp_id)이 비어 있거나 숫자가 아닌 행이 있습니다.")
+
+@st.cache_resource(max_entries=ENGINE_CACHE_ENTRIES)
+def _start_engine_load(data_key, _sources):
+    # Only runs on a cache miss; `_sources` is excluded from hashing, `data_key` identifies it.
+    # Returns at once: the files are parsed and ingested on background threads, and every
+    # session asking for the same data while it loads shares this ParallelIngest. It drops
+    # `_sources` when it finishes, so the cache entry holds the engine, not the uploads.
+    get_cache_stats()['engine']['misses'] += 1
+    os.makedirs(ENGINE_DB_DIR, exist_ok=True)
+    engine = HRLogicEngine(db_path=os.path.join(ENGINE_DB_DIR, f"{data_key}.sqlite"))
+    if engine.source_fingerprint == data_key:
+        # Warm start: an earlier process already loaded exactly these files
+        return ParallelIngest.completed(engine, engine.attendance_row_count())
+
+    # Attendance is the large table: its chunks stream into the engine as they are parsed
+    # (columns are validated per chunk) instead of being materialized as one DataFrame.
+    return ParallelIngest(
+        engine, _sources, get_ingest_cache(), validate=validate_reference,
+        on_loaded=lambda loaded: loaded.set_source_fingerprint(data_key),
+    ).start()
+
+def show_load_progress(load):
+    """Sidebar progress bars for a load running in the background, polled from this (script) thread."""
+    header = st.sidebar.empty()
+    header.markdown("#### ⏳ 파일 읽는 중")
+    stage = st.sidebar.empty()
+    bars = {source: st.sidebar.progress(0.0, text=LOAD_LABELS[source]) for source in SOURCES}
+    while True:
+        finished = load.wait(LOAD_POLL_SECONDS)
+        state = load.progress()
+        stage.caption(STAGE_LABELS[state['stage']])
+        for source, progress in state['sources'].items():
+            text = f"{LOAD_LABELS[source]}: {progress['rows']:,}행"
+            if progress['done']:
+                text += f" ✅ ({progress['seconds']:.1f}초)"
+            bars[source].progress(progress['fraction'] or 0.0, text=text)
+        if finished:
+            break
+    header.markdown("#### ✅ 파일 적재 완료")
+    stage.empty()
+
+def load_engine(data_key, sources):
+    get_cache_stats()['engine']['calls'] += 1
+    load = _start_engine_load(data_key, sources)
+    if not load.done:
+        show_load_progress(load)
+    try:
+        return load.result()
+    except Exception:
+        # Do not keep a failed load cached: the next run (e.g. with fixed files) starts over
+        _start_engine_load.clear(data_key, sources)
+        raise
+
+def run_analysis(engine, method, start=None, end=None, **options):
+    """
+    Run an HRLogicEngine analysis when its section is rendered. Results come from the engine's
+    memo (keyed by method, date range and options, dropped by every load), so reruns and other
+    sessions on the same data do not query again.
+    """
+    return getattr(engine, method)(start, end, **options)
+
+def show_engine_status(engine, attendance_rows, started):
+    """Sidebar: engine state, time spent on this page and cache / memo hit rates."""
+    st.sidebar.markdown("---")
+    st.sidebar.header("⚙️ Engine Status")
+    st.sidebar.success(f"✅ SQLite Engine Active")
+    st.sidebar.info(f"⏱️ Query Time: {time.perf_counter() - started:.4f} sec")
+    st.sidebar.info(f"📊 Rows Processed: {attendance_rows:,}")
+
+    cache_stats = get_cache_stats()
+    engine_hits = cache_stats['engine']['calls'] - cache_stats['engine']['misses']
+    ingest_cache = get_ingest_cache()
+    st.sidebar.caption(
+        f"🗄️ Cache — Engine: {engine_hits} hit / {cache_stats['engine']['misses']} miss · "
+        f"Result: {engine.memo_stats['hits']} hit / {engine.memo_stats['misses']} miss · "
+        f"Parquet: {ingest_cache.hits} hit / {ingest_cache.misses} miss"
+    )
+
+    # Engine Profiler: per-operation wall time, rows, SQLite VM steps and SQL text
+    with st.sidebar.expander("🔬 Engine Profiler"):
+        st.dataframe(engine.stats.summary(), hide_index=True)
+        load_record = engine.stats.last('ingest_attendance')
+        if load_record is not None:
+            st.caption("적재 단계별 소요 시간 (ms)")
+            st.dataframe(
+                pd.Series({k: round(v * 1000, 1) for k, v in load_record.steps.items()}, name='ms'),
+            )
+        st.caption("최근 실행 기록")
+        st.dataframe(engine.stats.to_frame().tail(20), hide_index=True)
+
+def show_data_quality(engine):
+    """Attendance rows rejected by validation: rows per reason and the first quarantined rows."""
+    counts = engine.quarantine_counts()
+    total = int(counts['rows'].sum())
+    if not total:
+        st.caption("✅ 데이터 품질 검사: 제외된 근태 기록이 없습니다.")
+        return
+    with st.expander(f"🧹 데이터 품질 검사 — 근태 기록 {total:,}건이 분석에서 제외되었습니다", expanded=False):
+        for column, (reason, rows) in zip(st.columns(len(counts)), counts.itertuples(index=False)):
+            column.metric(QUARANTINE_REASON_LABELS[reason], f"{rows:,}건")
+        st.caption(f"제외된 기록 (최대 {QUARANTINE_PREVIEW_ROWS:,}건)")
+        st.dataframe(engine.quarantined_attendance(limit=QUARANTINE_PREVIEW_ROWS), hide_index=True)
+
+def select_period(first_day, last_day):
+    """Sidebar period picker: whole data, one month, one quarter or a custom range. Returns (start, end) ISO dates."""
+    st.sidebar.markdown("---")
+    st.sidebar.header("📅 분석 기간")
+    if first_day is None:
+        return None, None
+    mode = st.sidebar.radio("기간 단위", ['전체', '월', '분기', '직접 선택'], horizontal=True)
+    if mode == '월':
+        months = pd.period_range(first_day, last_day, freq='M')[::-1]
+        period = st.sidebar.selectbox("월", months, format_func=lambda p: p.strftime('%Y-%m'))
+    elif mode == '분기':
+        quarters = pd.period_range(first_day, last_day, freq='Q')[::-1]
+        period = st.sidebar.selectbox("분기", quarters, format_func=lambda p: f"{p.year} Q{p.quarter}")
+    elif mode == '직접 선택':
+        first, last = date.fromisoformat(first_day), date.fromisoformat(last_day)
+        picked = st.sidebar.date_input("기간", value=(first, last), min_value=first, max_value=last)
+        # While the range is being picked only its first day is set
+        start, end = (picked + picked)[:2] if isinstance(picked, tuple) else (picked, picked)
+        return start.isoformat(), end.isoformat()
+    else:
+        return None, None
+    return period.start_time.strftime('%Y-%m-%d'), period.end_time.strftime('%Y-%m-%d')
 
 uploaded_emp = st.sidebar.file_uploader("직원 정보 (Employees)", type=['csv', 'xlsx'])
 uploaded_att = st.sidebar.file_uploader("근태 기록 (Attendance)", type=['csv', 'xlsx'])
@@ -36,62 +240,44 @@ uploaded_perf = st.sidebar.file_uploader("성과 지표 (Performance)", type=['c
 # Demo Data Toggle
 use_demo = st.sidebar.checkbox("데모 데이터 사용해보기", value=True)
 
-df_emp, df_att, df_perf = None, None, None
-
 try:
     if use_demo:
         try:
-            df_emp = pd.read_csv('data/employees.csv')
-            df_att = pd.read_csv('data/attendance.csv')
-            df_perf = pd.read_csv('data/performance.csv')
+            sources = []
+            for path in DEMO_FILES:
+                with open(path, 'rb') as f:
+                    sources.append((path, f.read()))
             st.sidebar.success("✅ 데모 데이터가 로드되었습니다.")
         except FileNotFoundError:
             st.sidebar.error("❌ 데모 데이터를 찾을 수 없습니다. 데이터 생성 스크립트를 실행해주세요.")
+            st.stop()
     elif uploaded_emp and uploaded_att and uploaded_perf:
-        df_emp = load_file(uploaded_emp)
-        df_att = load_file(uploaded_att)
-        df_perf = load_file(uploaded_perf)
+        sources = [(f.name, f.getvalue()) for f in (uploaded_emp, uploaded_att, uploaded_perf)]
         st.sidebar.success("✅ 파일 업로드 완료!")
     else:
         st.info("👈 왼쪽 사이드바에서 파일을 업로드하거나 '데모 데이터 사용'을 체크해주세요.")
         st.stop()
-        
-    # Check for required columns (Basic Validation)
-    required_cols = {
-        'employees': ['emp_id', 'department', 'hourly_rate', 'name'],
-        'attendance': ['emp_id', 'check_in', 'check_out', 'date'],
-        'performance': ['department', 'target_achievement_rate']
-    }
-    
-    # Simple validation function
-    def validate_columns(df, name, required):
-        missing = [col for col in required if col not in df.columns]
-        if missing:
-            raise ValueError(f"'{name}' 데이터에 다음 컬럼이 누락되었습니다: {missing}")
 
-    validate_columns(df_emp, "직원 정보", required_cols['employees'])
-    validate_columns(df_att, "근태 기록", required_cols['attendance'])
-    validate_columns(df_perf, "성과 지표", required_cols['performance'])
+    # Initialize Engine (cached across reruns, keyed by file content)
+    data_key = content_hash(sources)
+    engine, attendance_rows = load_engine(data_key, sources)
 
-    # Initialize Engine
-    engine = HRLogicEngine()
-    engine.load_data(df_emp, df_att, df_perf)
-    
-    # Run Analysis
-    import time
-    start_time = time.time()
-    df_dept_analysis = engine.run_department_analysis()
-    df_employee_ranking = engine.get_employee_ranking()
-    end_time = time.time()
+    # Sidebar: Analysis Period (answered from the daily rollups, not the raw punches)
+    period_start, period_end = select_period(*engine.date_span())
     
-    # Sidebar: Engine Status
-    st.sidebar.markdown("---")
-    st.sidebar.header("⚙️ Engine Status")
-    st.sidebar.success(f"✅ SQLite Engine Active")
-    st.sidebar.info(f"⏱️ Query Time: {end_time - start_time:.4f} sec")
-    st.sidebar.info(f"📊 Rows Processed: {len(df_att):,}")
+    # Each section below asks the engine for its own result when it is rendered, so the
+    # KPIs appear first and the heavier sections fill in as their queries finish
+    started = time.perf_counter()
+    df_dept_analysis = run_analysis(engine, 'run_department_analysis', period_start, period_end)
+
+    if df_dept_analysis.empty:
+        st.warning("선택한 기간에 분석할 근태 기록이 없습니다.")
+        show_engine_status(engine, attendance_rows, started)
+        st.stop()
 
     # --- KPI Section ---
+    if period_start or period_end:
+        st.caption(f"📅 분석 기간: {period_start} ~ {period_end}")
     total_cost = df_dept_analysis['total_labor_cost'].sum()
     avg_perf = df_dept_analysis['target_achievement_rate'].mean()
     total_hours = df_dept_analysis['total_hours'].sum()
@@ -100,6 +286,7 @@ try:
     c1.metric("💰 총 인건비 지출", f"₩{total_cost:,.0f}")
     c2.metric("⏱️ 총 근무 시간", f"{total_hours:,.0f} 시간")
     c3.metric("📈 평균 성과 달성률", f"{avg_perf*100:.1f}%")
+    show_data_quality(engine)
     
     # SQL Code Reveal (Moved to Top for Visibility)
     with st.expander("🛠️ [핵심] 이 데이터를 추출한 SQL 로직 보기 (Click to Expand)", expanded=False):
@@ -149,76 +336,142 @@ try:
             template="plotly_white"
         )
         st.plotly_chart(fig_scatter, use_container_width=True)
-    
+
+    # --- Efficiency Trend (per evaluation period) ---
+    st.markdown("#### 📈 평가 기간별 효율 지수 추이")
+    with st.spinner("기간별 추이 계산 중..."):
+        df_trend = run_analysis(engine, 'run_efficiency_trend', period_start, period_end)
+    if df_trend['evaluation_period'].nunique() > 1:
+        fig_trend = px.line(
+            df_trend,
+            x='period_start',
+            y='efficiency_index',
+            color='department',
+            markers=True,
+            hover_data=['evaluation_period', 'total_labor_cost', 'target_achievement_rate'],
+            labels={'period_start': '평가 기간', 'efficiency_index': '효율 지수', 'department': '부서'},
+            template="plotly_white"
+        )
+        st.plotly_chart(fig_trend, use_container_width=True)
+    else:
+        st.caption("성과 데이터에 평가 기간이 2개 이상 있으면 기간별 효율 추이가 표시됩니다.")
+
     # --- LEAKAGE DETECTOR Section (New Feature) ---
     st.header("🕵️ 인건비 누수 탐지 (Leakage Detector)")
     st.markdown("데이터 패턴 분석을 통해 **비효율적으로 비용이 새나가는 지점**을 찾아냅니다.")
     
-    df_pattern = engine.run_work_pattern_analysis()
-    
-    # Heatmap-style visual using Bar Chart
-    # Finding the "Leakage Point" (Max Avg Hours)
-    max_leakage = df_pattern.loc[df_pattern['avg_hours'].idxmax()]
-    
+    # Employee-day anomalies against each employee's rolling 28-day baseline
+    with st.spinner("직원별 근무 패턴 분석 중..."):
+        leaks = run_analysis(engine, 'run_leakage_detection', period_start, period_end)
+    leak_employees, leak_departments = leaks['employees'], leaks['departments']
+
     col_leak1, col_leak2 = st.columns([1, 2])
-    
+
     with col_leak1:
-        st.error(f"🚨 **탐지된 누수 리스크**")
-        st.markdown(f"""
-        **'{max_leakage['department']}'** 부서는  
-        **{max_leakage['day_of_week']}**에 평균 **{max_leakage['avg_hours']:.1f}시간**으로  
-        가장 근무 강도가 높습니다.
-        
-        👉 *인사이트: 해당 요일에 연장 근무가 집중되고 있으나, 성과 지표와의 상관관계를 점검하여 근무 일정 조정이 필요합니다.*
-        """)
-        
+        if leak_employees.empty:
+            st.success("✅ 선택한 기간에 탐지된 누수 리스크가 없습니다.")
+        else:
+            top_dept = leak_departments.iloc[0]
+            st.error(f"🚨 **탐지된 누수 리스크**")
+            st.markdown(f"""
+            **'{top_dept['department']}'** 부서에서 **{top_dept['flagged_employees']}명**이  
+            평소 대비 급증한 근무일 **{top_dept['flagged_days']}일**,  
+            퇴근 미기록 **{top_dept['missing_checkouts']}건**으로  
+            초과 인건비 약 **₩{top_dept['excess_cost']:,.0f}** 가 추정됩니다.
+
+            👉 *인사이트: 직원별 최근 28일 평균 대비 근무시간이 급증했거나 12시간 이상 근무한 날, 반복적인 퇴근 미기록을 기준으로 탐지했습니다.*
+            """)
+
         with st.expander("🔍 탐지 쿼리 보기"):
             st.code(engine.get_leakage_query(), language='sql')
 
     with col_leak2:
-        # Pivot for better visualization if needed, or just grouped bar
-        fig_pattern = px.bar(
-            df_pattern,
-            x='day_of_week',
-            y='avg_hours',
-            color='department',
-            barmode='group',
-            title="요일별 부서 근무 강도 (Work Load Pattern)",
-            labels={'avg_hours': '평균 근무시간', 'day_of_week': '요일'},
-            category_orders={'day_of_week': ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']},
-            template="plotly_white"
-        )
-        # Add Reference Line (Standard 8 hours)
-        fig_pattern.add_hline(y=8.0, line_dash="dash", line_color="green", annotation_text="표준 8시간")
-        st.plotly_chart(fig_pattern, use_container_width=True)
+        if not leak_employees.empty:
+            st.markdown("##### 누수 의심 직원 Top 10")
+            st.dataframe(
+                leak_employees.head(10)[['name', 'department', 'flagged_days', 'missing_checkouts', 'excess_hours', 'excess_cost']]
+                .rename(columns={
+                    'name': '이름', 'department': '부서', 'flagged_days': '급증일',
+                    'missing_checkouts': '퇴근 미기록', 'excess_hours': '초과시간', 'excess_cost': '추정 초과 인건비',
+                }),
+                hide_index=True,
+            )
 
     st.markdown("---")
     
     # --- Detail Tabs ---
-    tab1, tab2 = st.tabs(["📊 상세 차트", "📋 데이터 테이블"])
+    # on_change='rerun' makes the tabs lazy: only the selected tab's content (and its queries) runs
+    tab1, tab2 = st.tabs(["📊 상세 차트", "📋 데이터 테이블"], key='detail_tab', on_change='rerun')
     
-    with tab1:
-        c_a, c_b = st.columns(2)
-        with c_a: # ... column content remains same as previous but needs careful replacement if I replace the whole block
-            fig_cost = px.pie(df_dept_analysis, values='total_labor_cost', names='department', title="인건비 구성 비율")
-            st.plotly_chart(fig_cost, use_container_width=True)
-        with c_b:
-            fig_perf = px.bar(df_dept_analysis, x='department', y='target_achievement_rate', title="부서별 목표 달성률")
-            st.plotly_chart(fig_perf, use_container_width=True)
+    if tab1.open:
+        with tab1:
+            df_pattern = run_analysis(engine, 'run_work_pattern_analysis', period_start, period_end)
+            fig_pattern = px.bar(
+                df_pattern,
+                x='day_of_week',
+                y='avg_hours',
+                color='department',
+                barmode='group',
+                title="요일별 부서 근무 강도 (Work Load Pattern)",
+                labels={'avg_hours': '평균 근무시간', 'day_of_week': '요일'},
+                category_orders={'day_of_week': ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']},
+                template="plotly_white"
+            )
+            # Add Reference Line (Standard 8 hours)
+            fig_pattern.add_hline(y=8.0, line_dash="dash", line_color="green", annotation_text="표준 8시간")
+            st.plotly_chart(fig_pattern, use_container_width=True)
+
+            c_a, c_b = st.columns(2)
+            with c_a:
+                fig_cost = px.pie(df_dept_analysis, values='total_labor_cost', names='department', title="인건비 구성 비율")
+                st.plotly_chart(fig_cost, use_container_width=True)
+            with c_b:
+                fig_perf = px.bar(df_dept_analysis, x='department', y='target_achievement_rate', title="부서별 목표 달성률")
+                st.plotly_chart(fig_perf, use_container_width=True)
             
-    with tab2:
-        st.subheader("직원별 근태 랭킹 Top 10")
-        display_ranking = df_employee_ranking.rename(columns={
-            'name': '이름',
-            'department': '부서',
-            'level': '직급',
-            'total_hours': '총 근무시간'
-        })
-        st.table(display_ranking)
-
-        st.subheader("부서별 통합 지표")
-        st.dataframe(df_dept_analysis)
-        
+    if tab2.open:
+        with tab2:
+            st.subheader("직원별 근태 랭킹")
+            r1, r2, r3, r4 = st.columns(4)
+            rank_metric = r1.selectbox(
+                "기준", list(RANKING_METRIC_LABELS), format_func=RANKING_METRIC_LABELS.get, key='rank_metric'
+            )
+            rank_n = r2.number_input("인원 (N)", min_value=1, max_value=100, value=10, step=1, key='rank_n')
+            rank_scope = r3.selectbox("범위", ['전체'] + list(df_dept_analysis['department']), key='rank_scope')
+            rank_order = r4.radio("순서", ['상위', '하위'], horizontal=True, key='rank_order')
+            per_department = st.checkbox("부서별 순위", key='rank_per_department')
+            df_employee_ranking = run_analysis(
+                engine, 'get_employee_ranking', period_start, period_end,
+                n=int(rank_n), department=None if rank_scope == '전체' else rank_scope,
+                per_department=per_department, metric=rank_metric, ascending=rank_order == '하위',
+            )
+            display_ranking = df_employee_ranking.rename(columns={
+                'rank': '순위',
+                'name': '이름',
+                'department': '부서',
+                'level': '직급',
+                'total_hours': '총 근무시간',
+                'total_labor_cost': '인건비',
+                'overtime_days': '초과근무일',
+            })
+            st.dataframe(display_ranking, hide_index=True)
+
+            st.subheader("부서별 통합 지표")
+            st.dataframe(df_dept_analysis)
+
+            # The detail report is never materialized as one DataFrame: on click it is streamed
+            # page by page from the engine into a temporary file, which is then sent
+            st.subheader("근태 비용 상세 다운로드")
+            export_format = st.radio("파일 형식", ['csv', 'parquet'], horizontal=True, key='export_format')
+            st.download_button(
+                "📥 근태 비용 상세 내려받기",
+                data=cost_export(engine, export_format, period_start, period_end),
+                file_name=f"cost_calculation_{period_start or 'all'}_{period_end or 'all'}.{export_format}",
+                mime='text/csv' if export_format == 'csv' else 'application/octet-stream',
+                on_click='ignore',
+            )
+
+    show_engine_status(engine, attendance_rows, started)
 
 
 except Exception as e:
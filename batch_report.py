@@ -0,0 +1,226 @@
+# Only the standard library is imported up front, so `--help`, argument errors and the file
+# discovery start instantly; pandas, NumPy and the engine are imported by the worker
+# processes that need them (see run_period).
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+SOURCES = ('employees', 'attendance', 'performance')
+# When a period has the same table in several formats, read the cheapest one
+SOURCE_EXTENSIONS = ('.parquet', '.csv', '.xlsx', '.xls')
+SOURCE_PATTERN = re.compile(r'^(?P<source>employees|attendance|performance)(?:[_-](?P<period>.+))?$', re.IGNORECASE)
+
+OUTPUT_FORMATS = ('csv', 'json', 'parquet')
+
+# Report name -> engine method called with (start, end). run_leakage_detection returns
+# several tables, written as leakage_<table>.
+ANALYSES = {
+    'departments': 'run_department_analysis',
+    'ranking': 'get_employee_ranking',
+    'work_pattern': 'run_work_pattern_analysis',
+    'efficiency_trend': 'run_efficiency_trend',
+    'leakage': 'run_leakage_detection',
+}
+# Row-level cost detail, streamed page by page (not part of the default report set)
+COST_REPORT = 'cost'
+REPORTS = (*ANALYSES, COST_REPORT)
+
+
+def discover_periods(input_dir):
+    """
+    Return {period: {'employees': path, 'attendance': path, 'performance': path}} for the
+    exports under `input_dir`, sorted by period. Periods missing one of the tables are kept
+    so the caller can report them.
+    """
+    found = {}
+
+    def add(period, source, path):
+        current = found.setdefault(period, {}).get(source)
+        if current is None or _extension_rank(path) < _extension_rank(current):
+            found[period][source] = path
+
+    default_period = os.path.basename(os.path.normpath(os.path.abspath(input_dir)))
+    for entry in sorted(os.scandir(input_dir), key=lambda e: e.name):
+        if entry.is_dir():
+            for child in sorted(os.scandir(entry.path), key=lambda e: e.name):
+                match = _match_source(child)
+                if match and not match.group('period'):
+                    add(entry.name, match.group('source').lower(), child.path)
+        else:
+            match = _match_source(entry)
+            if match:
+                add(match.group('period') or default_period, match.group('source').lower(), entry.path)
+    return dict(sorted(found.items()))
+
+
+def _match_source(entry):
+    stem, extension = os.path.splitext(entry.name)
+    if not entry.is_file() or extension.lower() not in SOURCE_EXTENSIONS:
+        return None
+    return SOURCE_PATTERN.match(stem)
+
+
+def _extension_rank(path):
+    return SOURCE_EXTENSIONS.index(os.path.splitext(path)[1].lower())
+
+
+def _write_frame(df, path, fmt):
+    if fmt == 'csv':
+        # BOM so Excel opens the Korean text as UTF-8 (same as the dashboard download)
+        df.to_csv(path, index=False, encoding='utf-8-sig')
+    elif fmt == 'json':
+        df.to_json(path, orient='records', force_ascii=False, indent=1)
+    else:
+        df.to_parquet(path, index=False)
+
+
+def _write_cost(engine, path, fmt, start, end):
+    """Stream the cost detail; JSON is written as JSON Lines so it can be appended chunk by chunk."""
+    if fmt != 'json':
+        return engine.export_cost_calculation(path, fmt, start, end)
+    rows = 0
+    with open(path, 'w', encoding='utf-8') as handle:
+        for chunk in engine.iter_cost_calculation(start, end):
+            chunk.to_json(handle, orient='records', lines=True, force_ascii=False)
+            rows += len(chunk)
+    return rows
+
+
+def run_period(period, files, output_dir, fmt, reports, backend='sqlite', start=None, end=None):
+    """
+    Load one period into a fresh engine and write its reports to output_dir/period/.
+    Runs in a worker process. Returns a summary dict with the files written.
+    """
+    import pandas as pd
+
+    from logic_engine import HRLogicEngine, read_table_chunks
+
+    began = time.perf_counter()
+    engine = HRLogicEngine(backend=backend)
+    try:
+        df_emp = pd.concat(read_table_chunks(files['employees']), ignore_index=True)
+        df_perf = pd.concat(read_table_chunks(files['performance']), ignore_index=True)
+        engine.load_reference_data(df_emp, df_perf)
+        attendance_rows = engine.ingest_attendance(files['attendance'])
+        quarantined = dict(engine.quarantine_counts().values.tolist())
+
+        target = os.path.join(output_dir, period)
+        os.makedirs(target, exist_ok=True)
+        extension = 'jsonl' if fmt == 'json' else fmt
+        written = {}
+        for report in reports:
+            if report == COST_REPORT:
+                path = os.path.join(target, f"{report}.{extension}")
+                written[report] = {'path': path, 'rows': _write_cost(engine, path, fmt, start, end)}
+                continue
+            result = getattr(engine, ANALYSES[report])(start, end)
+            tables = {f"{report}_{name}": df for name, df in result.items()} if isinstance(result, dict) \
+                else {report: result}
+            for name, df in tables.items():
+                path = os.path.join(target, f"{name}.{fmt}")
+                _write_frame(df, path, fmt)
+                written[name] = {'path': path, 'rows': len(df)}
+    finally:
+        engine.close()
+    return {
+        'period': period,
+        'attendance_rows': attendance_rows,
+        'quarantined': quarantined,
+        'seconds': round(time.perf_counter() - began, 3),
+        'reports': written,
+    }
+
+
+def run_batch(periods, output_dir, fmt='csv', reports=tuple(ANALYSES), workers=1, backend='sqlite',
+              start=None, end=None, log=print):
+    """
+    Run every complete period (see discover_periods) with up to `workers` processes.
+    Returns (results, errors): summaries of the finished periods in period order and
+    {period: message} for the incomplete or failed ones.
+    """
+    errors = {}
+    jobs = {}
+    for period, files in periods.items():
+        missing = [source for source in SOURCES if source not in files]
+        if missing:
+            errors[period] = f"missing {', '.join(missing)} file"
+        else:
+            jobs[period] = files
+
+    results = {}
+    args = (output_dir, fmt, list(reports), backend, start, end)
+    if workers <= 1 or len(jobs) <= 1:
+        for period, files in jobs.items():
+            try:
+                results[period] = run_period(period, files, *args)
+                log(_summary_line(results[period]))
+            except Exception as exc:
+                errors[period] = f"{type(exc).__name__}: {exc}"
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+            futures = {pool.submit(run_period, period, files, *args): period for period, files in jobs.items()}
+            for future in as_completed(futures):
+                period = futures[future]
+                try:
+                    results[period] = future.result()
+                    log(_summary_line(results[period]))
+                except Exception as exc:
+                    errors[period] = f"{type(exc).__name__}: {exc}"
+    for period, message in sorted(errors.items()):
+        log(f"{period}: FAILED - {message}")
+    return [results[period] for period in sorted(results)], errors
+
+
+def _summary_line(result):
+    return (f"{result['period']}: {result['attendance_rows']:,} attendance rows "
+            f"({sum(result['quarantined'].values()):,} quarantined), "
+            f"{len(result['reports'])} files in {result['seconds']:.2f}s")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Run the LogicHR analyses for every period in a directory of exports (headless)"
+    )
+    parser.add_argument('input_dir', help="directory of employees / attendance / performance exports")
+    parser.add_argument('--output-dir', default='reports', help="reports go to OUTPUT_DIR/<period>/")
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default='csv')
+    parser.add_argument('--reports', default=','.join(ANALYSES),
+                        help=f"comma-separated reports: {', '.join(REPORTS)} (cost = row-level cost detail)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="periods processed in parallel")
+    parser.add_argument('--backend', choices=('sqlite', 'numpy'), default='sqlite')
+    parser.add_argument('--start', help="only analyse dates from START (YYYY-MM-DD)")
+    parser.add_argument('--end', help="only analyse dates up to END (YYYY-MM-DD)")
+    args = parser.parse_args(argv)
+
+    args.reports = [report.strip() for report in args.reports.split(',') if report.strip()]
+    unknown = [report for report in args.reports if report not in REPORTS]
+    if unknown:
+        parser.error(f"unknown reports {unknown}; choose from {', '.join(REPORTS)}")
+    if not os.path.isdir(args.input_dir):
+        parser.error(f"{args.input_dir} is not a directory")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    periods = discover_periods(args.input_dir)
+    if not periods:
+        print(f"No employees / attendance / performance files found in {args.input_dir}", file=sys.stderr)
+        return 2
+
+    print(f"{len(periods)} period(s) in {args.input_dir}: {', '.join(periods)}")
+    results, errors = run_batch(periods, args.output_dir, args.format, args.reports, args.workers,
+                                args.backend, args.start, args.end)
+    os.makedirs(args.output_dir, exist_ok=True)
+    with open(os.path.join(args.output_dir, 'manifest.json'), 'w', encoding='utf-8') as handle:
+        json.dump({'format': args.format, 'start': args.start, 'end': args.end,
+                   'periods': results, 'errors': errors}, handle, ensure_ascii=False, indent=1)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
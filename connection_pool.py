@@ -0,0 +1,137 @@
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager, nullcontext
+
+
+class ReadWriteLock:
+    """
+    Many concurrent readers or one writer. The writer may re-enter, and a waiting
+    writer blocks new readers so a steady stream of queries cannot starve a load.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writer = None
+        self._writer_depth = 0
+        self._writers_waiting = 0
+
+    def held_by_current_thread(self):
+        return self._writer == threading.get_ident()
+
+    @contextmanager
+    def read(self):
+        with self._cond:
+            while self._writer is not None or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if self._readers == 0:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        me = threading.get_ident()
+        with self._cond:
+            self._writers_waiting += 1
+            while (self._writer is not None and self._writer != me) or self._readers:
+                self._cond.wait()
+            self._writers_waiting -= 1
+            self._writer = me
+            self._writer_depth += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer_depth -= 1
+                if self._writer_depth == 0:
+                    self._writer = None
+                    self._cond.notify_all()
+
+
+class ConnectionPool:
+    """
+    SQLite connections for one engine database, safe to share between threads:
+    a single writer connection that every load goes through (serialized by a lock),
+    plus one read-only connection per querying thread.
+
+    db_path=None uses a named shared-cache in-memory database. Shared-cache connections
+    lock whole tables instead of reading a snapshot, so queries wait while a load is
+    running. With a file-backed (WAL) database queries keep reading the last committed
+    data while the writer works.
+    """
+
+    def __init__(self, db_path=None, on_connect=None):
+        if db_path is None:
+            self.database = f"file:logichr-{uuid.uuid4().hex}?mode=memory&cache=shared"
+            self._uri = True
+        else:
+            self.database = db_path
+            self._uri = False
+        self.file_backed = db_path is not None
+        self._on_connect = on_connect
+        self._lock = ReadWriteLock()
+        self._readers = {}  # thread ident -> (thread, connection)
+        self._readers_lock = threading.Lock()
+        # Also keeps a shared in-memory database alive for as long as the pool exists
+        self.writer = self._connect()
+
+    def _connect(self):
+        # Connections are confined to one thread in practice; check_same_thread=False only
+        # lets close() / pruning release them from another thread.
+        conn = sqlite3.connect(self.database, uri=self._uri, check_same_thread=False)
+        if self._on_connect is not None:
+            self._on_connect(conn)
+        return conn
+
+    @contextmanager
+    def write(self):
+        """Exclusive use of the writer connection (waits for running queries on an in-memory database)."""
+        with self._lock.write():
+            yield self.writer
+
+    @contextmanager
+    def read(self):
+        """The calling thread's read connection."""
+        if self._lock.held_by_current_thread():
+            # Inside a load: read through the writer, which sees its own uncommitted rows
+            yield self.writer
+            return
+        conn = self._reader()
+        with nullcontext() if self.file_backed else self._lock.read():
+            yield conn
+
+    def _reader(self):
+        thread = threading.current_thread()
+        entry = self._readers.get(thread.ident)
+        if entry is not None and entry[0] is thread:
+            return entry[1]
+        conn = self._connect()
+        conn.execute("PRAGMA query_only = ON")
+        with self._readers_lock:
+            self._prune()
+            self._readers[thread.ident] = (thread, conn)
+        return conn
+
+    def _prune(self):
+        """Close the read connections of threads that have finished (e.g. old Streamlit script runs)."""
+        for ident, (thread, conn) in list(self._readers.items()):
+            if not thread.is_alive():
+                conn.close()
+                del self._readers[ident]
+
+    @property
+    def reader_count(self):
+        return len(self._readers)
+
+    def close(self):
+        with self._readers_lock:
+            for _, conn in self._readers.values():
+                conn.close()
+            self._readers.clear()
+        self.writer.close()
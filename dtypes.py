@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+
+# Compact dtypes (see normalize_dtypes): repeated labels become categoricals, ids and counts
+# int32 when they fit, rates float32 when that is lossless. Dates and clock times stay text
+# (Arrow-backed strings); the fact table already holds them as epoch integers.
+CATEGORY_COLUMNS = ('department', 'level', 'name', 'day_of_week')
+INT32_COLUMNS = ('emp_id', 'rank', 'overtime_days', 'active_headcount', 'record_count', 'flagged_employees', 'flagged_days',
+                 'spike_days', 'long_days', 'missing_checkouts')
+FLOAT32_COLUMNS = ('hourly_rate',)
+# Weekday labels in strftime('%w') order (Sunday = 0), as the engine reports them
+DAY_NAMES = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday']
+
+def _fits_int32(series):
+    if not pd.api.types.is_integer_dtype(series) or isinstance(series.dtype, pd.CategoricalDtype):
+        return False
+    info = np.iinfo('int32')
+    return series.empty or (info.min <= series.min() and series.max() <= info.max)
+
+def _float32_exact(series):
+    """True when every value survives a float32 round trip (e.g. whole-won hourly rates)."""
+    if not pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+        return False
+    values = series.to_numpy(dtype='float64', na_value=np.nan)
+    with np.errstate(over='ignore'):
+        return np.array_equal(values.astype('float32').astype('float64'), values, equal_nan=True)
+
+def normalize_dtypes(df, dtypes=None):
+    """
+    Return `df` with compact dtypes: CATEGORY_COLUMNS as categoricals, INT32_COLUMNS as int32
+    and FLOAT32_COLUMNS as float32 where the values allow it; other columns are unchanged.
+    `dtypes` pins the dtype of some columns - the engine pins the categories of the loaded
+    employees (result_dtypes()), so its results concatenate and merge without falling back to text.
+    The dtype never depends on the row count: a one-row result gets the same categoricals as a
+    million-row one.
+    """
+    dtypes = dtypes or {}
+    target = {}
+    for column in df.columns:
+        series = df[column]
+        pinned = dtypes.get(column)
+        if isinstance(pinned, pd.CategoricalDtype) or column in CATEGORY_COLUMNS:
+            target[column] = pinned if pinned is not None else 'category'
+        elif column in INT32_COLUMNS and _fits_int32(series) and pinned in (None, 'int32'):
+            target[column] = 'int32'
+        elif column in FLOAT32_COLUMNS and pd.api.types.is_numeric_dtype(series) and \
+                (pinned == 'float32' or (pinned is None and _float32_exact(series))):
+            target[column] = 'float32'
+    changed = {
+        column: df[column].astype(dtype) for column, dtype in target.items()
+        if not (dtype == 'category' and isinstance(df[column].dtype, pd.CategoricalDtype)) and df[column].dtype != dtype
+    }
+    if not changed:
+        return df
+    df = df.copy(deep=False)
+    for column, values in changed.items():
+        df[column] = values
+    return df
+
+def result_dtypes(df_employees):
+    """Dtypes every engine result of these employees shares: their labels and weekdays as fixed categories, compact ids / rates."""
+    dtypes = {
+        column: pd.CategoricalDtype(sorted(df_employees[column].dropna().unique()))
+        for column in ('department', 'level', 'name') if column in df_employees
+    }
+    dtypes['day_of_week'] = pd.CategoricalDtype(DAY_NAMES)
+    if _fits_int32(df_employees['emp_id']):
+        dtypes['emp_id'] = 'int32'
+    if _float32_exact(df_employees['hourly_rate']):
+        dtypes['hourly_rate'] = 'float32'
+    return dtypes
@@ -0,0 +1,201 @@
+import hashlib
+import io
+import os
+import tempfile
+import threading
+import uuid
+
+import pandas as pd
+
+from logic_engine import DEFAULT_CHUNKSIZE, _format_temporal, read_table_chunks
+
+# Cache location and size cap (override with LOGICHR_CACHE_DIR / the constructor)
+DEFAULT_CACHE_DIR = os.environ.get(
+    'LOGICHR_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'logichr_ingest_cache')
+)
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3  # 2 GiB
+
+# A cache file's schema is fixed before its first chunk is written, so it cannot come from
+# type inference on that chunk: a column that is all-integer (or all-empty) at first may hold
+# NaN (or text) further down. Known numeric columns get these types; a value that does not
+# parse as one (e.g. a mistyped emp_id 'X12') is cached as missing, so the row still loads and
+# the attendance validator quarantines it. Every other column is cached as text, with Excel
+# date / time cells formatted like the CSV files.
+NUMERIC_COLUMNS = {'emp_id': 'int64', 'hourly_rate': 'float64', 'target_achievement_rate': 'float64'}
+TEMPORAL_FORMATS = {'date': '%Y-%m-%d', 'check_in': '%H:%M:%S', 'check_out': '%H:%M:%S', 'evaluation_period': '%Y-%m'}
+
+
+class IngestCache:
+    """
+    On-disk columnar cache for uploaded CSV / XLSX files.
+
+    The first time a file is seen (identified by the SHA-256 of its bytes) it is
+    converted to Parquet, chunk by chunk. Later loads memory-map the Parquet file
+    and skip CSV / Excel parsing entirely. Least-recently-used files are evicted
+    once the cache grows past `max_bytes`.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        # Sources may be parsed on several threads at once (see parallel_ingest.py)
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def parquet_path(self, name, data, progress=None):
+        """
+        Return the cached Parquet path for a (file name, raw bytes) source,
+        converting it on a cache miss. `progress(rows, fraction)` is called after every
+        parsed chunk (fraction is None when it cannot be estimated).
+        """
+        path = self._path(data)
+        if self._lookup(path):
+            return path
+        for _ in self._convert_chunks(name, data, path, DEFAULT_CHUNKSIZE, progress):
+            pass
+        self._evict(keep=path)
+        return path
+
+    def load(self, name, data, progress=None):
+        """Load a (file name, raw bytes) source as a DataFrame through the cache."""
+        import pyarrow.parquet as pq
+
+        return pq.read_table(self.parquet_path(name, data, progress), memory_map=True).to_pandas()
+
+    def iter_chunks(self, name, data, chunksize=DEFAULT_CHUNKSIZE, progress=None):
+        """
+        Yield a (file name, raw bytes) source as DataFrame chunks. On a miss every chunk is
+        yielded as soon as it is parsed (and appended to the cache file), so a consumer can
+        ingest it while the rest of the file is still being parsed; on a hit the cached
+        Parquet file is streamed. `progress` as in parquet_path().
+        """
+        path = self._path(data)
+        if self._lookup(path):
+            import pyarrow.parquet as pq
+
+            parquet_file = pq.ParquetFile(path, memory_map=True)
+            total, rows = parquet_file.metadata.num_rows, 0
+            for batch in parquet_file.iter_batches(batch_size=chunksize):
+                rows += batch.num_rows
+                if progress is not None:
+                    progress(rows, rows / total)
+                yield batch.to_pandas()
+            return
+        yield from self._convert_chunks(name, data, path, chunksize, progress)
+        self._evict(keep=path)
+
+    def _path(self, data):
+        return os.path.join(self.cache_dir, hashlib.sha256(data).hexdigest() + '.parquet')
+
+    def _lookup(self, path):
+        """Count a hit or miss for `path`; True when it is already cached."""
+        hit = os.path.exists(path)
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if hit:
+            os.utime(path)  # mark as recently used for LRU eviction
+        return hit
+
+    def _convert_chunks(self, name, data, path, chunksize, progress=None):
+        """Parse the source into the cache file at `path`, yielding every parsed chunk on the way."""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        buffer = io.BytesIO(data)
+        buffer.name = name
+        expected_rows = _xlsx_row_count(buffer) if name.lower().endswith(('.xls', '.xlsx')) else None
+        # Write to a temporary name first so readers never see a half-written file
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        writer = None
+        rows = 0
+        try:
+            for chunk in read_table_chunks(buffer, chunksize):
+                chunk = _cache_types(chunk)
+                if writer is None:
+                    schema = pa.schema([
+                        (column, pa.type_for_alias(NUMERIC_COLUMNS.get(column, 'string'))) for column in chunk.columns
+                    ])
+                    writer = pq.ParquetWriter(tmp_path, schema)
+                writer.write_table(pa.Table.from_pandas(chunk, schema=writer.schema, preserve_index=False))
+                rows += len(chunk)
+                if progress is not None:
+                    # CSV: bytes consumed by the parser; Excel: rows against the sheet's dimension
+                    if expected_rows is None:
+                        fraction = None if buffer.closed else buffer.tell() / max(len(data), 1)
+                    else:
+                        fraction = min(rows / max(expected_rows, 1), 1.0)
+                    progress(rows, fraction)
+                yield chunk
+            if writer is None:
+                pd.DataFrame().to_parquet(tmp_path)
+        except BaseException:
+            if writer is not None:
+                writer.close()
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        if writer is not None:
+            writer.close()
+        os.replace(tmp_path, path)
+
+    def _evict(self, keep=None):
+        """Delete least-recently-used Parquet files until the cache fits in max_bytes."""
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith('.parquet') and entry.is_file():
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+
+def _cache_types(chunk):
+    """
+    `chunk` with the NUMERIC_COLUMNS as numbers (missing where a value does not parse, or is not
+    whole for an integer column) and every other column as text (missing values stay missing).
+    """
+    columns = {}
+    for column in chunk.columns:
+        values = chunk[column]
+        if column in NUMERIC_COLUMNS:
+            values = pd.to_numeric(values, errors='coerce')
+            if NUMERIC_COLUMNS[column] == 'int64':
+                values = values.where(values % 1 == 0)
+        else:
+            if column in TEMPORAL_FORMATS:
+                values = _format_temporal(values, TEMPORAL_FORMATS[column])
+            values = values.astype('str')
+        columns[column] = values
+    return pd.DataFrame(columns, index=chunk.index)
+
+
+def _xlsx_row_count(buffer):
+    """Data rows of the active sheet from its stored dimension (None when the file has none)."""
+    from openpyxl import load_workbook
+
+    try:
+        workbook = load_workbook(buffer, read_only=True)
+        try:
+            max_row = workbook.active.max_row
+        finally:
+            workbook.close()
+    except Exception:
+        return None  # the chunked reader reports the actual error
+    finally:
+        buffer.seek(0)
+    return None if max_row is None else max(max_row - 1, 0)
@@ -0,0 +1,124 @@
+import numpy as np
+import pandas as pd
+
+# Rolling baseline: an employee's worked days in the previous WINDOW_DAYS calendar days
+WINDOW_DAYS = 28
+# Days a baseline needs before a z-score is computed
+MIN_BASELINE_DAYS = 5
+# A day is an overtime spike when it is this many standard deviations above the baseline
+Z_THRESHOLD = 3.0
+# Floor for the baseline standard deviation (minutes), so a perfectly regular schedule
+# does not turn a 10-minute deviation into a huge z-score
+MIN_STD_MINUTES = 30.0
+# A day this long is flagged whatever the baseline says
+LONG_DAY_HOURS = 12.0
+# Reference day for the excess hours of a long day without a baseline
+STANDARD_DAY_HOURS = 8.0
+# Missing check-outs in the analysed range from which an employee is flagged
+MISSING_CHECKOUT_THRESHOLD = 3
+
+EMPLOYEE_COLUMNS = ['emp_id', 'name', 'department', 'level', 'flagged_days', 'spike_days', 'long_days',
+                    'missing_checkouts', 'max_z_score', 'excess_hours', 'excess_cost']
+DEPARTMENT_COLUMNS = ['department', 'flagged_employees', 'flagged_days', 'spike_days', 'long_days',
+                      'missing_checkouts', 'excess_hours', 'excess_cost']
+
+
+def flag_days(minutes, baseline_days, baseline_sum, baseline_sumsq,
+              z_threshold=Z_THRESHOLD, long_day_hours=LONG_DAY_HOURS):
+    """
+    Per employee-day arrays: worked minutes and the window aggregates over the employee's
+    previous days (count, sum and sum of squares of their minutes).
+    Returns (spike, long_day, z_score, baseline mean minutes) arrays.
+    """
+    minutes = np.asarray(minutes, dtype='float64')
+    n = np.asarray(baseline_days, dtype='float64')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = np.asarray(baseline_sum, dtype='float64') / n
+        variance = np.asarray(baseline_sumsq, dtype='float64') / n - mean ** 2
+        std = np.maximum(np.sqrt(np.clip(np.nan_to_num(variance), 0, None)), MIN_STD_MINUTES)
+        has_baseline = n >= MIN_BASELINE_DAYS
+        z = np.where(has_baseline, (minutes - mean) / std, np.nan)
+    spike = has_baseline & (z >= z_threshold)
+    long_day = minutes >= long_day_hours * 60
+    return spike, long_day, z, np.where(has_baseline, mean, np.nan)
+
+
+def score_days(days, z_threshold=Z_THRESHOLD, long_day_hours=LONG_DAY_HOURS):
+    """
+    Flag employee-days against their rolling baseline.
+
+    `days` has one row per (date, emp_id) with name, department, level, hourly_rate,
+    total_minutes and the window aggregates over the employee's previous days:
+    baseline_days (count), baseline_sum and baseline_sumsq (of total_minutes).
+    Returns the flagged days, costliest first.
+    """
+    minutes = days['total_minutes'].to_numpy(dtype='float64')
+    spike, long_day, z, mean = flag_days(
+        minutes, days['baseline_days'], days['baseline_sum'], days['baseline_sumsq'],
+        z_threshold, long_day_hours,
+    )
+    flagged = spike | long_day
+    reference = np.where(np.isnan(mean), STANDARD_DAY_HOURS * 60, mean)
+    excess_hours = np.clip(minutes - reference, 0, None) / 60.0
+
+    result = days.loc[flagged, ['date', 'emp_id', 'name', 'department', 'level']].assign(
+        hours=minutes[flagged] / 60.0,
+        baseline_hours=mean[flagged] / 60.0,
+        z_score=z[flagged],
+        spike=spike[flagged],
+        long_day=long_day[flagged],
+        excess_hours=excess_hours[flagged],
+        excess_cost=excess_hours[flagged] * days['hourly_rate'].to_numpy(dtype='float64')[flagged],
+    )
+    return result.sort_values(
+        ['excess_cost', 'date', 'emp_id'], ascending=[False, True, True], kind='stable'
+    ).reset_index(drop=True)
+
+
+def rank_leakage(flagged_days, missing, missing_threshold=MISSING_CHECKOUT_THRESHOLD):
+    """
+    Rank employees and departments from the flagged days and the per-employee missing check-out
+    counts (`missing`: emp_id, name, department, level, missing_checkouts).
+    An employee is listed with at least one flagged day or `missing_threshold` missing check-outs.
+    Returns {'flagged_days', 'employees', 'departments'}, each ordered by estimated excess cost.
+    """
+    per_employee = flagged_days.groupby('emp_id', sort=False).agg(
+        name=('name', 'first'),
+        department=('department', 'first'),
+        level=('level', 'first'),
+        flagged_days=('date', 'size'),
+        spike_days=('spike', 'sum'),
+        long_days=('long_day', 'sum'),
+        max_z_score=('z_score', 'max'),
+        excess_hours=('excess_hours', 'sum'),
+        excess_cost=('excess_cost', 'sum'),
+    ).reset_index()
+    repeated = missing[missing['missing_checkouts'] >= missing_threshold]
+    employees = per_employee.merge(
+        repeated, on='emp_id', how='outer', suffixes=('', '_missing')
+    )
+    for column in ['name', 'department', 'level']:
+        employees[column] = employees[column].fillna(employees.pop(f'{column}_missing'))
+    # Also report (sub-threshold) missing check-outs of employees flagged for their hours
+    counts = missing.set_index('emp_id')['missing_checkouts']
+    employees['missing_checkouts'] = employees['emp_id'].map(counts).fillna(0).astype('int64')
+    for column in ['flagged_days', 'spike_days', 'long_days']:
+        employees[column] = employees[column].fillna(0).astype('int64')
+    employees[['excess_hours', 'excess_cost']] = employees[['excess_hours', 'excess_cost']].fillna(0.0)
+    employees = employees.sort_values(
+        ['excess_cost', 'missing_checkouts', 'emp_id'], ascending=[False, False, True], kind='stable'
+    ).reset_index(drop=True)[EMPLOYEE_COLUMNS]
+
+    departments = employees.groupby('department', sort=True).agg(
+        flagged_employees=('emp_id', 'size'),
+        flagged_days=('flagged_days', 'sum'),
+        spike_days=('spike_days', 'sum'),
+        long_days=('long_days', 'sum'),
+        missing_checkouts=('missing_checkouts', 'sum'),
+        excess_hours=('excess_hours', 'sum'),
+        excess_cost=('excess_cost', 'sum'),
+    ).reset_index()
+    departments = departments.sort_values(
+        ['excess_cost', 'department'], ascending=[False, True], kind='stable'
+    ).reset_index(drop=True)[DEPARTMENT_COLUMNS]
+    return {'flagged_days': flagged_days, 'employees': employees, 'departments': departments}
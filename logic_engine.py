@@ -1,174 +1,1704 @@
-import sqlite3
+import inspect
+import itertools
+import os
+import threading
+from contextlib import ExitStack, contextmanager
+from functools import wraps
+
 import pandas as pd
 import numpy as np
 
+from connection_pool import ConnectionPool
+from dtypes import normalize_dtypes, result_dtypes
+from leakage import (
+    LONG_DAY_HOURS, MIN_BASELINE_DAYS, MIN_STD_MINUTES, MISSING_CHECKOUT_THRESHOLD, WINDOW_DAYS, Z_THRESHOLD,
+    rank_leakage, score_days,
+)
+from parallel_agg import ShardPool
+from profiling import EngineStats, profiled
+from scenarios import ScenarioModel
+from validation import QUARANTINE_COLUMNS, REASONS, AttendanceValidator, quarantine_frame, reason_counts
+from vector_backend import OVERTIME_DAY_MINUTES, VectorizedBackend, department_frame, work_pattern_frame
+
+# Typed schema for the source tables. Replaces DataFrame.to_sql(if_exists='replace'),
+# which created untyped tables without keys or indexes.
+SCHEMA_DDL = """
+DROP TABLE IF EXISTS employees;
+DROP TABLE IF EXISTS attendance;
+DROP TABLE IF EXISTS performance;
+DROP TABLE IF EXISTS performance_periods;
+DROP TABLE IF EXISTS attendance_quarantine;
+CREATE TABLE employees (
+    emp_id          INTEGER PRIMARY KEY,
+    name            TEXT,
+    department      TEXT,
+    level           TEXT,
+    hourly_rate     REAL
+);
+CREATE TABLE attendance (
+    emp_id          INTEGER NOT NULL,
+    date            TEXT NOT NULL,
+    check_in        TEXT,
+    check_out       TEXT
+);
+-- Attendance rows rejected by validation.AttendanceValidator, with the reason (one of REASONS)
+CREATE TABLE attendance_quarantine (
+    emp_id          INTEGER,
+    date            TEXT,
+    check_in        TEXT,
+    check_out       TEXT,
+    reason          TEXT NOT NULL
+);
+CREATE TABLE performance (
+    department              TEXT NOT NULL,
+    target_achievement_rate REAL,
+    evaluation_period       TEXT
+);
+-- First / last day of every evaluation period in performance (see PERFORMANCE_PERIODS_BUILD)
+CREATE TABLE performance_periods (
+    evaluation_period TEXT PRIMARY KEY,
+    period_start    TEXT NOT NULL,
+    period_end      TEXT NOT NULL
+);
+CREATE INDEX idx_attendance_emp_date ON attendance (emp_id, date);
+CREATE INDEX idx_performance_dept_period ON performance (department, evaluation_period)
+"""
+
+# Evaluation periods may be months ('2024-01'), quarters ('2024-Q1') or years ('2024').
+# Each distinct one is parsed once into a date span; attendance is bucketed by joining its days
+# to these spans. Rows with another (or no) period have no span and apply to every date range.
+PERFORMANCE_PERIODS_BUILD = """
+INSERT INTO performance_periods (evaluation_period, period_start, period_end)
+SELECT evaluation_period, period_start, date(period_start, '+' || months || ' months', '-1 day')
+FROM (
+    SELECT
+        evaluation_period,
+        date(CASE
+            WHEN evaluation_period GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]'
+                THEN evaluation_period || '-01'
+            WHEN evaluation_period GLOB '[0-9][0-9][0-9][0-9]-Q[1-4]'
+                THEN printf('%s-%02d-01', substr(evaluation_period, 1, 4), substr(evaluation_period, 7) * 3 - 2)
+            WHEN evaluation_period GLOB '[0-9][0-9][0-9][0-9]'
+                THEN evaluation_period || '-01-01'
+        END) AS period_start,
+        CASE
+            WHEN evaluation_period GLOB '*-Q*' THEN 3
+            WHEN length(evaluation_period) = 4 THEN 12
+            ELSE 1
+        END AS months
+    FROM (SELECT DISTINCT evaluation_period FROM performance)
+)
+WHERE period_start IS NOT NULL
+"""
+
+# Columns inserted per table (optional columns missing from an upload are stored as NULL)
+TABLE_COLUMNS = {
+    'employees': ['emp_id', 'name', 'department', 'level', 'hourly_rate'],
+    'attendance': ['emp_id', 'date', 'check_in', 'check_out'],
+    'performance': ['department', 'target_achievement_rate', 'evaluation_period'],
+    'attendance_quarantine': QUARANTINE_COLUMNS,
+}
+
+# Columns every attendance file (and every streamed chunk of it) must provide
+REQUIRED_ATTENDANCE_COLUMNS = ['emp_id', 'date', 'check_in', 'check_out']
+
+# Rows per chunk for streaming attendance ingest
+DEFAULT_CHUNKSIZE = 100_000
+
+# Bulk-ingest settings: the in-memory database is rebuilt from the source files on every load,
+# so durability is traded for insert speed.
+INGEST_PRAGMAS = [
+    "PRAGMA synchronous = OFF",
+    "PRAGMA journal_mode = MEMORY",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -65536",
+]
+
+# A file-backed database (HRLogicEngine(db_path=...)) must survive a crash mid-load, so it keeps
+# the WAL journal and synchronous=NORMAL set when it is opened (no fsync per commit in WAL mode).
+FILE_PRAGMAS = [
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+]
+FILE_INGEST_PRAGMAS = [
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -65536",
+]
+
+# Layout version of the engine tables, stored in PRAGMA user_version of a file-backed database.
+# Bump it whenever a DDL below changes: a database with another version is emptied on open.
+SCHEMA_VERSION = 6
+
+# Every table the engine creates (dropped when an on-disk database has another layout)
+ENGINE_TABLES = [
+    'employees', 'attendance', 'attendance_quarantine', 'performance', 'performance_periods', 'attendance_facts',
+    'day_lookup', 'clock_lookup', 'employee_rollup', 'department_rollup',
+    'employee_day_rollup', 'department_day_rollup', 'engine_meta',
+]
+
+# Key / value metadata stored with the data, e.g. the fingerprint of the loaded source files
+ENGINE_META_DDL = """
+CREATE TABLE IF NOT EXISTS engine_meta (
+    key             TEXT PRIMARY KEY,
+    value           TEXT
+)
+"""
+
+# Attendance fact table: one row per attendance record with the timestamps parsed once at load time.
+# start_ts / end_ts are unix epoch seconds, weekday follows strftime('%w') (0=Sunday).
+ATTENDANCE_FACTS_DDL = """
+DROP TABLE IF EXISTS attendance_facts;
+CREATE TABLE attendance_facts (
+    emp_id          INTEGER NOT NULL,
+    department      TEXT,
+    date            TEXT NOT NULL,
+    start_ts        INTEGER,
+    end_ts          INTEGER,
+    worked_minutes  REAL,
+    weekday         INTEGER,
+    hourly_rate     REAL,
+    daily_cost      REAL
+);
+CREATE INDEX idx_facts_emp_date ON attendance_facts (emp_id, date);
+-- Partial index: only the few punches without a (parseable) check-out, for the leakage detector
+CREATE INDEX idx_facts_missing_checkout ON attendance_facts (emp_id, date) WHERE end_ts IS NULL
+"""
+
+# Dates and clock times repeat heavily (one value per day, at most 86,400 per clock),
+# so each distinct value is parsed once into a small lookup table and joined back,
+# instead of calling strftime() on every attendance row.
+PARSE_LOOKUPS_DDL = """
+DROP TABLE IF EXISTS day_lookup;
+DROP TABLE IF EXISTS clock_lookup;
+CREATE TABLE day_lookup (
+    date            TEXT PRIMARY KEY,
+    day_ts          INTEGER,
+    weekday         INTEGER
+);
+CREATE TABLE clock_lookup (
+    clock           TEXT PRIMARY KEY,
+    seconds         INTEGER
+)
+"""
+
+# Adds the date / clock values of {source} (attendance, or a batch being appended) not parsed yet
+PARSE_LOOKUPS_FILL = """
+INSERT OR IGNORE INTO day_lookup (date, day_ts, weekday)
+    SELECT
+        date,
+        CAST(strftime('%s', date) AS INTEGER) AS day_ts,
+        CAST(strftime('%w', date) AS INTEGER) AS weekday
+    FROM (SELECT DISTINCT date FROM {source});
+INSERT OR IGNORE INTO clock_lookup (clock, seconds)
+    SELECT
+        clock,
+        CAST(strftime('%s', '1970-01-01 ' || clock) AS INTEGER) AS seconds
+    FROM (SELECT check_in AS clock FROM {source} UNION SELECT check_out FROM {source})
+    WHERE clock IS NOT NULL
+"""
+
+ATTENDANCE_FACTS_INSERT_TEMPLATE = """
+INSERT INTO attendance_facts
+    (emp_id, department, date, start_ts, end_ts, worked_minutes, weekday, hourly_rate, daily_cost)
+SELECT
+    emp_id,
+    department,
+    date,
+    start_ts,
+    end_ts,
+    (end_ts - start_ts) / 60.0 AS worked_minutes,
+    weekday,
+    hourly_rate,
+    (end_ts - start_ts) / 3600.0 * hourly_rate AS daily_cost
+FROM (
+    SELECT
+        a.emp_id,
+        e.department,
+        a.date,
+        d.day_ts + ci.seconds AS start_ts,
+        -- Overnight shift: check_out earlier than check_in means the shift ended the next day
+        d.day_ts + co.seconds + CASE WHEN co.seconds < ci.seconds THEN 86400 ELSE 0 END AS end_ts,
+        d.weekday,
+        e.hourly_rate
+    FROM {source} a
+    JOIN employees e ON a.emp_id = e.emp_id
+    JOIN day_lookup d ON d.date = a.date
+    LEFT JOIN clock_lookup ci ON ci.clock = a.check_in
+    LEFT JOIN clock_lookup co ON co.clock = a.check_out
+)
+"""
+ATTENDANCE_FACTS_INSERT = ATTENDANCE_FACTS_INSERT_TEMPLATE.format(source='attendance')
+
+# Maintained aggregates over the worked attendance facts. Rebuilt with the facts on a full load
+# and updated with per-batch deltas by append_attendance(), so the department and ranking
+# queries read O(departments) / O(employees) rows instead of scanning attendance_facts.
+ROLLUPS_DDL = """
+DROP TABLE IF EXISTS employee_rollup;
+DROP TABLE IF EXISTS department_rollup;
+DROP TABLE IF EXISTS employee_day_rollup;
+DROP TABLE IF EXISTS department_day_rollup;
+CREATE TABLE employee_rollup (
+    emp_id          INTEGER PRIMARY KEY,
+    department      TEXT,
+    total_minutes   REAL NOT NULL,
+    total_cost      REAL NOT NULL,
+    records         INTEGER NOT NULL,
+    overtime_days   INTEGER NOT NULL
+);
+CREATE TABLE department_rollup (
+    department      TEXT PRIMARY KEY,
+    active_headcount INTEGER NOT NULL,
+    total_minutes   REAL NOT NULL,
+    total_cost      REAL NOT NULL,
+    records         INTEGER NOT NULL
+);
+-- Daily rollups for date-range queries, clustered by date so a range reads only its own days
+CREATE TABLE employee_day_rollup (
+    date            TEXT NOT NULL,
+    emp_id          INTEGER NOT NULL,
+    department      TEXT,
+    total_minutes   REAL NOT NULL,
+    total_cost      REAL NOT NULL,
+    records         INTEGER NOT NULL,
+    PRIMARY KEY (date, emp_id)
+) WITHOUT ROWID;
+CREATE TABLE department_day_rollup (
+    date            TEXT NOT NULL,
+    department      TEXT,
+    weekday         INTEGER,
+    total_minutes   REAL NOT NULL,
+    total_cost      REAL NOT NULL,
+    records         INTEGER NOT NULL,
+    PRIMARY KEY (date, department)
+)
+"""
+
+# Built in this order: the two daily rollups from the facts, then the whole-period rollups.
+# NOT INDEXED: a sequential scan plus one sort beats walking idx_facts_emp_date,
+# which fetches every fact row out of order.
+EMPLOYEE_DAY_ROLLUP_BUILD = """
+INSERT INTO employee_day_rollup (date, emp_id, department, total_minutes, total_cost, records)
+SELECT
+    f.date,
+    f.emp_id,
+    f.department,
+    SUM(f.worked_minutes),
+    SUM(f.daily_cost),
+    COUNT(*)
+FROM attendance_facts f NOT INDEXED
+WHERE f.worked_minutes IS NOT NULL
+GROUP BY f.date, f.emp_id
+"""
+
+DEPARTMENT_DAY_ROLLUP_BUILD = """
+INSERT INTO department_day_rollup (date, department, weekday, total_minutes, total_cost, records)
+SELECT
+    f.date,
+    f.department,
+    f.weekday,
+    SUM(f.worked_minutes),
+    SUM(f.daily_cost),
+    COUNT(*)
+FROM attendance_facts f NOT INDEXED
+WHERE f.worked_minutes IS NOT NULL
+GROUP BY f.date, f.department
+"""
+
+EMPLOYEE_ROLLUP_BUILD = f"""
+INSERT INTO employee_rollup (emp_id, department, total_minutes, total_cost, records, overtime_days)
+SELECT
+    r.emp_id,
+    r.department,
+    SUM(r.total_minutes),
+    SUM(r.total_cost),
+    SUM(r.records),
+    SUM(r.total_minutes > {OVERTIME_DAY_MINUTES})
+FROM employee_day_rollup r
+GROUP BY r.emp_id
+"""
+
+# Rows without a department can never join performance, so they are not rolled up.
+# Totals are summed over the facts in scan order (like the numpy backend), so the truncated
+# hours / cost match it exactly. Each employee belongs to one department: the headcount is
+# a count of employee_rollup rows instead of a COUNT(DISTINCT) over the facts.
+DEPARTMENT_ROLLUP_BUILD = """
+INSERT INTO department_rollup (department, active_headcount, total_minutes, total_cost, records)
+SELECT
+    d.department,
+    h.active_headcount,
+    d.total_minutes,
+    d.total_cost,
+    d.records
+FROM (
+    SELECT
+        f.department,
+        SUM(f.worked_minutes) AS total_minutes,
+        SUM(f.daily_cost) AS total_cost,
+        COUNT(*) AS records
+    FROM attendance_facts f NOT INDEXED
+    WHERE f.worked_minutes IS NOT NULL AND f.department IS NOT NULL
+    GROUP BY f.department
+) d
+JOIN (
+    SELECT department, COUNT(*) AS active_headcount
+    FROM employee_rollup
+    GROUP BY department
+) h ON h.department = d.department
+"""
+
+# append_attendance(): the validated batch (free of repeats already) is staged, checked against
+# attendance on (emp_id, date), then flows through the same lookups / fact insert as a full load.
+APPEND_STAGING_DDL = """
+DROP TABLE IF EXISTS temp.attendance_append;
+CREATE TEMP TABLE attendance_append (
+    emp_id          INTEGER NOT NULL,
+    date            TEXT NOT NULL,
+    check_in        TEXT,
+    check_out       TEXT
+)
+"""
+
+# Staged rows whose (emp_id, date) is already loaded move to the quarantine as duplicates
+APPEND_DEDUP = """
+INSERT INTO attendance_quarantine (emp_id, date, check_in, check_out, reason)
+SELECT emp_id, date, check_in, check_out, 'duplicate' FROM temp.attendance_append
+WHERE EXISTS (
+    SELECT 1 FROM attendance a
+    WHERE a.emp_id = attendance_append.emp_id AND a.date = attendance_append.date
+)
+ORDER BY rowid;
+DELETE FROM temp.attendance_append
+WHERE EXISTS (
+    SELECT 1 FROM attendance a
+    WHERE a.emp_id = attendance_append.emp_id AND a.date = attendance_append.date
+)
+"""
+
+# Worked fact rows inserted by one append (fact rowid > the previous maximum)
+APPEND_NEW_FACTS = """
+CREATE TEMP TABLE new_facts AS
+SELECT * FROM attendance_facts
+WHERE rowid > ? AND worked_minutes IS NOT NULL
+"""
+
+# Department first: an employee missing from employee_rollup adds one to the active headcount.
+# A NULL department never conflicts, so its daily rows are added as extra rows (the queries sum them).
+# The batch holds at most one row per (emp_id, date) and none of the days already loaded, so a
+# worked fact longer than OVERTIME_DAY_MINUTES is a new overtime day.
+ROLLUP_APPLY_DELTA = f"""
+CREATE TEMP TABLE rollup_delta AS
+SELECT
+    f.emp_id,
+    f.department,
+    SUM(f.worked_minutes) AS minutes,
+    SUM(f.daily_cost) AS cost,
+    COUNT(*) AS records,
+    SUM(f.worked_minutes > {OVERTIME_DAY_MINUTES}) AS overtime_days
+FROM temp.new_facts f
+GROUP BY f.emp_id;
+INSERT INTO department_rollup (department, active_headcount, total_minutes, total_cost, records)
+SELECT
+    d.department,
+    SUM(e.emp_id IS NULL),
+    SUM(d.minutes),
+    SUM(d.cost),
+    SUM(d.records)
+FROM temp.rollup_delta d
+LEFT JOIN employee_rollup e ON e.emp_id = d.emp_id
+WHERE d.department IS NOT NULL
+GROUP BY d.department
+ON CONFLICT (department) DO UPDATE SET
+    active_headcount = active_headcount + excluded.active_headcount,
+    total_minutes = total_minutes + excluded.total_minutes,
+    total_cost = total_cost + excluded.total_cost,
+    records = records + excluded.records;
+INSERT INTO employee_rollup (emp_id, department, total_minutes, total_cost, records, overtime_days)
+SELECT emp_id, department, minutes, cost, records, overtime_days
+FROM temp.rollup_delta
+WHERE true
+ON CONFLICT (emp_id) DO UPDATE SET
+    total_minutes = total_minutes + excluded.total_minutes,
+    total_cost = total_cost + excluded.total_cost,
+    records = records + excluded.records,
+    overtime_days = overtime_days + excluded.overtime_days;
+INSERT INTO employee_day_rollup (date, emp_id, department, total_minutes, total_cost, records)
+SELECT date, emp_id, department, SUM(worked_minutes), SUM(daily_cost), COUNT(*)
+FROM temp.new_facts
+GROUP BY date, emp_id
+ON CONFLICT (date, emp_id) DO UPDATE SET
+    total_minutes = total_minutes + excluded.total_minutes,
+    total_cost = total_cost + excluded.total_cost,
+    records = records + excluded.records;
+INSERT INTO department_day_rollup (date, department, weekday, total_minutes, total_cost, records)
+SELECT date, department, weekday, SUM(worked_minutes), SUM(daily_cost), COUNT(*)
+FROM temp.new_facts
+GROUP BY date, department
+ON CONFLICT (date, department) DO UPDATE SET
+    total_minutes = total_minutes + excluded.total_minutes,
+    total_cost = total_cost + excluded.total_cost,
+    records = records + excluded.records;
+DROP TABLE temp.rollup_delta;
+DROP TABLE temp.new_facts;
+DROP TABLE temp.attendance_append
+"""
+
+# Analysis queries. Module-level so explain_query_plans() can inspect exactly what runs.
+# :start / :end are inclusive 'YYYY-MM-DD' bounds (ALL_DATES when no range is given).
+ALL_DATES = {'start': '0000-01-01', 'end': '9999-12-31'}
+
+COST_QUERY = """
+SELECT
+    f.emp_id,
+    e.name,
+    f.department,
+    e.level,
+    f.date,
+    strftime('%H:%M:%S', f.start_ts, 'unixepoch') AS check_in,
+    strftime('%H:%M:%S', f.end_ts, 'unixepoch') AS check_out,
+    f.hourly_rate,
+    f.worked_minutes / 60.0 AS hours_worked,
+    f.daily_cost
+FROM attendance_facts f
+JOIN employees e ON f.emp_id = e.emp_id
+WHERE f.worked_minutes IS NOT NULL AND f.date BETWEEN :start AND :end
+"""
+
+# One page of COST_QUERY, keyset-paginated on (emp_id, date, rowid): each page seeks past the
+# last key of the previous one through idx_facts_emp_date, so page N costs the same as page 1
+# (no OFFSET re-scan) and no cursor stays open between pages.
+COST_PAGE_QUERY = """
+SELECT
+    f.rowid AS fact_rowid,
+    f.emp_id,
+    e.name,
+    f.department,
+    e.level,
+    f.date,
+    strftime('%H:%M:%S', f.start_ts, 'unixepoch') AS check_in,
+    strftime('%H:%M:%S', f.end_ts, 'unixepoch') AS check_out,
+    f.hourly_rate,
+    f.worked_minutes / 60.0 AS hours_worked,
+    f.daily_cost
+FROM attendance_facts f
+JOIN employees e ON f.emp_id = e.emp_id
+WHERE f.worked_minutes IS NOT NULL AND f.date BETWEEN :start AND :end
+    AND (f.emp_id, f.date, f.rowid) > (:emp_id, :date, :rowid)
+ORDER BY f.emp_id, f.date, f.rowid
+LIMIT :limit
+"""
+
+# Keyset before the first row (emp_id is an INTEGER key)
+FIRST_PAGE_KEY = {'emp_id': -2 ** 63, 'date': '', 'rowid': 0}
+PAGE_PARAMS = {**ALL_DATES, **FIRST_PAGE_KEY, 'limit': DEFAULT_CHUNKSIZE}
+
+DEPARTMENT_QUERY = """
+SELECT
+    d.department,
+    d.active_headcount,
+    CAST(d.total_minutes / 60.0 AS INTEGER) as total_hours,
+    CAST(d.total_cost AS INTEGER) as total_labor_cost,
+    p.target_achievement_rate,
+
+    -- 효율 지수 (ROI) 계산 로직
+    -- (목표 달성률 * 100) / (총 인건비 / 100만)
+    -- Higher is better. A department with high performance and low cost gets a high score.
+    ROUND((p.target_achievement_rate * 100) / (d.total_cost / 1000000.0), 2) as efficiency_index
+FROM department_rollup d
+JOIN (
+    -- One rate per department: the mean over its evaluation periods
+    SELECT department, AVG(target_achievement_rate) AS target_achievement_rate
+    FROM performance
+    GROUP BY department
+) p ON d.department = p.department
+ORDER BY efficiency_index DESC, d.department
+"""
+
+# Same result for a date range, from the employee-day rollup (headcount needs distinct employees)
+DEPARTMENT_RANGE_QUERY = """
+WITH DeptStats AS (
+    SELECT
+        r.department,
+        COUNT(DISTINCT r.emp_id) as active_headcount,
+        SUM(r.total_minutes) as total_minutes,
+        SUM(r.total_cost) as total_cost
+    FROM employee_day_rollup r
+    WHERE r.date BETWEEN :start AND :end
+    GROUP BY r.department
+)
+SELECT
+    d.department,
+    d.active_headcount,
+    CAST(d.total_minutes / 60.0 AS INTEGER) as total_hours,
+    CAST(d.total_cost AS INTEGER) as total_labor_cost,
+    p.target_achievement_rate,
+    ROUND((p.target_achievement_rate * 100) / (d.total_cost / 1000000.0), 2) as efficiency_index
+FROM DeptStats d
+JOIN (
+    -- Mean rate over the evaluation periods overlapping the range
+    SELECT p.department, AVG(p.target_achievement_rate) AS target_achievement_rate
+    FROM performance p
+    LEFT JOIN performance_periods pp ON pp.evaluation_period = p.evaluation_period
+    WHERE pp.period_start IS NULL OR (pp.period_start <= :end AND pp.period_end >= :start)
+    GROUP BY p.department
+) p ON d.department = p.department
+ORDER BY efficiency_index DESC, d.department
+"""
+
+# Efficiency per (evaluation period, department) in one grouped pass over the department-day
+# rollup: O(departments x days) rows however many periods are loaded. Each day in range is
+# matched to its period(s) once, then the daily rollup rows are summed per period.
+EFFICIENCY_TREND_QUERY = """
+WITH Calendar AS (
+    SELECT d.date, pp.evaluation_period, pp.period_start
+    FROM (SELECT DISTINCT date FROM department_day_rollup WHERE date BETWEEN :start AND :end) d
+    JOIN performance_periods pp ON d.date BETWEEN pp.period_start AND pp.period_end
+),
+PeriodStats AS (
+    SELECT
+        c.evaluation_period,
+        c.period_start,
+        r.department,
+        SUM(r.total_minutes) as total_minutes,
+        SUM(r.total_cost) as total_cost
+    FROM Calendar c
+    JOIN department_day_rollup r ON r.date = c.date
+    WHERE r.department IS NOT NULL
+    GROUP BY c.evaluation_period, r.department
+),
+Rates AS (
+    SELECT department, evaluation_period, AVG(target_achievement_rate) AS target_achievement_rate
+    FROM performance
+    GROUP BY department, evaluation_period
+)
+SELECT
+    s.evaluation_period,
+    s.period_start,
+    s.department,
+    CAST(s.total_minutes / 60.0 AS INTEGER) as total_hours,
+    CAST(s.total_cost AS INTEGER) as total_labor_cost,
+    p.target_achievement_rate,
+    ROUND((p.target_achievement_rate * 100) / (s.total_cost / 1000000.0), 2) as efficiency_index
+FROM PeriodStats s
+JOIN Rates p ON p.department = s.department AND p.evaluation_period = s.evaluation_period
+ORDER BY s.period_start, s.evaluation_period, s.department
+"""
+
+# get_employee_ranking(metric=...) -> the per-employee total it orders by
+RANKING_METRICS = {'hours': 'total_minutes', 'cost': 'total_cost', 'overtime_days': 'overtime_days'}
+
+# Per-employee totals of the whole load (maintained rollup) or of a date range (daily rollup)
+RANKING_TOTALS = "SELECT r.emp_id, r.total_minutes, r.total_cost, r.overtime_days FROM employee_rollup r"
+RANKING_RANGE_TOTALS = f"""
+    SELECT
+        r.emp_id,
+        SUM(r.total_minutes) AS total_minutes,
+        SUM(r.total_cost) AS total_cost,
+        SUM(r.total_minutes > {OVERTIME_DAY_MINUTES}) AS overtime_days
+    FROM employee_day_rollup r
+    WHERE r.date BETWEEN :start AND :end
+    GROUP BY r.emp_id"""
+
+RANKING_COLUMNS = """
+        e.name,
+        e.department,
+        e.level,
+        s.total_minutes / 60.0 as total_hours,
+        CAST(s.total_cost AS INTEGER) as total_labor_cost,
+        s.overtime_days"""
+
+# Overall Top-N: ORDER BY ... LIMIT keeps only the best :top_n rows in SQLite's sorter
+# instead of sorting every employee; the rank is their position.
+RANKING_TEMPLATE = """
+WITH EmpStats AS ({totals})
+SELECT{columns}
+FROM EmpStats s
+JOIN employees e ON s.emp_id = e.emp_id
+WHERE :department IS NULL OR e.department = :department
+ORDER BY s.{metric} {direction}, s.emp_id
+LIMIT :top_n
+"""
+
+# Top-N per department: ROW_NUMBER() restarts in every department partition
+RANKING_PER_DEPARTMENT_TEMPLATE = """
+WITH EmpStats AS ({totals}),
+Ranked AS (
+    SELECT
+        ROW_NUMBER() OVER (PARTITION BY e.department ORDER BY s.{metric} {direction}, s.emp_id) as rank,{columns}
+    FROM EmpStats s
+    JOIN employees e ON s.emp_id = e.emp_id
+    WHERE :department IS NULL OR e.department = :department
+)
+SELECT *
+FROM Ranked
+WHERE rank <= :top_n
+ORDER BY department, rank
+"""
+
+def ranking_query(metric='hours', ascending=False, per_department=False, ranged=False):
+    """SQL of get_employee_ranking() for one ordering metric / direction / grouping, with or without a date range."""
+    if metric not in RANKING_METRICS:
+        raise ValueError(f"Unknown ranking metric {metric!r}; expected one of {list(RANKING_METRICS)}")
+    template = RANKING_PER_DEPARTMENT_TEMPLATE if per_department else RANKING_TEMPLATE
+    return template.format(
+        totals=RANKING_RANGE_TOTALS if ranged else RANKING_TOTALS,
+        columns=RANKING_COLUMNS,
+        metric=RANKING_METRICS[metric],
+        direction='ASC' if ascending else 'DESC',
+    )
+
+RANKING_QUERY = ranking_query()
+RANKING_RANGE_QUERY = ranking_query(ranged=True)
+RANKING_PARAMS = {'top_n': 10, 'department': None}
+
+# Worked days per (department, weekday, level, rate, minutes) for the what-if model (scenarios.py).
+# Daily minutes take few distinct values, so this is far smaller than the facts it scans.
+SCENARIO_HISTOGRAM_QUERY = """
+SELECT
+    f.department,
+    f.weekday,
+    e.level,
+    f.hourly_rate,
+    f.worked_minutes,
+    COUNT(*) AS records
+FROM attendance_facts f
+JOIN employees e ON f.emp_id = e.emp_id
+WHERE f.worked_minutes IS NOT NULL AND f.department IS NOT NULL AND f.date BETWEEN :start AND :end
+GROUP BY f.department, f.weekday, e.level, f.hourly_rate, f.worked_minutes
+"""
+
+# Leakage detector, stage 1: every employee-day in range with a rolling baseline over the same
+# employee's worked days in the previous :window_days calendar days (sliding window aggregates
+# over the employee-day rollup, so each day is visited once). Only candidate days leave SQLite:
+# long days, and days whose z-score against the baseline (std floored at :min_std_minutes)
+# reaches :z_threshold, written without sqrt. leakage.score_days() computes the final scores.
+LEAKAGE_QUERY = """
+WITH Days AS (
+    SELECT
+        r.date,
+        r.emp_id,
+        r.department,
+        r.total_minutes,
+        COUNT(*) OVER baseline AS baseline_days,
+        SUM(r.total_minutes) OVER baseline AS baseline_sum,
+        SUM(r.total_minutes * r.total_minutes) OVER baseline AS baseline_sumsq
+    FROM employee_day_rollup r
+    -- The days just before :start feed the baselines of the first days in range
+    WHERE r.date BETWEEN date(:start, '-' || :window_days || ' days') AND :end
+    WINDOW baseline AS (
+        PARTITION BY r.emp_id ORDER BY julianday(r.date)
+        RANGE BETWEEN :window_days PRECEDING AND 1 PRECEDING
+    )
+),
+Scored AS (
+    SELECT
+        *,
+        total_minutes - baseline_sum / baseline_days AS deviation,
+        baseline_sumsq / baseline_days - (baseline_sum / baseline_days) * (baseline_sum / baseline_days) AS variance
+    FROM Days
+    WHERE date >= :start
+)
+SELECT
+    s.date,
+    s.emp_id,
+    e.name,
+    s.department,
+    e.level,
+    e.hourly_rate,
+    s.total_minutes,
+    s.baseline_days,
+    s.baseline_sum,
+    s.baseline_sumsq
+FROM Scored s
+JOIN employees e ON e.emp_id = s.emp_id
+WHERE s.total_minutes >= :long_day_minutes
+    OR (
+        s.baseline_days >= :min_baseline_days
+        AND s.deviation >= :z_threshold * :min_std_minutes
+        AND s.deviation * s.deviation >= :z_threshold * :z_threshold * s.variance
+    )
+"""
+
+# Leakage detector, stage 2: punches without a check-out per employee (idx_facts_missing_checkout)
+MISSING_CHECKOUT_QUERY = """
+SELECT
+    f.emp_id,
+    e.name,
+    f.department,
+    e.level,
+    COUNT(*) AS missing_checkouts
+FROM attendance_facts f
+JOIN employees e ON e.emp_id = f.emp_id
+WHERE f.end_ts IS NULL AND f.start_ts IS NOT NULL AND f.date BETWEEN :start AND :end
+GROUP BY f.emp_id
+"""
+
+# Reads the department-day rollup with or without a range: O(departments x days)
+WORK_PATTERN_QUERY = """
+SELECT
+    r.department,
+    case r.weekday
+      when 0 then 'Sunday'
+      when 1 then 'Monday'
+      when 2 then 'Tuesday'
+      when 3 then 'Wednesday'
+      when 4 then 'Thursday'
+      when 5 then 'Friday'
+      when 6 then 'Saturday'
+    end as day_of_week,
+    SUM(r.total_minutes) / SUM(r.records) / 60.0 as avg_hours,
+    SUM(r.records) as record_count
+FROM department_day_rollup r
+WHERE r.date BETWEEN :start AND :end
+GROUP BY r.department, r.weekday
+-- Monday first: (weekday + 6) % 7 maps Monday=0 ... Sunday=6
+ORDER BY r.department, (r.weekday + 6) % 7
+"""
+
+ANALYSIS_QUERIES = {
+    'attendance_facts_build': ATTENDANCE_FACTS_INSERT,
+    'employee_day_rollup_build': EMPLOYEE_DAY_ROLLUP_BUILD,
+    'department_day_rollup_build': DEPARTMENT_DAY_ROLLUP_BUILD,
+    'employee_rollup_build': EMPLOYEE_ROLLUP_BUILD,
+    'department_rollup_build': DEPARTMENT_ROLLUP_BUILD,
+    'run_cost_calculation': COST_QUERY,
+    'iter_cost_calculation (page)': COST_PAGE_QUERY,
+    'run_department_analysis': DEPARTMENT_QUERY,
+    'run_department_analysis (date range)': DEPARTMENT_RANGE_QUERY,
+    'run_efficiency_trend': EFFICIENCY_TREND_QUERY,
+    'get_employee_ranking': RANKING_QUERY,
+    'get_employee_ranking (date range)': RANKING_RANGE_QUERY,
+    'get_employee_ranking (per department)': ranking_query(per_department=True),
+    'run_work_pattern_analysis': WORK_PATTERN_QUERY,
+    'run_scenarios (model build)': SCENARIO_HISTOGRAM_QUERY,
+    'run_leakage_detection': LEAKAGE_QUERY,
+    'run_leakage_detection (missing check-outs)': MISSING_CHECKOUT_QUERY,
+}
+
+def _source_kind(path_or_buffer, file_type=None):
+    """Return 'csv', 'xlsx' or 'parquet' from an explicit file_type or the path / buffer name."""
+    if file_type:
+        name = '.' + file_type.lstrip('.')
+    elif isinstance(path_or_buffer, (str, os.PathLike)):
+        name = os.fspath(path_or_buffer)
+    else:
+        name = getattr(path_or_buffer, 'name', '') or ''
+    name = str(name).lower()
+    if name.endswith(('.xls', '.xlsx')):
+        return 'xlsx'
+    if name.endswith('.parquet'):
+        return 'parquet'
+    return 'csv'
+
+def _read_xlsx_chunks(path_or_buffer, chunksize):
+    """Stream an Excel sheet row by row (openpyxl read-only mode) in DataFrame chunks."""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path_or_buffer, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = ['' if c is None else str(c).strip() for c in header]
+        batch = []
+        for row in rows:
+            if all(value is None for value in row):
+                continue
+            batch.append(row)
+            if len(batch) >= chunksize:
+                yield pd.DataFrame.from_records(batch, columns=columns)
+                batch = []
+        if batch:
+            yield pd.DataFrame.from_records(batch, columns=columns)
+    finally:
+        workbook.close()
+
+def read_table_chunks(path_or_buffer, chunksize=DEFAULT_CHUNKSIZE, file_type=None):
+    """
+    Yield a CSV / XLSX / Parquet file as DataFrames of at most `chunksize` rows,
+    so only one chunk is ever held in memory.
+    """
+    kind = _source_kind(path_or_buffer, file_type)
+    if kind == 'xlsx':
+        yield from _read_xlsx_chunks(path_or_buffer, chunksize)
+    elif kind == 'parquet':
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(path_or_buffer, memory_map=True)
+        for batch in parquet_file.iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        # Keep date / time columns as text (no-op for files without them)
+        text_columns = {'date': str, 'check_in': str, 'check_out': str}
+        with pd.read_csv(path_or_buffer, chunksize=chunksize, dtype=text_columns) as reader:
+            yield from reader
+
+def _format_temporal(series, fmt):
+    """Excel cells may hold real date / time values - store them as text like the CSV files."""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series.dt.strftime(fmt)
+    if series.dtype == object:
+        return series.map(lambda value: value.strftime(fmt) if hasattr(value, 'strftime') else value)
+    return series
+
+def _normalize_attendance(df):
+    df = df.copy()
+    df['date'] = _format_temporal(df['date'], '%Y-%m-%d')
+    df['check_in'] = _format_temporal(df['check_in'], '%H:%M:%S')
+    df['check_out'] = _format_temporal(df['check_out'], '%H:%M:%S')
+    return df
+
+def _cost_arrow_schema():
+    """Fixed Parquet schema for cost exports, so an all-missing chunk cannot change a column's type."""
+    import pyarrow as pa
+
+    return pa.schema([
+        ('emp_id', pa.int64()),
+        ('name', pa.string()),
+        ('department', pa.string()),
+        ('level', pa.string()),
+        ('date', pa.string()),
+        ('check_in', pa.string()),
+        ('check_out', pa.string()),
+        ('hourly_rate', pa.float64()),
+        ('hours_worked', pa.float64()),
+        ('daily_cost', pa.float64()),
+    ])
+
+def write_table_chunks(chunks, path_or_buffer, kind, schema=None):
+    """
+    Write DataFrame chunks to one CSV or Parquet file (path or binary buffer) as they arrive,
+    so only one chunk is held at a time. Returns the number of rows written.
+    """
+    rows = 0
+    with ExitStack() as stack:
+        if isinstance(path_or_buffer, (str, os.PathLike)):
+            path_or_buffer = stack.enter_context(open(path_or_buffer, 'wb'))
+        if kind == 'parquet':
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            writer = None
+            for chunk in chunks:
+                table = pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+                if writer is None:
+                    writer = stack.enter_context(pq.ParquetWriter(path_or_buffer, table.schema))
+                writer.write_table(table)
+                rows += len(chunk)
+            if writer is None and schema is not None:
+                pq.write_table(schema.empty_table(), path_or_buffer)
+        elif kind == 'csv':
+            for chunk in chunks:
+                # BOM on the first chunk only, so Excel opens the Korean text as UTF-8
+                text = chunk.to_csv(index=False, header=rows == 0)
+                path_or_buffer.write(text.encode('utf-8-sig' if rows == 0 else 'utf-8'))
+                rows += len(chunk)
+        else:
+            raise ValueError(f"Cannot stream to {kind!r}; use csv or parquet")
+    return rows
+
+def _normalize_performance(df):
+    df = df.copy()
+    if 'evaluation_period' in df:
+        # An Excel cell typed as 2024-01 arrives as a date: keep the month
+        df['evaluation_period'] = _format_temporal(df['evaluation_period'], '%Y-%m')
+    return df
+
+def _date_bounds(start=None, end=None):
+    """
+    Normalize an optional inclusive date range (anything pd.Timestamp accepts) to
+    {'start': 'YYYY-MM-DD', 'end': 'YYYY-MM-DD'}. Returns None when no bound is given.
+    """
+    if start is None and end is None:
+        return None
+    bounds = {
+        'start': ALL_DATES['start'] if start is None else pd.Timestamp(start).strftime('%Y-%m-%d'),
+        'end': ALL_DATES['end'] if end is None else pd.Timestamp(end).strftime('%Y-%m-%d'),
+    }
+    if bounds['start'] > bounds['end']:
+        raise ValueError(f"Date range start {bounds['start']} is after its end {bounds['end']}")
+    return bounds
+
+# Selectable execution backends (see HRLogicEngine.__init__)
+BACKENDS = ('sqlite', 'numpy')
+
+# What-if models kept per date range (oldest dropped first); every load clears them
+SCENARIO_MODEL_CACHE = 8
+
+# Analysis results kept per (method, arguments) (oldest dropped first); see memoized()
+RESULT_MEMO_SIZE = 64
+
+def _copy_result(result):
+    if isinstance(result, dict):
+        return {key: value.copy() for key, value in result.items()}
+    return result.copy()
+
+def compact_result(method):
+    """Give an HRLogicEngine result (a DataFrame or a dict of them) the engine's compact dtypes."""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        result = method(self, *args, **kwargs)
+        if isinstance(result, dict):
+            return {key: self._compact(value) for key, value in result.items()}
+        return self._compact(result)
+    return wrapper
+
+def memoized(method):
+    """
+    Serve repeated HRLogicEngine calls with the same arguments from the engine's result memo.
+    Entries are keyed by the data generation they were computed from, so every load makes
+    them unreachable. Callers get a copy and may modify it freely.
+    """
+    signature = inspect.signature(method)
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if not self.memo_size:
+            return method(self, *args, **kwargs)
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        # The generation is read before computing: a load that starts meanwhile
+        # makes the result unreachable instead of serving it as current
+        key = (self.generation, method.__name__, tuple(bound.arguments.items())[1:])
+        with self._memo_lock:
+            result = self._memo.get(key)
+            self.memo_stats['hits' if result is not None else 'misses'] += 1
+        if result is None:
+            result = method(self, *args, **kwargs)
+            with self._memo_lock:
+                if key[0] == self.generation:
+                    self._memo[key] = result
+                    while len(self._memo) > self.memo_size:
+                        del self._memo[next(iter(self._memo))]
+        return _copy_result(result)
+    return wrapper
+
 class HRLogicEngine:
-    def __init__(self):
-        # Create an in-memory SQLite database
-        self.conn = sqlite3.connect(':memory:', check_same_thread=False)
+    def __init__(self, backend='sqlite', workers=1, db_path=None, memo_size=RESULT_MEMO_SIZE):
+        """
+        backend='sqlite' runs the analyses as SQL on an in-memory SQLite database.
+        backend='numpy' computes the same results with vectorized NumPy / pandas
+        operations (vector_backend.py), skipping the DataFrame <-> SQLite round trips.
+        workers > 1 runs run_department_analysis / run_work_pattern_analysis as
+        partial aggregates over emp_id-hash shards in a process pool (parallel_agg.py),
+        once per load; the pool lives until close().
+        db_path keeps the sqlite database in a file (WAL mode) instead of memory: a new
+        engine on the same file answers queries right away, without reloading
+        (check source_fingerprint to see what was loaded).
+        memo_size bounds the result memo (see memoized()); 0 recomputes every call.
+
+        The engine can be shared between threads (e.g. Streamlit sessions): loads run on
+        a single serialized writer connection, queries on one read connection per thread
+        (connection_pool.py). With db_path, queries keep running during a load.
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend {backend!r}; expected one of {BACKENDS}")
+        if db_path is not None and backend != 'sqlite':
+            raise ValueError("db_path is only supported by the sqlite backend")
+        self.backend = backend
+        self.workers = workers
+        self.db_path = db_path
+        self._vector = VectorizedBackend() if backend == 'numpy' else None
+        # Quarantined attendance frames of the numpy backend (the sqlite one keeps attendance_quarantine)
+        self._quarantine = []
+        self._fact_arrays_cache = None
+        # Worker pool + shared fact block for workers > 1, and its merged totals as
+        # (generation, totals, departments, performance)
+        self._shards = ShardPool(workers) if workers > 1 else None
+        self._shard_lock = threading.Lock()
+        self._parallel_totals = None
+        self._scenario_models = {}
+        # Data generation: bumped by every load, so memoized results of older data are never served
+        self.generation = 0
+        self.memo_size = memo_size
+        self.memo_stats = {'hits': 0, 'misses': 0}
+        self._memo = {}
+        self._memo_lock = threading.Lock()
+        # (generation, result_dtypes()) of the loaded employees
+        self._dtypes_cache = (None, None)
+
+        # Per-operation wall time / rows / VM steps / SQL text (see profiling.py),
+        # hooked into every connection of the pool
+        self.stats = EngineStats()
+
+        # Shared in-memory SQLite database, or the on-disk one at db_path.
+        # self.conn / self.cursor are the writer connection.
+        self._pool = ConnectionPool(db_path, on_connect=self.stats.install)
+        self.conn = self._pool.writer
         self.cursor = self.conn.cursor()
+        with self._pool.write():
+            if db_path is not None:
+                for pragma in FILE_PRAGMAS:
+                    self.cursor.execute(pragma)
+            self._open_schema()
 
+    def _open_schema(self):
+        """Check the stored layout version; a database written with another layout starts empty."""
+        version = self.cursor.execute("PRAGMA user_version").fetchone()[0]
+        if version != SCHEMA_VERSION:
+            for table in ENGINE_TABLES:
+                self.cursor.execute(f"DROP TABLE IF EXISTS {table}")
+            self.cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self.cursor.execute(ENGINE_META_DDL)
+        self.conn.commit()
+
+    @property
+    def source_fingerprint(self):
+        """Fingerprint recorded with set_source_fingerprint() for the data now loaded (None after any reload)."""
+        rows = self._read_rows("SELECT value FROM engine_meta WHERE key = 'source_fingerprint'")
+        return rows[0][0] if rows else None
+
+    def set_source_fingerprint(self, fingerprint):
+        """
+        Record which sources the loaded data came from (e.g. a hash of the input files).
+        Call it once a load has completed; every load / ingest / append clears it again.
+        """
+        with self._pool.write(), self.conn:
+            self.cursor.execute(
+                "INSERT OR REPLACE INTO engine_meta (key, value) VALUES ('source_fingerprint', ?)",
+                (fingerprint,),
+            )
+
+    def attendance_row_count(self):
+        """Number of attendance rows loaded."""
+        if self._vector is not None:
+            return len(self._vector.f_emp)
+        return self._read_rows("SELECT COUNT(*) FROM attendance")[0][0]
+
+    def close(self):
+        """Close every connection (a file-backed database is checkpointed first, leaving no WAL behind)."""
+        with self._pool.write():
+            if self.db_path is not None:
+                self.cursor.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+            # A cursor with an unfinished statement would keep the WAL / shm files alive
+            self.cursor.close()
+            self._pool.close()
+        if self._shards is not None:
+            with self._shard_lock:
+                self._shards.close()
+
+    def _read_sql(self, query, params=None):
+        """
+        Run a query on the calling thread's read connection. Rows are fetched in chunks that are
+        given compact dtypes as they arrive, so a large result never exists as Python strings at once.
+        """
+        # Resolved first: it may query employees, and read locks must not nest
+        dtypes = self._result_dtypes()
+        with self._pool.read() as conn:
+            chunks = []
+            for chunk in pd.read_sql_query(query, conn, params=params, chunksize=DEFAULT_CHUNKSIZE):
+                # The reader ends with an empty chunk; it is only kept for a result without rows
+                if chunks and chunk.empty:
+                    continue
+                chunks.append(normalize_dtypes(chunk, dtypes))
+        return normalize_dtypes(pd.concat(chunks, ignore_index=True), dtypes) if len(chunks) > 1 else chunks[0]
+
+    def _result_dtypes(self):
+        """result_dtypes() of the loaded employees, computed once per data generation."""
+        generation, dtypes = self._dtypes_cache
+        if generation != self.generation:
+            generation = self.generation
+            if self._vector is not None:
+                dtypes = self._vector.result_dtypes
+            else:
+                with self._pool.read() as conn:
+                    employees = pd.read_sql_query("SELECT emp_id, name, department, level, hourly_rate FROM employees", conn)
+                dtypes = result_dtypes(employees)
+            self._dtypes_cache = (generation, dtypes)
+        return dtypes
+
+    def _compact(self, df):
+        return normalize_dtypes(df, self._result_dtypes())
+
+    def _read_rows(self, query):
+        with self._pool.read() as conn:
+            return conn.execute(query).fetchall()
+
+    def _new_generation(self):
+        with self._memo_lock:
+            self.generation += 1
+            self._memo.clear()
+
+    def _invalidate(self):
+        """Called at the start of every load: derived arrays, memoized results and the source fingerprint are stale."""
+        self._new_generation()
+        self._fact_arrays_cache = None
+        if self._shards is not None:
+            with self._shard_lock:
+                self._shards.release()
+                self._parallel_totals = None
+        self._scenario_models = {}
+        with self._pool.write(), self.conn:
+            self.cursor.execute("DELETE FROM engine_meta WHERE key = 'source_fingerprint'")
+
+    @profiled
     def load_data(self, df_employees, df_attendance, df_performance):
         """
-        Load Pandas DataFrames into SQLite tables.
+        Load Pandas DataFrames into typed SQLite tables.
+        All inserts run through executemany inside a single transaction.
+        Invalid attendance rows are quarantined instead (see quarantined_attendance()).
+        """
+        self._invalidate()
+        validator = AttendanceValidator(df_employees['emp_id'])
+        df_attendance, quarantined = self._split_attendance(validator, df_attendance)
+        if self._vector is not None:
+            with self.stats.step('vectorize'):
+                self._vector.load(df_employees, df_attendance, _normalize_performance(df_performance))
+            self._quarantine = [quarantined]
+            return
+
+        with self._ingest_transaction():
+            self._load_reference_tables(df_employees, df_performance)
+            self._insert_frame('attendance', df_attendance)
+            self._insert_frame('attendance_quarantine', quarantined)
+            self._build_attendance_facts()
+
+    @profiled
+    def load_reference_data(self, df_employees, df_performance):
+        """
+        Load only employees and performance (attendance starts empty).
+        Use together with ingest_attendance() for files too large for load_data().
+        """
+        self._invalidate()
+        if self._vector is not None:
+            self._vector.load_reference(df_employees, _normalize_performance(df_performance))
+            self._quarantine = []
+            return
+
+        with self._ingest_transaction():
+            self._load_reference_tables(df_employees, df_performance)
+            self._build_attendance_facts()
+
+    @profiled
+    def ingest_attendance(self, path_or_buffer, chunksize=DEFAULT_CHUNKSIZE, file_type=None):
+        """
+        Stream an attendance CSV / XLSX / Parquet file straight into SQLite, chunk by chunk.
+        CSV is read with pandas' chunked reader, XLSX with openpyxl in read-only mode
+        and Parquet by memory-mapped record batches, so peak memory depends on
+        `chunksize`, not on the file size (the numpy backend keeps all chunks in memory).
+        `path_or_buffer` may also be an iterable of DataFrame chunks, ingested as they arrive.
+        Replaces previously loaded attendance; employees must already be loaded.
+        Every chunk is validated as it arrives and its invalid rows are quarantined
+        (duplicates are detected across chunks).
+        Returns the number of valid attendance rows ingested.
+        """
+        self._invalidate()
+        if self._vector is not None:
+            validator = AttendanceValidator(self._vector.emp_ids)
+            chunks, quarantined = [], []
+            for chunk in self._iter_attendance_chunks(path_or_buffer, chunksize, file_type):
+                valid, bad = self._split_attendance(validator, chunk)
+                chunks.append(valid)
+                quarantined.append(bad)
+            df_attendance = pd.concat(chunks, ignore_index=True) if chunks else \
+                pd.DataFrame(columns=REQUIRED_ATTENDANCE_COLUMNS)
+            with self.stats.step('vectorize'):
+                self._vector.load_attendance(df_attendance)
+            self._quarantine = quarantined
+            return len(df_attendance)
+
+        rows = 0
+        with self._ingest_transaction():
+            self.cursor.execute("DELETE FROM attendance")
+            self.cursor.execute("DELETE FROM attendance_quarantine")
+            validator = AttendanceValidator(self._employee_ids())
+            for chunk in self._iter_attendance_chunks(path_or_buffer, chunksize, file_type):
+                valid, quarantined = self._split_attendance(validator, chunk)
+                self._insert_frame('attendance', valid)
+                self._insert_frame('attendance_quarantine', quarantined)
+                rows += len(valid)
+            self._build_attendance_facts()
+        return rows
+
+    @profiled
+    def append_attendance(self, df_attendance):
+        """
+        Add new attendance rows (e.g. one more day) without rebuilding anything.
+        Invalid rows, and rows whose (emp_id, date) is already loaded or repeated within
+        the batch, are added to the quarantine instead.
+        Only the new rows are parsed into attendance_facts, and the employee / department
+        rollups are updated with their deltas.
+        Returns the number of attendance rows actually appended.
+        """
+        missing = [col for col in REQUIRED_ATTENDANCE_COLUMNS if col not in df_attendance.columns]
+        if missing:
+            raise ValueError(f"Appended attendance is missing required columns: {missing}")
+        self._invalidate()
+        if self._vector is not None:
+            df_attendance, quarantined = self._split_attendance(
+                AttendanceValidator(self._vector.emp_ids), df_attendance,
+            )
+            with self.stats.step('vectorize'):
+                skipped = self._vector.append_attendance(df_attendance)
+            self._quarantine += [quarantined, quarantine_frame(skipped, 'duplicate')]
+            return len(df_attendance) - len(skipped)
+
+        with self._ingest_transaction():
+            df_attendance, quarantined = self._split_attendance(
+                AttendanceValidator(self._employee_ids()), df_attendance,
+            )
+            self._insert_frame('attendance_quarantine', quarantined)
+            self._execute_script(APPEND_STAGING_DDL)
+            self._insert_frame('attendance', df_attendance, target='temp.attendance_append')
+            self._execute_script(APPEND_DEDUP)
+            appended = self.cursor.execute("SELECT COUNT(*) FROM temp.attendance_append").fetchone()[0]
+            last_fact = self.cursor.execute("SELECT COALESCE(MAX(rowid), 0) FROM attendance_facts").fetchone()[0]
+            self.cursor.execute("""
+                INSERT INTO attendance (emp_id, date, check_in, check_out)
+                SELECT emp_id, date, check_in, check_out FROM temp.attendance_append ORDER BY rowid
+            """)
+            with self.stats.step('attendance_facts'):
+                self._execute_script(PARSE_LOOKUPS_FILL.format(source='temp.attendance_append'))
+                self.cursor.execute(ATTENDANCE_FACTS_INSERT_TEMPLATE.format(source='temp.attendance_append'))
+            with self.stats.step('rollups'):
+                self.cursor.execute(APPEND_NEW_FACTS, (last_fact,))
+                self._execute_script(ROLLUP_APPLY_DELTA)
+        return appended
+
+    def quarantined_attendance(self, limit=None):
+        """Attendance rows rejected by validation (QUARANTINE_COLUMNS) in load order; the first `limit` if given."""
+        if self._vector is not None:
+            df = pd.concat(self._quarantine, ignore_index=True) if self._quarantine else \
+                quarantine_frame(pd.DataFrame(columns=REQUIRED_ATTENDANCE_COLUMNS), 'duplicate')
+            return df if limit is None else df.head(limit).copy()
+        query = f"SELECT {', '.join(QUARANTINE_COLUMNS)} FROM attendance_quarantine ORDER BY rowid"
+        df = self._read_sql(query if limit is None else f"{query} LIMIT {int(limit)}")
+        return df.assign(reason=pd.Categorical(df['reason'], categories=REASONS))
+
+    def quarantine_counts(self):
+        """Quarantined attendance rows per reason: DataFrame (reason, rows) in REASONS order."""
+        if self._vector is not None:
+            return reason_counts(self.quarantined_attendance()['reason'].value_counts().to_dict())
+        return reason_counts(dict(self._read_rows("SELECT reason, COUNT(*) FROM attendance_quarantine GROUP BY reason")))
+
+    def _split_attendance(self, validator, df_attendance):
+        """Normalize an attendance frame (or chunk) and split it into (valid, quarantined) rows."""
+        df_attendance = _normalize_attendance(df_attendance)
+        with self.stats.step('validate'):
+            return validator.split(df_attendance)
+
+    def _employee_ids(self):
+        """emp_ids of the loaded employees, read on the writer inside the current ingest transaction."""
+        return [emp_id for (emp_id,) in self.cursor.execute("SELECT emp_id FROM employees")]
+
+    def _iter_attendance_chunks(self, path_or_buffer, chunksize, file_type):
+        """read_table_chunks() plus the per-chunk required-column check (parse time recorded as 'read')."""
+        if isinstance(path_or_buffer, pd.DataFrame):
+            reader = iter([path_or_buffer])
+        elif isinstance(path_or_buffer, (str, os.PathLike)) or hasattr(path_or_buffer, 'read'):
+            reader = read_table_chunks(path_or_buffer, chunksize, file_type)
+        else:
+            # Already parsed chunks, e.g. streamed in by another thread (see parallel_ingest.py)
+            reader = iter(path_or_buffer)
+        for chunk_no in itertools.count():
+            with self.stats.step('read'):
+                chunk = next(reader, None)
+            if chunk is None:
+                return
+            missing = [col for col in REQUIRED_ATTENDANCE_COLUMNS if col not in chunk.columns]
+            if missing:
+                raise ValueError(f"Attendance chunk {chunk_no} is missing required columns: {missing}")
+            yield chunk
+
+    @contextmanager
+    def _ingest_transaction(self):
+        """Take the writer, apply the ingest PRAGMAs and run the block as one transaction."""
+        with self._pool.write():
+            for pragma in INGEST_PRAGMAS if self.db_path is None else FILE_INGEST_PRAGMAS:
+                self.cursor.execute(pragma)
+
+            self.cursor.execute("BEGIN")
+            try:
+                yield
+            except BaseException:
+                self.conn.rollback()
+                raise
+            self.conn.commit()
+            # Queries that ran during the load (file-backed databases keep answering from
+            # the previous snapshot) must not stay memoized as results of the new data
+            self._new_generation()
+            if self.db_path is not None:
+                # Fold the load back into the database file so the WAL does not keep growing
+                # (PASSIVE: never waits for queries still reading the previous snapshot)
+                self.cursor.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchall()
+
+    def _load_reference_tables(self, df_employees, df_performance):
+        self._execute_script(SCHEMA_DDL)
+        self._insert_frame('employees', df_employees)
+        self._insert_frame('performance', _normalize_performance(df_performance))
+        self.cursor.execute(PERFORMANCE_PERIODS_BUILD)
+
+    def _execute_script(self, script):
+        """
+        Run a multi-statement DDL script statement by statement.
+        (cursor.executescript() would COMMIT the surrounding ingest transaction.)
+        """
+        for statement in script.split(';'):
+            if statement.strip():
+                self.cursor.execute(statement)
+
+    def _insert_frame(self, table, df, target=None):
+        """
+        Bulk insert a DataFrame into one of the typed source tables
+        (or into `target`, a staging table with the same columns).
+        Missing optional columns become NULL, NaN/NaT become NULL.
+        """
+        columns = TABLE_COLUMNS[table]
+        frame = df.reindex(columns=columns)
+        frame = frame.astype(object).where(frame.notna(), None)
+        placeholders = ', '.join('?' for _ in columns)
+        sql = f"INSERT INTO {target or table} ({', '.join(columns)}) VALUES ({placeholders})"
+        with self.stats.step(table):
+            # The trace callback would fire once per row under executemany: record the SQL once instead
+            with self.stats.paused_trace(self.conn, sql):
+                self.cursor.executemany(sql, frame.itertuples(index=False, name=None))
+
+    def _build_attendance_facts(self):
+        """
+        Materialize the attendance fact table in a single pass over attendance.
+        Timestamps are parsed exactly once here (per distinct date / clock value); every analysis query reads
+        the precomputed epoch / worked_minutes / weekday / cost columns.
+        """
+        with self.stats.step('attendance_facts'):
+            self._execute_script(ATTENDANCE_FACTS_DDL)
+            # The (small) lookup tables are kept until the next build, for explain_query_plans()
+            # and for append_attendance(), which only parses the values it has not seen yet
+            self._execute_script(PARSE_LOOKUPS_DDL)
+            self._execute_script(PARSE_LOOKUPS_FILL.format(source='attendance'))
+            self.cursor.execute(ATTENDANCE_FACTS_INSERT)
+        with self.stats.step('rollups'):
+            self._execute_script(ROLLUPS_DDL)
+            self.cursor.execute(EMPLOYEE_DAY_ROLLUP_BUILD)
+            self.cursor.execute(DEPARTMENT_DAY_ROLLUP_BUILD)
+            self.cursor.execute(EMPLOYEE_ROLLUP_BUILD)
+            self.cursor.execute(DEPARTMENT_ROLLUP_BUILD)
+
+    def _fact_arrays(self):
+        """
+        Worked attendance facts as flat arrays for the parallel path, plus the sorted
+        department labels (array index = department code) and the performance table.
+        Extracted once per load and reused by every parallel query.
         """
-        df_employees.to_sql('employees', self.conn, index=False, if_exists='replace')
-        df_attendance.to_sql('attendance', self.conn, index=False, if_exists='replace')
-        df_performance.to_sql('performance', self.conn, index=False, if_exists='replace')
+        if self._fact_arrays_cache is None:
+            with self.stats.step('fact_arrays'):
+                self._fact_arrays_cache = self._extract_fact_arrays()
+        return self._fact_arrays_cache
 
-    def run_cost_calculation(self):
+    def _extract_fact_arrays(self):
+        if self._vector is not None:
+            v = self._vector
+            worked = v._worked()
+            arrays = {
+                'emp_id': v.emp_ids[v.f_emp[worked]],
+                'dept': v.f_dept[worked],
+                'weekday': v.f_weekday[worked],
+                'minutes': v.f_minutes[worked],
+                'cost': v.f_cost[worked],
+            }
+            departments, performance = v.departments, v.performance
+        else:
+            facts = self._read_sql("""
+                SELECT emp_id, department, weekday, worked_minutes, daily_cost
+                FROM attendance_facts
+                WHERE worked_minutes IS NOT NULL
+            """)
+            dept, departments = pd.factorize(facts['department'], sort=True, use_na_sentinel=False)
+            arrays = {
+                'emp_id': facts['emp_id'].to_numpy(dtype='int64'),
+                'dept': dept,
+                'weekday': facts['weekday'].to_numpy(dtype='int64'),
+                'minutes': facts['worked_minutes'].to_numpy(dtype='float64'),
+                'cost': facts['daily_cost'].to_numpy(dtype='float64'),
+            }
+            departments = np.asarray(departments, dtype=object)
+            performance = self._read_sql("SELECT department, target_achievement_rate FROM performance")
+        return arrays, departments, performance
+
+    def _parallel_aggregates(self):
+        """
+        Merged shard totals of the loaded facts, computed once per data generation: the facts
+        are copied into the shard pool's shared block and summed by its long-lived workers,
+        later calls (any parallel query) reuse the totals.
+        """
+        with self._shard_lock:
+            cached = self._parallel_totals
+            if cached is None or cached[0] != self.generation:
+                generation = self.generation
+                arrays, departments, performance = self._fact_arrays()
+                with self.stats.step('parallel_aggregate'):
+                    self._shards.load(**arrays, n_dept=len(departments))
+                    totals = self._shards.aggregate()
+                cached = self._parallel_totals = (generation, totals, departments, performance)
+        return cached[1:]
+
+    def explain_query_plans(self):
+        """
+        Print EXPLAIN QUERY PLAN for every analysis query, to check that the
+        indexes are actually used. Returns the plans as {name: DataFrame}.
+        Only the sqlite backend has query plans (ValueError otherwise).
+        """
+        if self._vector is not None:
+            raise ValueError("Query plans are only available for the sqlite backend")
+
+        plans = {}
+        for name, query in ANALYSIS_QUERIES.items():
+            plan = self._read_sql("EXPLAIN QUERY PLAN " + query, {**PAGE_PARAMS, **RANKING_PARAMS, **self._leakage_params(ALL_DATES)})
+            plans[name] = plan
+            print(f"--- {name} ---")
+            for detail in plan['detail']:
+                print(f"  {detail}")
+        return plans
+
+    def date_span(self):
+        """First and last worked date loaded, as 'YYYY-MM-DD' strings ((None, None) when empty)."""
+        if self._vector is not None:
+            return self._vector.date_span()
+        first, last = self._read_rows("SELECT MIN(date), MAX(date) FROM department_day_rollup")[0]
+        return first, last
+
+    # Every analysis takes an optional inclusive date range: start / end as 'YYYY-MM-DD'
+    # strings, dates or Timestamps (either one may be omitted). Without a range the
+    # whole-period rollups answer; with one, the daily rollups do - never the raw punches.
+
+    @profiled
+    @compact_result
+    def run_cost_calculation(self, start=None, end=None):
         """
         Calculate daily work hours and cost for each attendance record.
         SQL logic:
-        1. Parse check_in and check_out to calculate hours worked.
-        2. Join with employees to get hourly_rate.
-        3. Cost = Hours * Rate.
-        """
-        query = """
-        SELECT 
-            a.emp_id,
-            e.name,
-            e.department,
-            e.level,
-            a.date,
-            a.check_in,
-            a.check_out,
-            e.hourly_rate,
-            -- Calculate Hours Worked (handling potential NULLs or cross-day is simplified here)
-            (julianday(a.date || ' ' || a.check_out) - julianday(a.date || ' ' || a.check_in)) * 24 AS hours_worked,
-            
-            -- Calculate Cost
-            ((julianday(a.date || ' ' || a.check_out) - julianday(a.date || ' ' || a.check_in)) * 24) * e.hourly_rate AS daily_cost
-        FROM attendance a
-        JOIN employees e ON a.emp_id = e.emp_id
-        WHERE a.check_out IS NOT NULL AND a.check_in IS NOT NULL
-        """
-        return pd.read_sql_query(query, self.conn)
-
-    def run_department_analysis(self):
+        1. Read precomputed worked_minutes and daily_cost from attendance_facts.
+        2. Join with employees for name / level.
+        3. Format check_in / check_out back from the epoch columns.
+        """
+        bounds = _date_bounds(start, end)
+        if self._vector is not None:
+            return self._vector.run_cost_calculation(bounds)
+        return self._read_sql(COST_QUERY, bounds or ALL_DATES)
+
+    def iter_cost_calculation(self, start=None, end=None, chunksize=DEFAULT_CHUNKSIZE):
+        """
+        run_cost_calculation() as a generator of DataFrames of at most `chunksize` rows,
+        ordered by (emp_id, date), so the detail report never has to fit in memory.
+        The sqlite backend fetches one keyset page per chunk (COST_PAGE_QUERY) on the
+        calling thread's read connection; loads may run between pages.
+        """
+        bounds = _date_bounds(start, end) or ALL_DATES
+        if self._vector is not None:
+            for chunk in self._vector.iter_cost_calculation(_date_bounds(start, end), chunksize):
+                yield self._compact(chunk)
+            return
+
+        params = {**bounds, **FIRST_PAGE_KEY, 'limit': chunksize}
+        while True:
+            page = self._read_sql(COST_PAGE_QUERY, params)
+            if page.empty:
+                return
+            last = page.iloc[-1]
+            params.update(emp_id=int(last['emp_id']), date=last['date'], rowid=int(last['fact_rowid']))
+            yield page.drop(columns='fact_rowid')
+            if len(page) < chunksize:
+                return
+
+    @profiled
+    def export_cost_calculation(self, path_or_buffer, file_type=None, start=None, end=None,
+                                chunksize=DEFAULT_CHUNKSIZE):
+        """
+        Stream the cost calculation to a CSV or Parquet file (path or writable binary buffer),
+        chunk by chunk from iter_cost_calculation(). The format comes from `file_type` or the
+        file name (CSV by default). Returns the number of rows written.
+        """
+        kind = _source_kind(path_or_buffer, file_type)
+        schema = _cost_arrow_schema() if kind == 'parquet' else None
+        with self.stats.step('export'):
+            return write_table_chunks(
+                self.iter_cost_calculation(start, end, chunksize), path_or_buffer, kind, schema
+            )
+
+    @memoized
+    @profiled
+    @compact_result
+    def run_department_analysis(self, start=None, end=None):
         """
         Aggregate costs by department and compare with performance.
         Includes specific 'Efficiency Index' Calculation.
+        With several evaluation periods loaded, each department's target achievement rate
+        is the mean over its periods (within a date range: the periods overlapping it).
         """
-        query = """
-        WITH DeptStats AS (
-            SELECT 
-                e.department,
-                COUNT(DISTINCT a.emp_id) as active_headcount,
-                SUM((julianday(a.date || ' ' || a.check_out) - julianday(a.date || ' ' || a.check_in)) * 24) as total_hours,
-                SUM(((julianday(a.date || ' ' || a.check_out) - julianday(a.date || ' ' || a.check_in)) * 24) * e.hourly_rate) as total_labor_cost
-            FROM attendance a
-            JOIN employees e ON a.emp_id = e.emp_id
-            WHERE a.check_out IS NOT NULL
-            GROUP BY e.department
-        )
-        SELECT 
-            d.department,
-            d.active_headcount,
-            CAST(d.total_hours AS INTEGER) as total_hours,
-            CAST(d.total_labor_cost AS INTEGER) as total_labor_cost,
-            p.target_achievement_rate,
-            
-            -- Efficiency Index (ROI) Calculation
-            -- Logic: (Performance Score / Cost in Millions) * 10
-            -- Higher is better. A department with high performance and low cost gets a high score.
-            ROUND((p.target_achievement_rate * 100) / (d.total_labor_cost / 1000000.0), 2) as efficiency_index
-        FROM DeptStats d
-        JOIN performance p ON d.department = p.department
-        ORDER BY efficiency_index DESC
-        """
-        return pd.read_sql_query(query, self.conn)
+        bounds = _date_bounds(start, end)
+        if self.workers > 1 and bounds is None:
+            totals, departments, performance = self._parallel_aggregates()
+            return department_frame(
+                departments, totals['dept_headcount'], totals['dept_minutes'],
+                totals['dept_cost'], totals['dept_records'], performance,
+            )
+        if self._vector is not None:
+            return self._vector.run_department_analysis(bounds)
+        if bounds is None:
+            return self._read_sql(DEPARTMENT_QUERY)
+        return self._read_sql(DEPARTMENT_RANGE_QUERY, bounds)
+
+    @memoized
+    @profiled
+    @compact_result
+    def run_efficiency_trend(self, start=None, end=None):
+        """
+        Efficiency index per evaluation period and department, for charting it over time.
+        Attendance is bucketed into the performance table's periods ('YYYY-MM', 'YYYY-Qn'
+        or 'YYYY'); days outside every period are left out. One row per
+        (evaluation_period, department), ordered by period start then department.
+        """
+        bounds = _date_bounds(start, end)
+        if self._vector is not None:
+            return self._vector.run_efficiency_trend(bounds)
+        return self._read_sql(EFFICIENCY_TREND_QUERY, bounds or ALL_DATES)
 
     def get_analysis_query(self):
-        """Returns the SQL query used for department analysis for display purposes."""
-        return """
-        WITH DeptStats AS (
-            SELECT 
-                e.department,
-                COUNT(DISTINCT a.emp_id) as active_headcount,
-                SUM((julianday(a.date || ' ' || a.check_out) - julianday(a.date || ' ' || a.check_in)) * 24) as total_hours,
-                SUM(((julianday(a.date || ' ' || a.check_out) - julianday(a.date || ' ' || a.check_in)) * 24) * e.hourly_rate) as total_labor_cost
-            FROM attendance a
-            JOIN employees e ON a.emp_id = e.emp_id
-            WHERE a.check_out IS NOT NULL
-            GROUP BY e.department
-        )
-        SELECT 
-            d.department,
-            d.active_headcount,
-            d.total_hours,
-            d.total_labor_cost,
-            p.target_achievement_rate,
-            
-            -- 효율 지수 (ROI) 계산 로직
-            -- (목표 달성률 * 100) / (총 인건비 / 100만)
-            ROUND((p.target_achievement_rate * 100) / (d.total_labor_cost / 1000000.0), 2) as efficiency_index
-        FROM DeptStats d
-        JOIN performance p ON d.department = p.department
-        ORDER BY efficiency_index DESC
-        """
-    def get_employee_ranking(self):
-        """
-        Rank employees by total hours worked (Hardest workers?)
-        """
-        query = """
-        SELECT 
-            e.name,
-            e.department,
-            e.level,
-            SUM((julianday(a.date || ' ' || a.check_out) - julianday(a.date || ' ' || a.check_in)) * 24) as total_hours
-        FROM attendance a
-        JOIN employees e ON a.emp_id = e.emp_id
-        WHERE a.check_out IS NOT NULL
-        GROUP BY e.emp_id
-        ORDER BY total_hours DESC
-        LIMIT 10
-        """
-        return pd.read_sql_query(query, self.conn)
-
-    def run_work_pattern_analysis(self):
+        """Returns the SQL query used for department analysis (also shown in the dashboard)."""
+        return DEPARTMENT_QUERY
+
+    @memoized
+    @profiled
+    @compact_result
+    def get_employee_ranking(self, start=None, end=None, n=10, department=None, per_department=False,
+                             metric='hours', ascending=False):
+        """
+        Top `n` employees by `metric` - 'hours', 'cost' (labor cost) or 'overtime_days'
+        (days over OVERTIME_DAY_MINUTES) - or the bottom `n` with ascending=True; ties go to
+        the lower emp_id. `department` keeps one department, per_department=True ranks
+        every department separately (top `n` each, ordered by department then rank).
+        Only employees with a worked day in the range are ranked. Served from the
+        per-employee rollups with a partial selection: Top-N does not sort every employee.
+        Columns: rank, name, department, level, total_hours, total_labor_cost, overtime_days.
+        """
+        if metric not in RANKING_METRICS:
+            raise ValueError(f"Unknown ranking metric {metric!r}; expected one of {list(RANKING_METRICS)}")
+        if isinstance(n, bool) or not isinstance(n, (int, np.integer)) or n < 1:
+            raise ValueError(f"n must be a positive integer, got {n!r}")
+        bounds = _date_bounds(start, end)
+        if self._vector is not None:
+            return self._vector.get_employee_ranking(
+                int(n), bounds, department=department, per_department=per_department,
+                metric=metric, ascending=ascending,
+            )
+        query = ranking_query(metric, ascending, per_department, ranged=bounds is not None)
+        result = self._read_sql(query, {**(bounds or {}), 'top_n': int(n), 'department': department})
+        if not per_department:
+            result.insert(0, 'rank', np.arange(1, len(result) + 1, dtype='int32'))
+        return result
+
+    @memoized
+    @profiled
+    @compact_result
+    def run_work_pattern_analysis(self, start=None, end=None):
         """
         Analyze average work hours by Day of Week for each department.
         """
-        query = """
-        SELECT 
-            e.department,
-            case cast (strftime('%w', a.date) as integer)
-              when 0 then 'Sunday'
-              when 1 then 'Monday'
-              when 2 then 'Tuesday'
-              when 3 then 'Wednesday'
-              when 4 then 'Thursday'
-              when 5 then 'Friday'
-              when 6 then 'Saturday'
-            end as day_of_week,
-            AVG((julianday(a.date || ' ' || a.check_out) - julianday(a.date || ' ' || a.check_in)) * 24) as avg_hours,
-            COUNT(*) as record_count
-        FROM attendance a
-        JOIN employees e ON a.emp_id = e.emp_id
-        WHERE a.check_out IS NOT NULL
-        GROUP BY e.department, day_of_week
-        ORDER BY e.department, 
-                 CASE day_of_week
-                    WHEN 'Monday' THEN 1
-                    WHEN 'Tuesday' THEN 2
-                    WHEN 'Wednesday' THEN 3
-                    WHEN 'Thursday' THEN 4
-                    WHEN 'Friday' THEN 5
-                    WHEN 'Saturday' THEN 6
-                    WHEN 'Sunday' THEN 7
-                 END
-        """
-        return pd.read_sql_query(query, self.conn)
+        bounds = _date_bounds(start, end)
+        if self.workers > 1 and bounds is None:
+            totals, departments, _ = self._parallel_aggregates()
+            return work_pattern_frame(departments, totals['cell_minutes'], totals['cell_counts'])
+        if self._vector is not None:
+            return self._vector.run_work_pattern_analysis(bounds)
+        return self._read_sql(WORK_PATTERN_QUERY, bounds or ALL_DATES)
 
-    def get_leakage_query(self):
-        return """
-        SELECT 
-            e.department,
-            strftime('%w', a.date) as day_idx, -- 0=Sun, 1=Mon...
-            AVG(hours_worked) as avg_hours
-        FROM attendance a
-        JOIN employees e ON ...
-        GROUP BY department, day_of_week
-        HAVING avg_hours > 9.0 -- 9시간 이상 근무 시 '과부하/비효율' 의심
+    @memoized
+    @profiled
+    @compact_result
+    def run_all(self, start=None, end=None):
+        """
+        Compute every dashboard result (optionally for a date range) from the rollups.
+        Returns {'run_department_analysis': df, 'get_employee_ranking': df,
+        'run_work_pattern_analysis': df, 'run_efficiency_trend': df}, identical to
+        calling the methods one by one.
         """
+        if self.workers > 1 and start is None and end is None:
+            # One parallel pass over the shards feeds both aggregate results
+            totals, departments, performance = self._parallel_aggregates()
+            return {
+                'run_department_analysis': department_frame(
+                    departments, totals['dept_headcount'], totals['dept_minutes'],
+                    totals['dept_cost'], totals['dept_records'], performance,
+                ),
+                'get_employee_ranking': self.get_employee_ranking(),
+                'run_work_pattern_analysis': work_pattern_frame(
+                    departments, totals['cell_minutes'], totals['cell_counts']
+                ),
+                'run_efficiency_trend': self.run_efficiency_trend(),
+            }
+
+        return {
+            'run_department_analysis': self.run_department_analysis(start, end),
+            'get_employee_ranking': self.get_employee_ranking(start, end),
+            'run_work_pattern_analysis': self.run_work_pattern_analysis(start, end),
+            'run_efficiency_trend': self.run_efficiency_trend(start, end),
+        }
+
+    @profiled
+    def run_scenarios(self, scenarios, start=None, end=None):
+        """
+        What-if analysis: evaluate a batch of {name: spec} scenarios (per-level rate multipliers,
+        per-department daily hour caps, headcount changes - see ScenarioModel.evaluate) against
+        the loaded attendance, optionally for a date range.
+        Returns a scenarios x departments DataFrame with (metric, department) columns for
+        total_hours, total_labor_cost and efficiency_index. The model behind it is built once
+        per load and range; each batch is then a few array operations.
+        """
+        return self._scenario_model(start, end).evaluate(scenarios)
+
+    def _scenario_model(self, start, end):
+        bounds = _date_bounds(start, end)
+        key = None if bounds is None else (bounds['start'], bounds['end'])
+        model = self._scenario_models.get(key)
+        if model is None:
+            with self.stats.step('scenario_model'):
+                baseline = self.run_department_analysis(start, end)
+                if self._vector is not None:
+                    histogram = self._vector.scenario_histogram(bounds)
+                else:
+                    histogram = self._read_sql(SCENARIO_HISTOGRAM_QUERY, bounds or ALL_DATES)
+                model = ScenarioModel(
+                    histogram, baseline['department'], baseline['active_headcount'],
+                    baseline['target_achievement_rate'],
+                )
+            if len(self._scenario_models) >= SCENARIO_MODEL_CACHE:
+                self._scenario_models.pop(next(iter(self._scenario_models)))
+            self._scenario_models[key] = model
+        return model
+
+    @memoized
+    @profiled
+    @compact_result
+    def run_leakage_detection(self, start=None, end=None, window_days=WINDOW_DAYS, z_threshold=Z_THRESHOLD,
+                              long_day_hours=LONG_DAY_HOURS, missing_threshold=MISSING_CHECKOUT_THRESHOLD):
+        """
+        Employee-level labor cost leakage (leakage.py). Each employee-day is compared with a
+        rolling baseline of the same employee's previous `window_days` calendar days: days
+        `z_threshold` standard deviations above it are overtime spikes, days of
+        `long_day_hours` or more are long days. Employees with `missing_threshold` or more
+        missing check-outs in the range are flagged too.
+        Returns {'flagged_days': df, 'employees': df, 'departments': df}, each ranked by the
+        estimated excess cost (hours above the baseline x hourly rate).
+        """
+        bounds = _date_bounds(start, end)
+        if self._vector is not None:
+            days, missing = self._vector.leakage_inputs(bounds, window_days, z_threshold, long_day_hours)
+        else:
+            bounds = bounds or ALL_DATES
+            days = self._read_sql(LEAKAGE_QUERY, self._leakage_params(bounds, window_days, z_threshold, long_day_hours))
+            missing = self._read_sql(MISSING_CHECKOUT_QUERY, bounds)
+        return rank_leakage(score_days(days, z_threshold, long_day_hours), missing, missing_threshold)
+
+    @staticmethod
+    def _leakage_params(bounds, window_days=WINDOW_DAYS, z_threshold=Z_THRESHOLD, long_day_hours=LONG_DAY_HOURS):
+        return {
+            **bounds,
+            'window_days': window_days,
+            'z_threshold': z_threshold,
+            'long_day_minutes': long_day_hours * 60,
+            'min_baseline_days': MIN_BASELINE_DAYS,
+            'min_std_minutes': MIN_STD_MINUTES,
+        }
+
+    def get_leakage_query(self):
+        """Returns the SQL behind run_leakage_detection() (also shown in the dashboard)."""
+        return LEAKAGE_QUERY
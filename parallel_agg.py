@@ -0,0 +1,147 @@
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Fact columns shipped to the workers, in shared-memory layout order (all 8-byte dtypes)
+FACT_FIELDS = [
+    ('emp_id', 'int64'),
+    ('dept', 'int64'),
+    ('weekday', 'int64'),
+    ('minutes', 'float64'),
+    ('cost', 'float64'),
+]
+
+
+def shard_of(emp_id, n_shards):
+    """Shard number per row: a multiplicative hash of emp_id, so every employee lives in exactly one shard."""
+    hashed = (np.asarray(emp_id, dtype='uint64') * np.uint64(2654435761)) % np.uint64(2 ** 32)
+    return (hashed % np.uint64(n_shards)).astype('int64')
+
+
+def aggregate_facts(emp_id, dept, weekday, minutes, cost, n_dept):
+    """
+    Partial aggregates for one shard of worked attendance rows:
+    per-department hour / cost sums, record counts and distinct headcount,
+    plus per-(department, weekday) sums and counts.
+    """
+    # Distinct (employee, department) pairs -> headcount per department
+    pairs = np.unique(emp_id * n_dept + dept)
+    return {
+        'dept_minutes': np.bincount(dept, weights=minutes, minlength=n_dept),
+        'dept_cost': np.bincount(dept, weights=cost, minlength=n_dept),
+        'dept_records': np.bincount(dept, minlength=n_dept),
+        'dept_headcount': np.bincount(pairs % n_dept, minlength=n_dept),
+        'cell_minutes': np.bincount(dept * 7 + weekday, weights=minutes, minlength=n_dept * 7),
+        'cell_counts': np.bincount(dept * 7 + weekday, minlength=n_dept * 7),
+    }
+
+
+def merge_partials(partials):
+    """Sum the shard partials. Headcounts add up because shards never share an employee."""
+    merged = {key: value.copy() for key, value in partials[0].items()}
+    for partial in partials[1:]:
+        for key, value in partial.items():
+            merged[key] += value
+    return merged
+
+
+def _field_views(buffer, n_rows):
+    return {
+        name: np.ndarray((n_rows,), dtype=dtype, buffer=buffer, offset=i * n_rows * 8)
+        for i, (name, dtype) in enumerate(FACT_FIELDS)
+    }
+
+
+def _aggregate_shard(shm_name, n_rows, start, stop, n_dept):
+    """Worker: attach to the shared fact block and aggregate rows [start, stop)."""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        views = _field_views(shm.buf, n_rows)
+        partial = aggregate_facts(
+            *(views[name][start:stop] for name, _ in FACT_FIELDS), n_dept=n_dept
+        )
+        # Views must be released before the shared block can be closed
+        del views
+        return partial
+    finally:
+        shm.close()
+
+
+class ShardPool:
+    """
+    Process pool plus the shared-memory block of the worked facts it aggregates, kept between
+    queries: the workers are spawned once (on the first aggregate) and live until close(),
+    the facts are grouped by shard and copied into the block once per load().
+    Not thread-safe; callers serialize access (HRLogicEngine holds a lock).
+    """
+
+    def __init__(self, workers):
+        self.workers = workers
+        self._pool = None
+        self._shm = None
+        self._layout = None  # (n_rows, shard bounds, n_dept) of the loaded facts
+
+    def load(self, emp_id, dept, weekday, minutes, cost, n_dept):
+        """
+        Group the facts by emp_id-hash shard into a new shared block, so each worker reads its
+        contiguous slice without any pickling. Replaces the previously loaded facts.
+        """
+        self.release()
+        n_rows = len(emp_id)
+        shard = shard_of(emp_id, self.workers)
+        order = np.argsort(shard, kind='stable')
+        bounds = np.searchsorted(shard[order], np.arange(self.workers + 1))
+
+        # A shared block cannot be empty
+        self._shm = shared_memory.SharedMemory(create=True, size=max(n_rows, 1) * 8 * len(FACT_FIELDS))
+        views = _field_views(self._shm.buf, n_rows)
+        for (name, dtype), column in zip(FACT_FIELDS, (emp_id, dept, weekday, minutes, cost)):
+            np.take(np.asarray(column, dtype=dtype), order, out=views[name])
+        del views
+        self._layout = (n_rows, bounds, n_dept)
+
+    def aggregate(self):
+        """Merged partial aggregates of the loaded facts, one worker task per shard."""
+        n_rows, bounds, n_dept = self._layout
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        futures = [
+            self._pool.submit(_aggregate_shard, self._shm.name, n_rows, bounds[k], bounds[k + 1], n_dept)
+            for k in range(self.workers)
+        ]
+        return merge_partials([future.result() for future in futures])
+
+    def release(self):
+        """Free the shared block of the loaded facts (the workers stay up)."""
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+            self._layout = None
+
+    def close(self):
+        """Free the shared block and shut the workers down."""
+        self.release()
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+
+def parallel_aggregate(emp_id, dept, weekday, minutes, cost, n_dept, workers):
+    """
+    One-off sharded aggregation: shard worked attendance facts by emp_id hash across a
+    process pool and merge the partial aggregates (see ShardPool, which keeps the pool
+    and the facts for repeated queries).
+    """
+    if workers <= 1 or len(emp_id) == 0:
+        return aggregate_facts(
+            np.asarray(emp_id, dtype='int64'), np.asarray(dept, dtype='int64'),
+            np.asarray(weekday, dtype='int64'), minutes, cost, n_dept,
+        )
+    pool = ShardPool(workers)
+    try:
+        pool.load(emp_id, dept, weekday, minutes, cost, n_dept)
+        return pool.aggregate()
+    finally:
+        pool.close()
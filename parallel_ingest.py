@@ -0,0 +1,194 @@
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from dtypes import normalize_dtypes
+from logic_engine import DEFAULT_CHUNKSIZE
+
+# Order of the (file name, raw bytes) sources a ParallelIngest takes
+SOURCES = ('employees', 'attendance', 'performance')
+SUPPORTED_EXTENSIONS = ('.csv', '.xls', '.xlsx')
+# Parsed attendance chunks buffered ahead of the engine: bounds memory when parsing outruns ingest
+PREFETCH_CHUNKS = 4
+
+# Load stages reported by ParallelIngest.progress()
+STAGES = ('parsing', 'reference', 'attendance', 'done')
+
+_END = object()
+
+
+class ParallelIngest:
+    """
+    Load the three uploads into an HRLogicEngine on background threads.
+
+    The files are parsed at the same time on a thread pool (pandas' CSV tokenizer, pyarrow
+    and SQLite release the GIL while they work), each through the Parquet ingest cache.
+    Employees and performance are small: once both are parsed they are loaded into the
+    engine while the attendance parser keeps streaming chunks through a bounded queue,
+    and the engine ingests every chunk as it arrives. The load therefore takes about as
+    long as parsing the largest file, instead of the sum of all three plus the ingest.
+
+    The worker threads never touch the UI: callers poll progress() (e.g. from Streamlit's
+    script thread) and collect the engine with result().
+    """
+
+    def __init__(self, engine, sources, cache, validate=None, on_loaded=None, chunksize=DEFAULT_CHUNKSIZE):
+        """
+        `sources`: [(name, bytes)] for employees, attendance and performance (SOURCES order);
+        they are dropped once the load has finished.
+        `validate(df_employees, df_performance)` may reject the reference tables before they
+        are loaded; `on_loaded(engine)` runs once everything is in (e.g. to record a fingerprint).
+        """
+        self.engine = engine
+        self.sources = dict(zip(SOURCES, sources))
+        self.cache = cache
+        self.validate = validate
+        self.on_loaded = on_loaded
+        self.chunksize = chunksize
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._cancel = threading.Event()
+        self._started = None
+        self._stage = 'parsing'
+        self._progress = {source: {'rows': 0, 'fraction': 0.0, 'done': False, 'seconds': None} for source in SOURCES}
+        self._result = None
+        self._error = None
+
+    @classmethod
+    def completed(cls, engine, attendance_rows):
+        """An already finished load, e.g. an engine that opened a database holding the data."""
+        load = cls(engine, [], cache=None)
+        load._stage = 'done'
+        for state in load._progress.values():
+            state.update(fraction=1.0, done=True)
+        load._result = (engine, attendance_rows)
+        load._done.set()
+        return load
+
+    def start(self):
+        self._started = time.perf_counter()
+        threading.Thread(target=self._run, name='parallel-ingest', daemon=True).start()
+        return self
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        """Block until the load finished or `timeout` seconds passed; True when it finished."""
+        return self._done.wait(timeout)
+
+    def result(self):
+        """(engine, attendance rows) once finished; re-raises the error of a failed load."""
+        self._done.wait()
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+    def progress(self):
+        """
+        Snapshot {'stage': one of STAGES, 'sources': {source: {'rows', 'fraction', 'done', 'seconds'}}}.
+        `fraction` is None while a file's size cannot be estimated; `seconds` is its parse time once done.
+        """
+        with self._lock:
+            return {'stage': self._stage, 'sources': {source: dict(state) for source, state in self._progress.items()}}
+
+    def _run(self):
+        try:
+            rows = self._load()
+            if self.on_loaded is not None:
+                self.on_loaded(self.engine)
+            self._result = (self.engine, rows)
+        except BaseException as exc:
+            self._error = exc
+        finally:
+            # The finished load may be cached for a long time (see app.py): keep the engine,
+            # not the raw bytes of the uploads
+            self.sources = {}
+            self._set_stage('done')
+            self._done.set()
+
+    def _load(self):
+        for source, (name, _) in self.sources.items():
+            if not name.lower().endswith(SUPPORTED_EXTENSIONS):
+                raise ValueError(f"Unsupported {source} file type: {name}")
+        chunks = queue.Queue(maxsize=PREFETCH_CHUNKS)
+        with ThreadPoolExecutor(max_workers=len(SOURCES), thread_name_prefix='parse') as pool:
+            employees = pool.submit(self._read_frame, 'employees')
+            performance = pool.submit(self._read_frame, 'performance')
+            attendance = pool.submit(self._stream_attendance, chunks)
+            try:
+                df_employees, df_performance = employees.result(), performance.result()
+                if self.validate is not None:
+                    self.validate(df_employees, df_performance)
+                self._set_stage('reference')
+                self.engine.load_reference_data(df_employees, df_performance)
+                self._set_stage('attendance')
+                rows = self.engine.ingest_attendance(self._drain(chunks))
+            finally:
+                # Stops the attendance parser if the load failed before it finished
+                self._cancel.set()
+            attendance.result()
+        return rows
+
+    def _read_frame(self, source):
+        name, data = self.sources[source]
+        df = normalize_dtypes(self.cache.load(name, data, progress=self._reporter(source)))
+        self._finish(source, len(df))
+        return df
+
+    def _stream_attendance(self, chunks):
+        """Producer: parse attendance chunk by chunk into `chunks`, ending with _END (or the error)."""
+        name, data = self.sources['attendance']
+        reader = self.cache.iter_chunks(name, data, self.chunksize, progress=self._reporter('attendance'))
+        rows = 0
+        try:
+            for chunk in reader:
+                if not self._put(chunks, chunk):
+                    return
+                rows += len(chunk)
+        except Exception as exc:
+            self._put(chunks, exc)
+            return
+        finally:
+            # Abandoning the reader early discards its half-written cache file
+            reader.close()
+        self._finish('attendance', rows)
+        self._put(chunks, _END)
+
+    def _put(self, chunks, item):
+        """Queue `item` unless the load was cancelled; False when it was."""
+        while not self._cancel.is_set():
+            try:
+                chunks.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _drain(self, chunks):
+        """Consumer side: the parsed attendance chunks, in order, as the engine's ingest input."""
+        while True:
+            item = chunks.get()
+            if item is _END:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+
+    def _reporter(self, source):
+        def report(rows, fraction):
+            with self._lock:
+                self._progress[source].update(rows=rows, fraction=fraction)
+        return report
+
+    def _finish(self, source, rows):
+        with self._lock:
+            self._progress[source].update(
+                rows=rows, fraction=1.0, done=True, seconds=round(time.perf_counter() - self._started, 3),
+            )
+
+    def _set_stage(self, stage):
+        with self._lock:
+            self._stage = stage
@@ -0,0 +1,175 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import wraps
+
+import pandas as pd
+
+# SQLite progress handler granularity: one Python callback per this many VM instructions
+PROGRESS_INTERVAL = 1000
+# Bounded history so the profiler can stay on in production
+MAX_RECORDS = 500
+# SQL statements kept per operation (text truncated to SQL_TEXT_LIMIT characters)
+MAX_SQL_PER_RECORD = 20
+SQL_TEXT_LIMIT = 2000
+
+
+@dataclass
+class OperationRecord:
+    """Profile of one engine operation (a query, a load, an ingest)."""
+    name: str
+    started_at: datetime
+    wall_s: float = 0.0
+    rows: int = None
+    vm_steps: int = 0
+    sql: list = field(default_factory=list)
+    steps: dict = field(default_factory=dict)  # sub-step name -> seconds (e.g. per-table load time)
+    error: str = None
+
+
+class EngineStats:
+    """
+    Structured, low-overhead profile of everything an HRLogicEngine does.
+
+    Each public operation gets an OperationRecord with wall time, rows returned,
+    SQLite VM steps (counted with set_progress_handler) and the SQL text it ran
+    (captured with set_trace_callback).
+    """
+
+    def __init__(self, max_records=MAX_RECORDS):
+        self.records = deque(maxlen=max_records)
+        self._local = threading.local()
+
+    def _stack(self):
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    @property
+    def current(self):
+        stack = self._stack()
+        return stack[-1] if stack else None
+
+    @contextmanager
+    def operation(self, name):
+        record = OperationRecord(name=name, started_at=datetime.now())
+        stack = self._stack()
+        stack.append(record)
+        start = time.perf_counter()
+        try:
+            yield record
+        except BaseException as exc:
+            record.error = f"{type(exc).__name__}: {exc}"
+            raise
+        finally:
+            record.wall_s = time.perf_counter() - start
+            stack.pop()
+            self.records.append(record)
+
+    @contextmanager
+    def step(self, name):
+        """Time a sub-step of the current operation (no-op outside an operation)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            record = self.current
+            if record is not None:
+                record.steps[name] = record.steps.get(name, 0.0) + time.perf_counter() - start
+
+    def install(self, conn):
+        """Attach the progress (VM step) and trace (SQL text) hooks to a SQLite connection."""
+        conn.set_progress_handler(self._on_progress, PROGRESS_INTERVAL)
+        conn.set_trace_callback(self._on_trace)
+
+    @contextmanager
+    def paused_trace(self, conn, statement=None):
+        """
+        Detach the trace hook from `conn` for the block and re-attach it afterwards, e.g. around
+        executemany(), which would report its SQL once per row. `statement` is recorded once instead.
+        """
+        conn.set_trace_callback(None)
+        try:
+            if statement is not None:
+                self.note_sql(statement)
+            yield
+        finally:
+            conn.set_trace_callback(self._on_trace)
+
+    def _on_progress(self):
+        record = self.current
+        if record is not None:
+            record.vm_steps += PROGRESS_INTERVAL
+        return 0  # never abort the statement
+
+    def _on_trace(self, statement):
+        self.note_sql(statement)
+
+    def note_sql(self, statement):
+        record = self.current
+        if record is not None and len(record.sql) < MAX_SQL_PER_RECORD:
+            record.sql.append(' '.join(statement.split())[:SQL_TEXT_LIMIT])
+
+    def to_frame(self):
+        """All recorded operations, oldest first."""
+        return pd.DataFrame([
+            {
+                'started_at': r.started_at,
+                'operation': r.name,
+                'wall_ms': round(r.wall_s * 1000, 3),
+                'rows': r.rows,
+                'vm_steps': r.vm_steps,
+                'steps_ms': {k: round(v * 1000, 3) for k, v in r.steps.items()},
+                'sql_statements': len(r.sql),
+                'error': r.error,
+            }
+            for r in list(self.records)
+        ], columns=['started_at', 'operation', 'wall_ms', 'rows', 'vm_steps',
+                    'steps_ms', 'sql_statements', 'error'])
+
+    def summary(self):
+        """Per-operation call count and wall time statistics."""
+        frame = self.to_frame()
+        if frame.empty:
+            return pd.DataFrame(columns=['operation', 'calls', 'total_ms', 'mean_ms', 'max_ms', 'vm_steps'])
+        return frame.groupby('operation', as_index=False).agg(
+            calls=('wall_ms', 'size'),
+            total_ms=('wall_ms', 'sum'),
+            mean_ms=('wall_ms', 'mean'),
+            max_ms=('wall_ms', 'max'),
+            vm_steps=('vm_steps', 'sum'),
+        ).sort_values('total_ms', ascending=False).reset_index(drop=True)
+
+    def last(self, name=None):
+        """Most recent record (optionally of a given operation name)."""
+        for record in reversed(self.records):
+            if name is None or record.name == name:
+                return record
+        return None
+
+    def clear(self):
+        self.records.clear()
+
+
+def _result_rows(result):
+    if isinstance(result, pd.DataFrame):
+        return len(result)
+    if isinstance(result, dict):
+        return sum(_result_rows(value) or 0 for value in result.values())
+    if isinstance(result, int) and not isinstance(result, bool):
+        return result
+    return None
+
+
+def profiled(method):
+    """Record an HRLogicEngine method call in `self.stats` under the method's name."""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.stats.operation(method.__name__) as record:
+            result = method(self, *args, **kwargs)
+            record.rows = _result_rows(result)
+        return result
+    return wrapper
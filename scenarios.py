@@ -0,0 +1,150 @@
+import numpy as np
+import pandas as pd
+
+from vector_backend import DAY_NAMES
+
+# Keys a scenario spec may use (see ScenarioModel.evaluate)
+SCENARIO_KEYS = ('rate_multipliers', 'hour_caps', 'headcount')
+
+# Result metrics, in column order of the scenarios x departments matrix
+SCENARIO_METRICS = ['total_hours', 'total_labor_cost', 'efficiency_index']
+
+
+class ScenarioModel:
+    """
+    What-if evaluation over a histogram of worked days.
+
+    `histogram` has one row per (department, weekday, level, hourly_rate, worked_minutes)
+    with its `records` count. Rows are grouped into segments (department, weekday, level)
+    and sorted by worked minutes inside each segment, with running sums of minutes, cost,
+    rate and records. A daily hour cap then needs no pass over the days: for cap c,
+    sum(min(minutes, c)) = (running sum up to the last day <= c) + c * (days above c),
+    and one searchsorted finds that split for every (scenario, segment) at once.
+
+    `departments`, `headcount` and `rates` are the baseline department analysis
+    (run_department_analysis() for the same date range): only those departments are modelled.
+    """
+
+    def __init__(self, histogram, departments, headcount, rates):
+        self.departments = pd.Index(departments)
+        self.headcount = np.asarray(headcount, dtype='float64')
+        self.rates = np.asarray(rates, dtype='float64')
+
+        dept = self.departments.get_indexer(histogram['department'])
+        histogram = histogram[dept >= 0]
+        dept = dept[dept >= 0]
+        level, levels = pd.factorize(histogram['level'], use_na_sentinel=False)
+        self.levels = pd.Index(levels)
+        n_levels = max(len(levels), 1)
+        self.n_segments = len(self.departments) * 7 * n_levels
+        # Segment = (department, weekday, level), department-major so departments are contiguous
+        segment = (dept * 7 + histogram['weekday'].to_numpy(dtype='int64')) * n_levels + level
+        self.segment_level = np.tile(np.arange(n_levels), len(self.departments) * 7)
+
+        minutes = histogram['worked_minutes'].to_numpy(dtype='float64')
+        order = np.lexsort((minutes, segment))
+        segment, minutes = segment[order], minutes[order]
+        records = histogram['records'].to_numpy(dtype='float64')[order]
+        rate = histogram['hourly_rate'].to_numpy(dtype='float64')[order]
+
+        def running(values):
+            return np.concatenate([[0.0], np.cumsum(values)])
+
+        self._cum_minutes = running(records * minutes)
+        self._cum_cost = running(records * minutes / 60.0 * rate)
+        self._cum_rate = running(records * rate)
+        self._cum_records = running(records)
+        # Sort key over (segment, minutes); minutes never reach _span, so segments never overlap
+        self._span = (minutes.max() if len(minutes) else 0.0) + 2.0
+        self._keys = segment * self._span + minutes
+        bounds = np.arange(self.n_segments)
+        self._start = np.searchsorted(segment, bounds, side='left')
+        self._end = np.searchsorted(segment, bounds, side='right')
+
+    def _between(self, cumulative, lo, hi):
+        return cumulative[hi] - cumulative[lo]
+
+    def _parse(self, name, spec):
+        """One scenario spec -> (level multipliers, per-(department, weekday) caps in minutes, headcount deltas)."""
+        unknown = set(spec) - set(SCENARIO_KEYS)
+        if unknown:
+            raise ValueError(f"Scenario {name!r}: unknown keys {sorted(unknown)}; expected {SCENARIO_KEYS}")
+        multipliers = np.ones(max(len(self.levels), 1))
+        for level, factor in spec.get('rate_multipliers', {}).items():
+            if level not in self.levels:
+                raise ValueError(f"Scenario {name!r}: unknown level {level!r}")
+            multipliers[self.levels.get_loc(level)] = factor
+
+        caps = np.full((len(self.departments), 7), np.inf)
+        for department, cap in spec.get('hour_caps', {}).items():
+            row = self._department(name, department)
+            if isinstance(cap, dict):
+                for day, hours in cap.items():
+                    if day not in DAY_NAMES:
+                        raise ValueError(f"Scenario {name!r}: unknown day {day!r}; expected one of {DAY_NAMES}")
+                    caps[row, DAY_NAMES.index(day)] = hours * 60.0
+            else:
+                caps[row, :] = cap * 60.0
+
+        delta = np.zeros(len(self.departments))
+        for department, change in spec.get('headcount', {}).items():
+            delta[self._department(name, department)] = change
+        return multipliers, caps, delta
+
+    def _department(self, name, department):
+        if department not in self.departments:
+            raise ValueError(f"Scenario {name!r}: unknown department {department!r}")
+        return self.departments.get_loc(department)
+
+    def evaluate(self, scenarios):
+        """
+        Evaluate {name: spec} scenarios in one vectorized pass. A spec may hold:
+          'rate_multipliers': {level: factor}             e.g. {'Senior': 1.1}
+          'hour_caps': {department: hours}                 daily cap on every day, or
+                       {department: {day_name: hours}}     e.g. {'Engineering': {'Friday': 8}}
+          'headcount': {department: change}                e.g. {'HR': -2}; the department's totals
+                                                           scale by (headcount + change) / headcount
+        An empty spec reproduces the baseline department analysis.
+        Returns a DataFrame indexed by scenario name with (metric, department) columns for
+        total_hours, total_labor_cost and efficiency_index.
+        """
+        names = list(scenarios)
+        parsed = [self._parse(name, scenarios[name]) for name in names]
+        n_scenarios, n_dept = len(names), len(self.departments)
+        multipliers = np.array([p[0] for p in parsed]).reshape(n_scenarios, -1)
+        delta = np.array([p[2] for p in parsed]).reshape(n_scenarios, n_dept)
+        # Caps per (scenario, segment): a (department, weekday) cap applies to all its levels
+        caps = np.array([p[1] for p in parsed]).reshape(n_scenarios, n_dept * 7)
+        caps = np.repeat(caps, max(len(self.levels), 1), axis=1)
+
+        start, end = self._start, self._end
+        minutes = np.broadcast_to(self._between(self._cum_minutes, start, end), caps.shape).copy()
+        cost = np.broadcast_to(self._between(self._cum_cost, start, end), caps.shape).copy()
+
+        # Only capped cells need the split point
+        s, g = np.nonzero(np.isfinite(caps))
+        if len(s):
+            cap = np.minimum(caps[s, g], self._span - 1.0)
+            split = np.searchsorted(self._keys, g * self._span + cap, side='right')
+            lo, hi = start[g], end[g]
+            minutes[s, g] = self._between(self._cum_minutes, lo, split) + \
+                cap * self._between(self._cum_records, split, hi)
+            cost[s, g] = self._between(self._cum_cost, lo, split) + \
+                cap / 60.0 * self._between(self._cum_rate, split, hi)
+
+        cost *= multipliers[:, self.segment_level]
+        dept_minutes = minutes.reshape(n_scenarios, n_dept, -1).sum(axis=2)
+        dept_cost = cost.reshape(n_scenarios, n_dept, -1).sum(axis=2)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            scale = np.clip(self.headcount + delta, 0, None) / self.headcount
+            dept_minutes *= scale
+            dept_cost *= scale
+            efficiency = np.round((self.rates * 100) / (dept_cost / 1000000.0), 2)
+        efficiency[~np.isfinite(efficiency)] = np.nan
+
+        columns = pd.MultiIndex.from_product([SCENARIO_METRICS, self.departments], names=['metric', 'department'])
+        # Sums are re-associated relative to the department analysis: round off float noise
+        # first, so an exactly integral total is not truncated to the integer below it
+        values = np.hstack([np.trunc(np.round(dept_minutes / 60.0, 6)), np.trunc(np.round(dept_cost, 6)), efficiency])
+        result = pd.DataFrame(values, index=pd.Index(names, name='scenario'), columns=columns)
+        return result.astype({col: 'int64' for col in columns if col[0] != 'efficiency_index'})
@@ -0,0 +1,105 @@
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import date
+
+# Allow running as `python scripts/bench_concurrency.py` from the project root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from logic_engine import HRLogicEngine
+from data_generator import DEPARTMENTS, generate_attendance, generate_employees, generate_performance
+
+
+def run_readers(engine, query, threads, duration, ingest_batches=None):
+    """
+    Call `query` from `threads` threads for `duration` seconds, optionally while another
+    thread keeps appending attendance batches. Returns (queries per second, attendance rows appended).
+    """
+    stop = threading.Event()
+    counts = [0] * threads
+    errors = []
+    appended = [0]
+
+    def reader(slot):
+        try:
+            while not stop.is_set():
+                getattr(engine, query)()
+                counts[slot] += 1
+        except Exception as exc:
+            errors.append(exc)
+            stop.set()
+
+    def writer():
+        for batch in ingest_batches:
+            if stop.is_set():
+                return
+            appended[0] += engine.append_attendance(batch)
+
+    workers = [threading.Thread(target=reader, args=(slot,)) for slot in range(threads)]
+    if ingest_batches:
+        workers.append(threading.Thread(target=writer))
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    stop.wait(duration)
+    stop.set()
+    for worker in workers:
+        worker.join()
+    if errors:
+        raise errors[0]
+    return sum(counts) / (time.perf_counter() - start), appended[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent query throughput of one shared HRLogicEngine vs. thread count")
+    parser.add_argument('--employees', type=int, default=2000)
+    parser.add_argument('--start', type=date.fromisoformat, default=date(2024, 1, 1))
+    parser.add_argument('--end', type=date.fromisoformat, default=date(2024, 6, 30))
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 2, 4, 8, 16])
+    parser.add_argument('--duration', type=float, default=3.0, help="seconds per thread count")
+    parser.add_argument('--query', default='run_department_analysis',
+                        help="engine method to call, e.g. run_work_pattern_analysis for a full fact scan")
+    parser.add_argument('--db-path', help="file-backed (WAL) database; default is a new temporary file")
+    parser.add_argument('--in-memory', action='store_true', help="use the shared in-memory database instead")
+    parser.add_argument('--with-ingest', action='store_true',
+                        help="keep appending the last days of attendance while the queries run")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    df_emp = generate_employees(args.employees, seed=args.seed)
+    df_att = generate_attendance(df_emp, args.start, args.end, seed=args.seed)
+    df_perf = generate_performance(DEPARTMENTS, args.start, args.end, seed=args.seed)
+
+    db_path = None
+    if not args.in_memory:
+        db_path = args.db_path or os.path.join(tempfile.mkdtemp(), 'bench_concurrency.sqlite')
+    # memo_size=0: measure the queries themselves, not repeated hits on the result memo
+    engine = HRLogicEngine(db_path=db_path, memo_size=0)
+
+    # With --with-ingest the last 20 days are held back and appended one day at a time.
+    # Every round starts from a reload without them: re-appending days a previous round
+    # already added would only quarantine duplicates, leaving the writer with no real work.
+    days = sorted(df_att['date'].unique())
+    held_back = days[-20:] if args.with_ingest else []
+    df_loaded = df_att[~df_att['date'].isin(held_back)]
+    batches = [df_att[df_att['date'] == day] for day in held_back]
+    engine.load_data(df_emp, df_loaded, df_perf)
+
+    print(f"{len(df_att):,} attendance rows, database: {db_path or 'shared in-memory'}, "
+          f"query: {args.query}, CPU cores: {os.cpu_count()}")
+    print(f"{'threads':>8} {'queries/s':>10} {'speedup':>8} {'appended':>9}")
+    baseline = None
+    for round_no, threads in enumerate(args.threads):
+        if held_back and round_no:
+            engine.load_data(df_emp, df_loaded, df_perf)
+        qps, appended = run_readers(engine, args.query, threads, args.duration, batches)
+        baseline = baseline or qps
+        print(f"{threads:>8} {qps:>10.1f} {qps / baseline:>7.2f}x {appended:>9,}")
+    engine.close()
+
+
+if __name__ == "__main__":
+    main()
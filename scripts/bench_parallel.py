@@ -0,0 +1,66 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+# Allow running as `python scripts/bench_parallel.py` from the project root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from parallel_agg import parallel_aggregate
+
+
+def make_facts(rows, employees, departments, seed):
+    """Synthetic worked attendance facts (already integer-encoded)."""
+    rng = np.random.default_rng(seed)
+    emp_ids = rng.choice(np.arange(100000, 1000000), size=employees, replace=False)
+    emp_dept = rng.integers(0, departments, size=employees)
+    emp_rate = rng.choice([15000.0, 25000.0, 40000.0, 60000.0], size=employees)
+    emp = rng.integers(0, employees, size=rows)
+    minutes = rng.normal(540, 45, size=rows)
+    return {
+        'emp_id': emp_ids[emp],
+        'dept': emp_dept[emp],
+        'weekday': rng.integers(1, 6, size=rows),
+        'minutes': minutes,
+        'cost': minutes / 60.0 * emp_rate[emp],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark parallel partitioned aggregation vs. worker count")
+    parser.add_argument('--rows', type=int, default=5_000_000)
+    parser.add_argument('--employees', type=int, default=100_000)
+    parser.add_argument('--departments', type=int, default=200)
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"Generating {args.rows:,} fact rows ({args.employees:,} employees, {args.departments} departments)...")
+    facts = make_facts(args.rows, args.employees, args.departments, args.seed)
+    print(f"CPU cores: {os.cpu_count()}")
+
+    baseline = None
+    reference = None
+    print(f"{'workers':>8} {'best sec':>10} {'speedup':>8}")
+    for workers in range(1, args.max_workers + 1):
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            totals = parallel_aggregate(**facts, n_dept=args.departments, workers=workers)
+            timings.append(time.perf_counter() - start)
+        if reference is None:
+            reference = totals
+        else:
+            # Every worker count must produce the same aggregates
+            assert np.array_equal(totals['dept_headcount'], reference['dept_headcount'])
+            assert np.allclose(totals['dept_cost'], reference['dept_cost'])
+        best = min(timings)
+        baseline = baseline or best
+        print(f"{workers:>8} {best:>10.3f} {baseline / best:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+import argparse
+import gc
+import json
+import math
+import os
+import platform
+import resource
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+
+# Allow running as `python scripts/benchmark.py` from the project root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from logic_engine import HRLogicEngine
+from data_generator import DEPARTMENTS, generate_attendance_chunks, generate_employees, generate_performance, write_table
+
+DEFAULT_SCALES = [10_000, 1_000_000, 10_000_000]
+DEFAULT_OPERATIONS = [
+    'load_data',
+    'ingest_attendance',
+    'run_cost_calculation',
+    'run_department_analysis',
+    'get_employee_ranking',
+    'run_work_pattern_analysis',
+    'run_efficiency_trend',
+    'run_leakage_detection',
+    'run_scenarios',
+    'iter_cost_calculation',
+    'export_cost_calculation',
+    'run_all',
+]
+QUERY_OPERATIONS = DEFAULT_OPERATIONS[2:]
+# A representative what-if batch: a rate raise, a daily hour cap, a headcount change
+SCENARIOS = {
+    'baseline': {},
+    'senior_raise': {'rate_multipliers': {'Senior': 1.1}},
+    'cap_all_9h': {'hour_caps': {dept: 9 for dept in DEPARTMENTS}},
+    'engineering_plus_5': {'headcount': {'Engineering': 5}},
+}
+DEFAULT_THRESHOLD = 0.10  # flag results more than 10% slower / larger than the baseline
+START_DATE = date(2024, 1, 1)
+
+
+class PeakMemory:
+    """
+    Track peak resident memory of this process while a block runs, by sampling
+    /proc/self/statm from a background thread. SQLite's memory is included, unlike
+    tracemalloc. Falls back to ru_maxrss (a process-lifetime high-water mark) elsewhere.
+    """
+
+    def __init__(self, interval=0.002):
+        self.interval = interval
+        self.peak_bytes = 0
+        self._page_size = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+        self._has_statm = os.path.exists('/proc/self/statm')
+
+    def _rss(self):
+        if self._has_statm:
+            with open('/proc/self/statm') as f:
+                return int(f.read().split()[1]) * self._page_size
+        # ru_maxrss is KiB on Linux, bytes on macOS
+        scale = 1 if sys.platform == 'darwin' else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+    def _sample(self):
+        while not self._done.is_set():
+            self._high = max(self._high, self._rss())
+            self._done.wait(self.interval)
+
+    def __enter__(self):
+        gc.collect()
+        self._baseline = self._rss()
+        self._high = self._baseline
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._high = max(self._high, self._rss())
+        self._done.set()
+        self._thread.join()
+        self.peak_bytes = self._high - self._baseline
+        return False
+
+
+def dataset_shape(rows):
+    """Employees and workdays so that employees * workdays * (1 - absence) is about `rows`."""
+    employees = max(50, rows // 250)
+    workdays = max(1, math.ceil(rows / (employees * 0.95)))
+    end = START_DATE
+    counted = 0
+    while True:
+        if end.weekday() < 5:
+            counted += 1
+            if counted == workdays:
+                break
+        end += timedelta(days=1)
+    return employees, end
+
+
+def prepare_dataset(rows, data_dir, seed):
+    """Generate (once) the employees / attendance / performance Parquet files for a scale."""
+    path = os.path.join(data_dir, f"scale_{rows}_seed_{seed}")
+    if not os.path.exists(os.path.join(path, 'attendance.parquet')):
+        os.makedirs(path, exist_ok=True)
+        employees, end = dataset_shape(rows)
+        df_employees = generate_employees(employees, seed=seed)
+        write_table([df_employees], path, 'employees', ['parquet'])
+        write_table(generate_attendance_chunks(df_employees, START_DATE, end, seed=seed), path, 'attendance', ['parquet'])
+        write_table([generate_performance(DEPARTMENTS, START_DATE, end, seed=seed)], path, 'performance', ['parquet'])
+    return path
+
+
+def measure(fn, repeat):
+    """Best wall time and largest peak memory over `repeat` runs. Returns (seconds, bytes, result rows)."""
+    best, peak, rows = float('inf'), 0, None
+    for _ in range(repeat):
+        with PeakMemory() as memory:
+            start = time.perf_counter()
+            result = fn()
+            elapsed = time.perf_counter() - start
+        best = min(best, elapsed)
+        peak = max(peak, memory.peak_bytes)
+        if isinstance(result, pd.DataFrame):
+            rows = len(result)
+        elif isinstance(result, dict):
+            rows = sum(len(df) for df in result.values())
+        elif isinstance(result, int):
+            rows = result
+        del result
+    return best, peak, rows
+
+
+def query_call(engine, operation, export_path):
+    """The call measured for a query operation, with representative arguments where it needs any."""
+    if operation == 'run_scenarios':
+        return lambda: engine.run_scenarios(SCENARIOS)
+    if operation == 'iter_cost_calculation':
+        # Consume every page; the row count is the sum of the page lengths
+        return lambda: sum(len(page) for page in engine.iter_cost_calculation())
+    if operation == 'export_cost_calculation':
+        return lambda: engine.export_cost_calculation(export_path)
+    return getattr(engine, operation)
+
+
+def run_scale(rows, backend, operations, data_dir, seed, repeat):
+    path = prepare_dataset(rows, data_dir, seed)
+    df_emp = pd.read_parquet(os.path.join(path, 'employees.parquet'))
+    df_perf = pd.read_parquet(os.path.join(path, 'performance.parquet'))
+    attendance_path = os.path.join(path, 'attendance.parquet')
+
+    results = []
+
+    def record(operation, fn):
+        seconds, peak, out_rows = measure(fn, repeat)
+        results.append({
+            'scale': rows, 'backend': backend, 'operation': operation,
+            'wall_s': round(seconds, 6), 'peak_mem_mb': round(peak / 2 ** 20, 2), 'rows': out_rows,
+        })
+        print(f"  {backend:>6} {operation:<26} {seconds:>9.3f}s {peak / 2 ** 20:>9.1f} MB  rows={out_rows}")
+
+    # memo_size=0: repeated runs must recompute instead of hitting the result memo
+    engine = HRLogicEngine(backend=backend, memo_size=0)
+    if 'ingest_attendance' in operations:
+        def ingest():
+            engine.load_reference_data(df_emp, df_perf)
+            return engine.ingest_attendance(attendance_path)
+        record('ingest_attendance', ingest)
+
+    # load_data is measured from an in-memory DataFrame (read outside the measurement)
+    df_att = pd.read_parquet(attendance_path)
+    if 'load_data' in operations or any(op in QUERY_OPERATIONS for op in operations):
+        if 'load_data' in operations:
+            record('load_data', lambda: engine.load_data(df_emp, df_att, df_perf))
+        else:
+            engine.load_data(df_emp, df_att, df_perf)
+    del df_att
+    gc.collect()
+
+    for operation in QUERY_OPERATIONS:
+        if operation in operations:
+            record(operation, query_call(engine, operation, os.path.join(path, 'cost_export.parquet')))
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Return the results that got slower / bigger than the baseline by more than `threshold`."""
+    base = {(r['scale'], r['backend'], r['operation']): r for r in baseline.get('results', [])}
+    regressions = []
+    for result in results:
+        previous = base.get((result['scale'], result['backend'], result['operation']))
+        if previous is None:
+            continue
+        for metric in ('wall_s', 'peak_mem_mb'):
+            # Ignore noise on tiny absolute values (under 5 ms / 1 MB)
+            floor = 0.005 if metric == 'wall_s' else 1.0
+            if result[metric] > max(previous[metric], floor) * (1 + threshold):
+                regressions.append({
+                    **{k: result[k] for k in ('scale', 'backend', 'operation')},
+                    'metric': metric, 'baseline': previous[metric], 'current': result[metric],
+                    'change': round(result[metric] / max(previous[metric], floor) - 1, 4),
+                })
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark HRLogicEngine ingest and queries (wall time + peak memory)")
+    parser.add_argument('--scales', type=int, nargs='+', default=DEFAULT_SCALES, help="attendance rows per dataset")
+    parser.add_argument('--backends', default='sqlite', help="comma-separated: sqlite, numpy")
+    parser.add_argument('--operations', default=','.join(DEFAULT_OPERATIONS), help="comma-separated subset")
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--data-dir', default=os.path.join(tempfile.gettempdir(), 'logichr_bench'),
+                        help="where generated datasets are kept between runs")
+    parser.add_argument('--output', default='bench_results.json', help="machine-readable results (JSON)")
+    parser.add_argument('--baseline', help="previous results JSON to compare against")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="relative slowdown / growth that counts as a regression")
+    args = parser.parse_args(argv)
+    args.backends = [b.strip() for b in args.backends.split(',') if b.strip()]
+    args.operations = [op.strip() for op in args.operations.split(',') if op.strip()]
+    unknown = set(args.operations) - set(DEFAULT_OPERATIONS)
+    if unknown:
+        parser.error(f"unknown operation(s): {sorted(unknown)}")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = []
+    for rows in args.scales:
+        print(f"=== scale: {rows:,} attendance rows ===")
+        for backend in args.backends:
+            results.extend(run_scale(rows, backend, args.operations, args.data_dir, args.seed, args.repeat))
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'repeat': args.repeat,
+            'seed': args.seed,
+        },
+        'results': results,
+    }
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        report['regressions'] = regressions
+        if regressions:
+            exit_code = 1
+            print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}:")
+            for r in regressions:
+                print(f"  {r['backend']} {r['operation']} @ {r['scale']:,}: "
+                      f"{r['metric']} {r['baseline']} -> {r['current']} ({r['change']:+.1%})")
+        else:
+            print(f"\nNo regressions above {args.threshold:.0%} against {args.baseline}")
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,19 +1,21 @@
-import pandas as pd
-import numpy as np
-from faker import Faker
-import random
-from datetime import datetime, timedelta
+import argparse
 import os
+from datetime import date, timedelta
 
-# Initialize Faker
-fake = Faker('ko_KR')  # Korean locale
-Faker.seed(42)
-random.seed(42)
+import numpy as np
+import pandas as pd
+from faker import Faker
 
-# Configuration
+# Configuration (defaults reproduce the demo dataset size: 50 employees, January 2024)
 NUM_EMPLOYEES = 50
-START_DATE = datetime(2024, 1, 1)
-END_DATE = datetime(2024, 1, 31)
+START_DATE = date(2024, 1, 1)
+END_DATE = date(2024, 1, 31)
+ABSENCE_RATE = 0.05        # chance an employee is absent on a workday
+MISSING_PUNCH_RATE = 0.02  # chance a check-out punch is missing
+SEED = 42
+CHUNK_ROWS = 1_000_000     # attendance rows generated / written per chunk
+EXCEL_MAX_ROWS = 1_048_575  # sheet limit (minus header row)
+
 DEPARTMENTS = ['Sales', 'Engineering', 'HR', 'Marketing', 'Finance']
 LEVELS = ['Junior', 'Senior', 'Manager', 'Director']
 HOURLY_RATES = {
@@ -23,89 +25,189 @@ HOURLY_RATES = {
     'Director': 60000
 }
 
-def generate_employees(num):
-    employees = []
-    for _ in range(num):
-        level = random.choice(LEVELS)
-        employees.append({
-            'emp_id': fake.unique.random_number(digits=6),
-            'name': fake.name(),
-            'department': random.choice(DEPARTMENTS),
-            'level': level,
-            'hourly_rate': HOURLY_RATES[level]
-        })
-    return pd.DataFrame(employees)
-
-def generate_attendance(employees, start_date, end_date):
-    attendance_records = []
-    
-    current_date = start_date
-    while current_date <= end_date:
-        # Skip weekends
-        if current_date.weekday() >= 5:
-            current_date += timedelta(days=1)
-            continue
-            
-        for _, emp in employees.iterrows():
-            # 5% chance of absence
-            if random.random() < 0.05:
-                continue
-                
-            # Random check-in time (08:30 - 09:30)
-            check_in_base = current_date.replace(hour=8, minute=30)
-            check_in = check_in_base + timedelta(minutes=random.randint(0, 60))
-            
-            # Random check-out time (17:30 - 19:30), sometimes missing (e.g., 2% chance error)
-            if random.random() < 0.02:
-                check_out = None # Simulation of missing punch-out
-            else:
-                check_out_base = current_date.replace(hour=17, minute=30)
-                check_out = check_out_base + timedelta(minutes=random.randint(0, 120))
-            
-            attendance_records.append({
-                'emp_id': emp['emp_id'],
-                'date': current_date.strftime('%Y-%m-%d'),
-                'check_in': check_in.strftime('%H:%M:%S'),
-                'check_out': check_out.strftime('%H:%M:%S') if check_out else None
-            })
-        
-        current_date += timedelta(days=1)
-        
-    return pd.DataFrame(attendance_records)
-
-def generate_performance(departments):
-    performance_records = []
-    for dept in departments:
+# Size of the Faker name pool; names are drawn from it with NumPy instead of one Faker call per employee
+NAME_POOL_SIZE = 2000
+
+# 'HH:MM:00' label for every minute of the day, indexed by minute number
+CLOCK_LABELS = np.array([f"{m // 60:02d}:{m % 60:02d}:00" for m in range(24 * 60)], dtype=object)
+
+def generate_employees(num, seed=SEED):
+    rng = np.random.default_rng([seed, 0])
+    fake = Faker('ko_KR')  # Korean locale
+    fake.seed_instance(seed)
+    name_pool = np.array([fake.name() for _ in range(min(num, NAME_POOL_SIZE))], dtype=object)
+
+    # Unique random IDs, at least 6 digits (more when the population needs it)
+    digits = max(6, len(str(num * 10)))
+    low = 10 ** (digits - 1)
+    emp_ids = low + rng.choice(9 * low, size=num, replace=False)
+
+    levels = np.array(LEVELS, dtype=object)[rng.integers(0, len(LEVELS), size=num)]
+    return pd.DataFrame({
+        'emp_id': emp_ids,
+        'name': name_pool[rng.integers(0, len(name_pool), size=num)],
+        'department': np.array(DEPARTMENTS, dtype=object)[rng.integers(0, len(DEPARTMENTS), size=num)],
+        'level': levels,
+        'hourly_rate': pd.Series(levels).map(HOURLY_RATES).to_numpy(),
+    })
+
+def _workdays(start_date, end_date):
+    days = pd.date_range(start_date, end_date, freq='D')
+    # Skip weekends
+    return days[days.weekday < 5]
+
+def generate_attendance_chunks(employees, start_date, end_date, absence_rate=ABSENCE_RATE,
+                               missing_punch_rate=MISSING_PUNCH_RATE, seed=SEED, chunk_rows=CHUNK_ROWS):
+    """
+    Yield attendance DataFrames of roughly `chunk_rows` rows, a block of whole days at a time.
+    Every day draws from its own seeded generator, so the output is identical for a given
+    seed no matter how it is chunked.
+    """
+    emp_ids = employees['emp_id'].to_numpy()
+    days_per_chunk = max(1, chunk_rows // max(1, len(emp_ids)))
+    workdays = _workdays(start_date, end_date)
+
+    for block_start in range(0, len(workdays), days_per_chunk):
+        frames = []
+        for day in workdays[block_start:block_start + days_per_chunk]:
+            rng = np.random.default_rng([seed, 1, day.toordinal()])
+            # 5% chance of absence (by default)
+            present = rng.random(len(emp_ids)) >= absence_rate
+            n = int(present.sum())
+
+            # Random check-in time (08:30 - 09:30), check-out (17:30 - 19:30), sometimes missing
+            check_in = 8 * 60 + 30 + rng.integers(0, 61, size=n)
+            check_out = 17 * 60 + 30 + rng.integers(0, 121, size=n)
+            check_out_labels = CLOCK_LABELS[check_out]
+            check_out_labels[rng.random(n) < missing_punch_rate] = None  # Simulation of missing punch-out
+
+            frames.append(pd.DataFrame({
+                'emp_id': emp_ids[present],
+                'date': day.strftime('%Y-%m-%d'),
+                'check_in': CLOCK_LABELS[check_in],
+                'check_out': check_out_labels,
+            }))
+        if frames:
+            yield pd.concat(frames, ignore_index=True)
+
+def generate_attendance(employees, start_date, end_date, **kwargs):
+    """Whole attendance table in memory (small datasets only)."""
+    chunks = list(generate_attendance_chunks(employees, start_date, end_date, **kwargs))
+    if not chunks:
+        return pd.DataFrame(columns=['emp_id', 'date', 'check_in', 'check_out'])
+    return pd.concat(chunks, ignore_index=True)
+
+def generate_performance(departments, start_date=START_DATE, end_date=END_DATE, seed=SEED):
+    """One row per department per evaluation month in the date range."""
+    rng = np.random.default_rng([seed, 2])
+    periods = pd.period_range(start_date, end_date, freq='M').strftime('%Y-%m')
+    grid = pd.MultiIndex.from_product([periods, departments], names=['evaluation_period', 'department'])
+    return pd.DataFrame({
+        'department': grid.get_level_values('department'),
         # Random target achievement rate (70% - 130%)
-        achievement_rate = round(random.uniform(0.7, 1.3), 2)
-        performance_records.append({
-            'department': dept,
-            'target_achievement_rate': achievement_rate,
-            'evaluation_period': '2024-01'
-        })
-    return pd.DataFrame(performance_records)
-
-def main():
+        'target_achievement_rate': np.round(rng.uniform(0.7, 1.3, size=len(grid)), 2),
+        'evaluation_period': grid.get_level_values('evaluation_period'),
+    })
+
+class ChunkedWriter:
+    """Append DataFrame chunks to a CSV, Parquet or Excel file without holding the whole table."""
+
+    def __init__(self, path, fmt):
+        self.path = path
+        self.fmt = fmt
+        self.rows = 0
+        self._parquet_writer = None
+        self._excel_chunks = []
+
+    def write(self, df):
+        if self.fmt == 'csv':
+            df.to_csv(self.path, index=False, encoding='utf-8-sig' if self.rows == 0 else 'utf-8',
+                      mode='w' if self.rows == 0 else 'a', header=self.rows == 0)
+        elif self.fmt == 'parquet':
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._parquet_writer is None:
+                # check_out may be all-missing in a chunk: pin text columns to string
+                schema = pa.schema([
+                    field.with_type(pa.string()) if pa.types.is_null(field.type) else field
+                    for field in table.schema
+                ])
+                self._parquet_writer = pq.ParquetWriter(self.path, schema)
+            self._parquet_writer.write_table(table.cast(self._parquet_writer.schema))
+        elif self.fmt == 'xlsx':
+            if self.rows + len(df) > EXCEL_MAX_ROWS:
+                raise ValueError(f"{self.path}: too many rows for an Excel sheet, use csv or parquet")
+            self._excel_chunks.append(df)
+        self.rows += len(df)
+
+    def close(self):
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+        if self.fmt == 'xlsx':
+            frames = self._excel_chunks or [pd.DataFrame()]
+            pd.concat(frames, ignore_index=True).to_excel(self.path, index=False)
+        elif self.rows == 0 and self.fmt == 'csv':
+            open(self.path, 'w').close()
+
+def write_table(chunks, output_dir, name, formats):
+    writers = [ChunkedWriter(os.path.join(output_dir, f"{name}.{fmt}"), fmt) for fmt in formats]
+    try:
+        for chunk in chunks:
+            for writer in writers:
+                writer.write(chunk)
+    finally:
+        for writer in writers:
+            writer.close()
+    return writers[0].rows if writers else 0
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic LogicHR data (vectorized, chunked output)")
+    parser.add_argument('--employees', type=int, default=NUM_EMPLOYEES, help="number of employees")
+    parser.add_argument('--start', type=date.fromisoformat, default=START_DATE, help="first date (YYYY-MM-DD)")
+    parser.add_argument('--end', type=date.fromisoformat, default=END_DATE, help="last date (YYYY-MM-DD)")
+    parser.add_argument('--absence-rate', type=float, default=ABSENCE_RATE)
+    parser.add_argument('--missing-punch-rate', type=float, default=MISSING_PUNCH_RATE)
+    parser.add_argument('--seed', type=int, default=SEED)
+    parser.add_argument('--format', default='csv,xlsx',
+                        help="comma-separated output formats: csv, parquet, xlsx (xlsx only for small data)")
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS, help="attendance rows per written chunk")
+    parser.add_argument('--output-dir', default='data')
+    args = parser.parse_args(argv)
+
+    args.formats = [fmt.strip().lower() for fmt in args.format.split(',') if fmt.strip()]
+    unknown = set(args.formats) - {'csv', 'parquet', 'xlsx'}
+    if unknown:
+        parser.error(f"unknown format(s): {sorted(unknown)}")
+    if args.end < args.start:
+        parser.error("--end must not be before --start")
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+
     # Create data directory
-    if not os.path.exists('data'):
-        os.makedirs('data')
-        
-    print("Generating employees...")
-    df_employees = generate_employees(NUM_EMPLOYEES)
-    df_employees.to_csv('data/employees.csv', index=False, encoding='utf-8-sig')
-    df_employees.to_excel('data/employees.xlsx', index=False)
-    
-    print("Generating attendance...")
-    df_attendance = generate_attendance(df_employees, START_DATE, END_DATE)
-    df_attendance.to_csv('data/attendance.csv', index=False, encoding='utf-8-sig')
-    df_attendance.to_excel('data/attendance.xlsx', index=False)
-    
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    print(f"Generating {args.employees:,} employees...")
+    df_employees = generate_employees(args.employees, seed=args.seed)
+    write_table([df_employees], args.output_dir, 'employees', args.formats)
+
+    print(f"Generating attendance {args.start} ~ {args.end}...")
+    chunks = generate_attendance_chunks(
+        df_employees, args.start, args.end,
+        absence_rate=args.absence_rate, missing_punch_rate=args.missing_punch_rate,
+        seed=args.seed, chunk_rows=args.chunk_rows,
+    )
+    rows = write_table(chunks, args.output_dir, 'attendance', args.formats)
+    print(f"  {rows:,} attendance rows")
+
     print("Generating performance...")
-    df_performance = generate_performance(DEPARTMENTS)
-    df_performance.to_csv('data/performance.csv', index=False, encoding='utf-8-sig')
-    df_performance.to_excel('data/performance.xlsx', index=False)
-    
-    print("Data generation complete! Check the 'data' folder for CSV and Excel files.")
+    df_performance = generate_performance(DEPARTMENTS, args.start, args.end, seed=args.seed)
+    write_table([df_performance], args.output_dir, 'performance', args.formats)
+
+    print(f"Data generation complete! Check the '{args.output_dir}' folder for {', '.join(args.formats)} files.")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,116 @@
+import argparse
+import json
+import os
+import sys
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+# Allow running as `python scripts/memory_report.py` from the project root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from dtypes import normalize_dtypes
+from logic_engine import HRLogicEngine
+from data_generator import DEPARTMENTS, generate_attendance, generate_employees, generate_performance
+
+FACT_ARRAYS = ['f_emp', 'f_dept', 'f_date', 'f_day', 'f_start', 'f_end', 'f_minutes', 'f_weekday', 'f_cost']
+
+
+def frame_bytes(df, shared_categories=False):
+    """
+    Deep memory of `df`. shared_categories=True counts only the codes of its categoricals: every
+    result of one engine points at the same pinned categories, which are reported once per engine.
+    """
+    total = int(df.memory_usage(deep=True, index=False).sum())
+    if shared_categories:
+        total -= sum(int(df[column].cat.categories.memory_usage(deep=True)) for column in df
+                     if isinstance(df[column].dtype, pd.CategoricalDtype))
+    return total
+
+
+def categories_bytes(dtypes):
+    """Memory of the pinned categories behind every result of an engine (result_dtypes())."""
+    return sum(int(dtype.categories.memory_usage(deep=True)) for dtype in dtypes.values()
+               if isinstance(dtype, pd.CategoricalDtype))
+
+
+def widened(df, strings):
+    """`df` without the compact dtypes: labels as `strings` (object or str), 64-bit numbers."""
+    dtypes = {}
+    for column, dtype in df.dtypes.items():
+        if isinstance(dtype, pd.CategoricalDtype) or pd.api.types.is_string_dtype(dtype):
+            dtypes[column] = strings
+        elif pd.api.types.is_integer_dtype(dtype):
+            dtypes[column] = 'int64'
+        elif pd.api.types.is_float_dtype(dtype):
+            dtypes[column] = 'float64'
+    return df.astype(dtypes)
+
+
+def fact_array_bytes(backend):
+    """(before, after) bytes of the numpy backend's fact arrays; before = int64 codes and a date string per row."""
+    after = sum(getattr(backend, name).nbytes for name in FACT_ARRAYS)
+    after += sum(sys.getsizeof(label) for label in backend.date_labels) + backend.date_labels.nbytes
+    rows = len(backend.f_emp)
+    labels = backend.date_labels[backend.f_date[backend.f_date >= 0]]
+    before = after - backend.f_emp.nbytes - backend.f_dept.nbytes - backend.f_weekday.nbytes - backend.f_date.nbytes
+    before -= sum(sys.getsizeof(label) for label in backend.date_labels) + backend.date_labels.nbytes
+    before += 3 * 8 * rows + 8 * rows + sum(sys.getsizeof(str(label)) for label in labels)
+    return before, after
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory footprint of the loaded / returned DataFrames before and after compact dtypes")
+    parser.add_argument('--employees', type=int, default=2000)
+    parser.add_argument('--start', type=date.fromisoformat, default=date(2024, 1, 1))
+    parser.add_argument('--end', type=date.fromisoformat, default=date(2024, 6, 30))
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="also write the report as JSON")
+    args = parser.parse_args()
+
+    df_emp = generate_employees(args.employees, seed=args.seed)
+    df_att = generate_attendance(df_emp, args.start, args.end, seed=args.seed)
+    df_perf = generate_performance(DEPARTMENTS, args.start, args.end, seed=args.seed)
+    print(f"{len(df_att):,} attendance rows, {args.employees:,} employees")
+
+    # object = Python string objects (pandas < 3, and what read_sql_query used to return),
+    # default = pandas' Arrow-backed strings and 64-bit numbers, compact = normalize_dtypes()
+    report = []
+    for name, df in [('employees (input)', df_emp), ('attendance (input)', df_att), ('performance (input)', df_perf)]:
+        report.append((name, frame_bytes(widened(df, object)), frame_bytes(widened(df, 'str')),
+                       frame_bytes(normalize_dtypes(df))))
+
+    for backend in ('sqlite', 'numpy'):
+        engine = HRLogicEngine(backend=backend, memo_size=0)
+        engine.load_data(df_emp, df_att, df_perf)
+        results = {
+            'run_cost_calculation': engine.run_cost_calculation(),
+            'run_leakage_detection (days)': engine.run_leakage_detection()['flagged_days'],
+            'run_department_analysis': engine.run_department_analysis(),
+        }
+        for name, df in results.items():
+            report.append((f"{name} ({backend})", frame_bytes(widened(df, object)), frame_bytes(widened(df, 'str')),
+                           frame_bytes(df, shared_categories=True)))
+        report.append((f"result categories, shared ({backend})", np.nan, np.nan, categories_bytes(engine._result_dtypes())))
+        if backend == 'numpy':
+            before, after = fact_array_bytes(engine._vector)
+            report.append(('fact arrays (numpy)', before, np.nan, after))
+        engine.close()
+
+    print(f"{'frame':<42} {'object MB':>10} {'default MB':>11} {'compact MB':>11} {'saved':>7}")
+    for name, legacy, default, compact in report:
+        saved = '' if np.isnan(legacy) else f"{1 - compact / legacy:>6.0%}"
+        print(f"{name:<42} {legacy / 2 ** 20:>10.2f} {default / 2 ** 20:>11.2f} {compact / 2 ** 20:>11.2f} {saved:>7}")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump([
+                {'frame': name, 'object_bytes': None if np.isnan(legacy) else legacy,
+                 'default_bytes': None if np.isnan(default) else default,
+                 'compact_bytes': compact}
+                for name, legacy, default, compact in report
+            ], f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
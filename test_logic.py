@@ -26,4 +26,605 @@ print("\n--- [Test 3] Top 5 Hardest Workers ---")
 df_rank = engine.get_employee_ranking()
 print(df_rank.head())
 
+# 4. Test Overnight Shift Handling
+print("\n--- [Test 4] Overnight Shift (22:00 -> 06:00) ---")
+night_engine = HRLogicEngine()
+night_engine.load_data(
+    df_emp.head(1),
+    pd.DataFrame({'emp_id': [df_emp['emp_id'].iloc[0]], 'date': ['2024-01-02'],
+                  'check_in': ['22:00:00'], 'check_out': ['06:00:00']}),
+    df_perf,
+)
+df_night = night_engine.run_cost_calculation()
+print(df_night[['date', 'check_in', 'check_out', 'hours_worked']])
+assert abs(df_night['hours_worked'].iloc[0] - 8.0) < 1e-9
+
+# 5. Test Streaming (Chunked) Attendance Ingest
+print("\n--- [Test 5] Chunked Ingest (CSV / XLSX) ---")
+for path in ['data/attendance.csv', 'data/attendance.xlsx']:
+    stream_engine = HRLogicEngine()
+    stream_engine.load_reference_data(df_emp, df_perf)
+    rows = stream_engine.ingest_attendance(path, chunksize=250)
+    print(f"{path}: {rows:,} rows")
+    assert rows == len(df_att)
+    pd.testing.assert_frame_equal(stream_engine.run_department_analysis(), df_dept)
+
+# 6. Test Parquet Ingest Cache (second load is served from the cache)
+print("\n--- [Test 6] Parquet Ingest Cache ---")
+import tempfile
+from ingest_cache import IngestCache
+
+with tempfile.TemporaryDirectory() as cache_dir:
+    cache = IngestCache(cache_dir)
+    with open('data/attendance.xlsx', 'rb') as f:
+        raw = f.read()
+    for _ in range(2):
+        parquet_engine = HRLogicEngine()
+        parquet_engine.load_reference_data(df_emp, df_perf)
+        parquet_engine.ingest_attendance(cache.parquet_path('attendance.xlsx', raw))
+        pd.testing.assert_frame_equal(parquet_engine.run_department_analysis(), df_dept)
+    print(f"hits={cache.hits}, misses={cache.misses}")
+    assert (cache.hits, cache.misses) == (1, 1)
+    # Later chunks may widen a column the first chunk typed narrowly: empty -> text, integer -> float
+    widened = df_att.assign(note=[None] * (len(df_att) - 1) + ['late'],
+                            shift=pd.Series([1] * (len(df_att) - 1) + [0.5], dtype=object))
+    widened_csv = widened.to_csv(index=False).encode()
+    parquet_engine.load_reference_data(df_emp, df_perf)
+    assert parquet_engine.ingest_attendance(cache.iter_chunks('widened.csv', widened_csv, chunksize=150)) == len(df_att)
+    pd.testing.assert_frame_equal(parquet_engine.run_department_analysis(), df_dept)
+    assert cache.load('widened.csv', widened_csv)['note'].iloc[-1] == 'late'
+
+# 7. Test Backend Parity (SQLite vs. vectorized NumPy/pandas)
+print("\n--- [Test 7] Backend Parity: sqlite vs numpy ---")
+numpy_engine = HRLogicEngine(backend='numpy')
+numpy_engine.load_data(df_emp, df_att, df_perf)
+for method in ['run_cost_calculation', 'run_department_analysis',
+               'get_employee_ranking', 'run_work_pattern_analysis']:
+    expected = getattr(engine, method)()
+    actual = getattr(numpy_engine, method)()
+    pd.testing.assert_frame_equal(actual, expected, check_dtype=False, rtol=1e-9)
+    print(f"{method}: {len(actual)} rows identical")
+
+# 8. Test Parallel Partitioned Aggregation (emp_id-hash shards in a process pool)
+print("\n--- [Test 8] Parallel Aggregation (workers=3) ---")
+parallel_engines = []
+for backend in ['sqlite', 'numpy']:
+    parallel_engine = HRLogicEngine(backend=backend, workers=3)
+    parallel_engines.append(parallel_engine)
+    parallel_engine.load_data(df_emp, df_att, df_perf)
+    for method in ['run_department_analysis', 'run_work_pattern_analysis']:
+        # Shard sums are added in a different order, so truncated totals may differ by 1
+        pd.testing.assert_frame_equal(
+            getattr(parallel_engine, method)(), getattr(engine, method)(),
+            check_dtype=False, check_exact=False, rtol=1e-6,
+        )
+    # One sharded pass per load: later queries (and run_all) reuse the merged totals
+    parallel_engine.run_all()
+    passes = [r for r in parallel_engine.stats.records if 'parallel_aggregate' in r.steps]
+    assert len(passes) == 1, passes
+    print(f"{backend}: parallel results match")
+
+# 9. Test Single-Scan Bundle (run_all == individual methods)
+print("\n--- [Test 9] run_all() Single-Scan Bundle ---")
+for bundle_engine in [engine, numpy_engine, parallel_engine]:
+    bundle = bundle_engine.run_all()
+    for method, result in bundle.items():
+        pd.testing.assert_frame_equal(
+            result, getattr(engine, method)(), check_dtype=False, check_exact=False, rtol=1e-6
+        )
+    print(f"{bundle_engine.backend} (workers={bundle_engine.workers}): {list(bundle)}")
+for parallel_engine in parallel_engines:
+    parallel_engine.close()  # shuts the worker pool down and frees the shared fact block
+
+# 10. Test Engine Profiling (per-operation records with load steps, rows and VM steps)
+print("\n--- [Test 10] Engine Profiling ---")
+profiled_engine = HRLogicEngine()
+profiled_engine.load_data(df_emp, df_att, df_perf)
+profiled_engine.run_department_analysis()
+load_record = profiled_engine.stats.last('load_data')
+print({step: f"{seconds * 1000:.1f} ms" for step, seconds in load_record.steps.items()})
+assert {'employees', 'attendance', 'performance', 'attendance_facts'} <= set(load_record.steps)
+assert load_record.vm_steps > 0
+query_record = profiled_engine.stats.last('run_department_analysis')
+assert query_record.rows == len(df_dept) and query_record.sql
+print(profiled_engine.stats.summary())
+
+# 11. Test Incremental Append (maintained rollups == full reload)
+print("\n--- [Test 11] Incremental Append ---")
+dates = sorted(df_att['date'].unique())
+for backend in ['sqlite', 'numpy']:
+    append_engine = HRLogicEngine(backend=backend)
+    append_engine.load_data(df_emp, df_att[df_att['date'] < dates[-2]], df_perf)
+    for day in dates[-2:]:
+        batch = df_att[df_att['date'] == day]
+        # Repeated rows in the batch are skipped, and so is re-sending a day
+        assert append_engine.append_attendance(pd.concat([batch, batch.head(5)])) == len(batch)
+        assert append_engine.append_attendance(batch) == 0
+    for method in ['run_department_analysis', 'get_employee_ranking', 'run_work_pattern_analysis']:
+        pd.testing.assert_frame_equal(
+            getattr(append_engine, method)(), getattr(engine, method)(),
+            check_dtype=False, check_exact=False, rtol=1e-6,
+        )
+    assert len(append_engine.run_cost_calculation()) == len(engine.run_cost_calculation())
+    print(f"{backend}: appended {len(dates[-2:])} days, results match a full load")
+
+# 12. Test File-Backed Engine (warm start from an existing database file)
+print("\n--- [Test 12] File-Backed Engine Warm Start ---")
+import os
+import sqlite3
+import time
+
+with tempfile.TemporaryDirectory() as db_dir:
+    db_path = os.path.join(db_dir, 'logichr.sqlite')
+    file_engine = HRLogicEngine(db_path=db_path)
+    file_engine.load_data(df_emp, df_att, df_perf)
+    file_engine.set_source_fingerprint('demo-v1')
+    file_engine.close()
+
+    start = time.perf_counter()
+    warm_engine = HRLogicEngine(db_path=db_path)
+    assert warm_engine.source_fingerprint == 'demo-v1'
+    pd.testing.assert_frame_equal(warm_engine.run_department_analysis(), df_dept)
+    print(f"warm start + department analysis: {(time.perf_counter() - start) * 1000:.1f} ms")
+    assert warm_engine.attendance_row_count() == len(df_att)
+    # Any reload clears the fingerprint until the caller records the new one
+    warm_engine.append_attendance(df_att.head(1))
+    assert warm_engine.source_fingerprint is None
+    warm_engine.close()
+
+    # A database written with another schema version is emptied on open
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("PRAGMA user_version = 999")
+    conn.close()
+    stale_engine = HRLogicEngine(db_path=db_path)
+    assert stale_engine.source_fingerprint is None
+    assert not stale_engine.cursor.execute(
+        "SELECT name FROM sqlite_master WHERE name = 'attendance_facts'"
+    ).fetchall()
+    stale_engine.close()
+    print("schema version mismatch -> empty database")
+
+# 13. Test Concurrent Sessions (per-thread readers + serialized writer)
+print("\n--- [Test 13] Concurrent Queries During Ingest ---")
+import threading
+
+with tempfile.TemporaryDirectory() as db_dir:
+    for db_path in [None, os.path.join(db_dir, 'concurrent.sqlite')]:
+        shared_engine = HRLogicEngine(db_path=db_path)
+        shared_engine.load_data(df_emp, df_att[df_att['date'] < dates[-3]], df_perf)
+        errors, results = [], []
+
+        def session():
+            try:
+                for _ in range(20):
+                    results.append(shared_engine.run_department_analysis())
+            except Exception as exc:
+                errors.append(exc)
+
+        sessions = [threading.Thread(target=session) for _ in range(8)]
+        for thread in sessions:
+            thread.start()
+        for day in dates[-3:]:
+            shared_engine.append_attendance(df_att[df_att['date'] == day])
+        for thread in sessions:
+            thread.join()
+        assert not errors, errors
+        assert all(len(result) == len(df_dept) for result in results)
+        pd.testing.assert_frame_equal(
+            shared_engine.run_department_analysis(), df_dept, check_exact=False, rtol=1e-6
+        )
+        # The finished session threads' read connections were released (when this thread opened
+        # its own; the query above may have been answered from the result memo)
+        shared_engine.date_span()
+        assert shared_engine._pool.reader_count == 1
+        print(f"{'file' if db_path else 'memory'}: {len(results)} queries from 8 threads during 3 appends")
+        shared_engine.close()
+
+# 14. Test Date-Range Analyses (daily rollups == loading only that range)
+print("\n--- [Test 14] Date-Range Analyses ---")
+for start, end in [('2024-01-08', '2024-01-14'), ('2024-01-15', None), (None, '2024-01-03')]:
+    in_range = df_att[(df_att['date'] >= (start or '0000')) & (df_att['date'] <= (end or '9999'))]
+    range_engine = HRLogicEngine()
+    range_engine.load_data(df_emp, in_range, df_perf)
+    for ranged_engine in [engine, numpy_engine]:
+        bundle = ranged_engine.run_all(start, end)
+        bundle['run_cost_calculation'] = ranged_engine.run_cost_calculation(start, end)
+        for method, result in bundle.items():
+            pd.testing.assert_frame_equal(
+                result, getattr(range_engine, method)(), check_dtype=False, check_exact=False, rtol=1e-6
+            )
+    print(f"{start} ~ {end}: {len(in_range)} records, sqlite and numpy match a load of the range")
+assert engine.date_span() == numpy_engine.date_span() == (df_att['date'].min(), df_att['date'].max())
+
+# 15. Test Multi-Period Performance (no join fan-out, per-period efficiency trend)
+print("\n--- [Test 15] Multi-Period Performance ---")
+import numpy as np
+from logic_engine import BACKENDS
+from vector_backend import period_spans
+# February = the first 28 days of January moved one month; each month has its own rates
+feb_att = df_att[df_att['date'] <= '2024-01-28'].assign(date=lambda d: d['date'].str.replace('2024-01', '2024-02'))
+two_months = pd.concat([df_att, feb_att], ignore_index=True)
+feb_perf = df_perf.assign(evaluation_period='2024-02', target_achievement_rate=df_perf['target_achievement_rate'] + 0.1)
+multi_perf = pd.concat([df_perf, feb_perf], ignore_index=True)
+multi_engines = [HRLogicEngine(backend=backend) for backend in BACKENDS]
+for multi_engine in multi_engines:
+    multi_engine.load_data(df_emp, two_months, multi_perf)
+    dept = multi_engine.run_department_analysis()
+    assert len(dept) == len(df_perf), "one row per department, not one per (department, period)"
+    mean_rate = multi_perf.groupby('department')['target_achievement_rate'].mean()
+    assert np.allclose(dept['target_achievement_rate'], dept['department'].map(mean_rate))
+
+    trend = multi_engine.run_efficiency_trend()
+    assert list(trend['evaluation_period'].unique()) == ['2024-01', '2024-02']
+    for month, month_att, month_perf in [('2024-01', df_att, df_perf), ('2024-02', feb_att, feb_perf)]:
+        # Each period's trend rows == a load of that month alone, and == a range query on the month
+        month_engine = HRLogicEngine()
+        month_engine.load_data(df_emp, month_att, month_perf)
+        expected = month_engine.run_department_analysis().sort_values('department').reset_index(drop=True)
+        got = trend[trend['evaluation_period'] == month].reset_index(drop=True)
+        cols = ['department', 'total_hours', 'total_labor_cost', 'target_achievement_rate', 'efficiency_index']
+        pd.testing.assert_frame_equal(got[cols], expected[cols], check_dtype=False, check_exact=False, rtol=1e-6)
+        ranged = multi_engine.run_department_analysis(f'{month}-01', f'{month}-28')
+        pd.testing.assert_frame_equal(
+            ranged, month_engine.run_department_analysis(f'{month}-01', f'{month}-28'),
+            check_dtype=False, check_exact=False, rtol=1e-6,
+        )
+    print(f"{multi_engine.backend}: {len(dept)} departments, {len(trend)} (period, department) trend rows")
+pd.testing.assert_frame_equal(
+    multi_engines[0].run_efficiency_trend('2024-01-20', '2024-02-10'),
+    multi_engines[1].run_efficiency_trend('2024-01-20', '2024-02-10'),
+    check_dtype=False, check_exact=False, rtol=1e-6,
+)
+# Quarters and years are bucketed too; unrecognized periods apply to every range
+first, last = period_spans(['2024-Q1', '2024', '2024-13', 'H1'])
+assert (first[:2] == np.datetime64('2024-01-01').astype('int64')).all() and np.isnan(first[2:]).all()
+assert (last[:2] == np.datetime64('2024-03-31').astype('int64') + [0, 275]).all()
+quarter_engine = HRLogicEngine()
+quarter_engine.load_data(df_emp, two_months, multi_perf.assign(evaluation_period='2024-Q1'))
+assert quarter_engine.run_efficiency_trend()['evaluation_period'].unique().tolist() == ['2024-Q1']
+
+# 16. Test Paginated Cost Calculation + Streaming Export
+print("\n--- [Test 16] Paginated Cost Export ---")
+import io
+# Repeated (emp_id, date) rows: the rowid part of the keyset must not skip or repeat them
+doubled = pd.concat([df_att, df_att.head(30)], ignore_index=True)
+for backend in BACKENDS:
+    export_engine = HRLogicEngine(backend=backend)
+    export_engine.load_data(df_emp, doubled, df_perf)
+    full = export_engine.run_cost_calculation('2024-01-02', '2024-01-20')
+    expected = full.sort_values(['emp_id', 'date'], kind='stable').reset_index(drop=True)
+    for chunksize in [1, 64, 100_000]:
+        pages = list(export_engine.iter_cost_calculation('2024-01-02', '2024-01-20', chunksize=chunksize))
+        assert all(len(page) <= chunksize for page in pages)
+        pd.testing.assert_frame_equal(pd.concat(pages, ignore_index=True), expected, check_dtype=False)
+    for file_type, read in [('csv', pd.read_csv), ('parquet', pd.read_parquet)]:
+        buffer = io.BytesIO()
+        rows = export_engine.export_cost_calculation(buffer, file_type, '2024-01-02', '2024-01-20', chunksize=100)
+        exported = read(io.BytesIO(buffer.getvalue()))
+        assert rows == len(exported) == len(full)
+        assert list(exported.columns) == list(full.columns)
+    print(f"{backend}: {len(full)} rows in pages of 1 / 64 / 100,000, csv and parquet exports match")
+
+# 17. Test What-If Scenarios (batch evaluation == recomputing from the cost detail)
+print("\n--- [Test 17] What-If Scenarios ---")
+scenario_batch = {
+    'baseline': {},
+    'senior_raise': {'rate_multipliers': {'Senior': 1.1}},
+    'eng_friday_cap': {'hour_caps': {'Engineering': {'Friday': 8.5}}},
+    'cap_all_9h': {'hour_caps': {dept: 9 for dept in df_dept['department']}},
+    'hr_minus_2': {'headcount': {'HR': -2}},
+}
+matrices = []
+for backend in BACKENDS:
+    scenario_engine = HRLogicEngine(backend=backend)
+    scenario_engine.load_data(df_emp, df_att, df_perf)
+    matrix = scenario_engine.run_scenarios(scenario_batch)
+    assert matrix.shape == (len(scenario_batch), 3 * len(df_dept))
+    base = scenario_engine.run_department_analysis().set_index('department')
+    for metric in ['total_hours', 'total_labor_cost', 'efficiency_index']:
+        assert np.allclose(matrix.loc['baseline', metric], base.loc[matrix[metric].columns, metric])
+
+    detail = scenario_engine.run_cost_calculation()
+    weekday = pd.to_datetime(detail['date']).dt.day_name()
+    capped_hours = detail['hours_worked'].where(
+        ~((detail['department'] == 'Engineering') & (weekday == 'Friday')), detail['hours_worked'].clip(upper=8.5)
+    )
+    expected = {
+        'senior_raise': detail['daily_cost'] * np.where(detail['level'] == 'Senior', 1.1, 1.0),
+        'eng_friday_cap': capped_hours * detail['hourly_rate'],
+        'cap_all_9h': detail['hours_worked'].clip(upper=9) * detail['hourly_rate'],
+    }
+    for name, cost in expected.items():
+        by_dept = cost.groupby(detail['department']).sum()
+        assert np.allclose(matrix.loc[name, 'total_labor_cost'], by_dept[matrix['total_labor_cost'].columns], atol=1)
+    hr_scale = (base.loc['HR', 'active_headcount'] - 2) / base.loc['HR', 'active_headcount']
+    assert abs(matrix.loc['hr_minus_2', ('total_labor_cost', 'HR')] - base.loc['HR', 'total_labor_cost'] * hr_scale) <= 1
+    matrices.append(matrix)
+    print(f"{backend}: {matrix.shape[0]} scenarios x {len(df_dept)} departments")
+pd.testing.assert_frame_equal(matrices[0], matrices[1], check_exact=False, rtol=1e-6)
+# A range gets its own model; unknown names are rejected
+two_weeks = engine.run_department_analysis('2024-01-01', '2024-01-14').set_index('department')['total_labor_cost']
+two_weeks_model = engine.run_scenarios({'jan_2w': {}}, '2024-01-01', '2024-01-14').loc['jan_2w', 'total_labor_cost']
+assert np.allclose(two_weeks_model, two_weeks[two_weeks_model.index], atol=1)
+for bad in [{'rate_multipliers': {'CEO': 2}}, {'hour_caps': {'Nowhere': 8}}, {'hour_caps': {'HR': {'Funday': 8}}}, {'bonus': 1}]:
+    try:
+        engine.run_scenarios({'bad': bad})
+        raise AssertionError(f"accepted {bad}")
+    except ValueError:
+        pass
+
+# 18. Test Leakage Detector (rolling per-employee baselines, missing check-outs)
+print("\n--- [Test 18] Leakage Detector ---")
+# One employee works until 23:30 on their last day, another forgets to check out four times
+spiker, forgetter = df_emp['emp_id'].iloc[0], df_emp['emp_id'].iloc[1]
+leaky_att = df_att.copy()
+leaky_att.loc[leaky_att.index[leaky_att['emp_id'] == spiker][-1], 'check_out'] = '23:30:00'
+forgot = leaky_att.index[leaky_att['emp_id'] == forgetter][:4]
+leaky_att.loc[forgot, 'check_out'] = None
+leak_results = []
+for backend in BACKENDS:
+    leak_engine = HRLogicEngine(backend=backend)
+    leak_engine.load_data(df_emp, leaky_att, df_perf)
+    leaks = leak_engine.run_leakage_detection()
+    assert leaks['employees']['emp_id'].iloc[0] == spiker
+    assert leaks['flagged_days'].iloc[0][['spike', 'long_day']].all()
+    assert leaks['employees'].set_index('emp_id').loc[forgetter, 'missing_checkouts'] >= 4
+    assert leaks['departments']['department'].iloc[0] == df_emp['department'].iloc[0]
+    # Baselines reach back before the range start, so a range just filters the flagged days
+    ranged = leak_engine.run_leakage_detection('2024-01-20', '2024-01-31')['flagged_days']
+    in_range = leaks['flagged_days'][leaks['flagged_days']['date'] >= '2024-01-20'].reset_index(drop=True)
+    pd.testing.assert_frame_equal(ranged, in_range)
+    leak_results.append(leaks)
+    print(f"{backend}: {len(leaks['flagged_days'])} flagged days, {len(leaks['employees'])} employees")
+for key in leak_results[0]:
+    pd.testing.assert_frame_equal(leak_results[0][key], leak_results[1][key], check_dtype=False, check_exact=False)
+
+# z-scores == a brute-force pandas rolling window over the previous 28 calendar days
+loose = leak_engine.run_leakage_detection(z_threshold=1.5)['flagged_days']
+daily = leak_engine.run_cost_calculation().groupby(['emp_id', 'date'])['hours_worked'].sum().reset_index()
+daily['date'] = pd.to_datetime(daily['date'])
+rolled = daily.set_index('date').groupby('emp_id')['hours_worked'].rolling('28D', closed='left')
+brute = pd.DataFrame({'mean': rolled.mean(), 'std': rolled.std(ddof=0), 'n': rolled.count()}).reset_index()
+brute = brute.merge(daily, on=['emp_id', 'date'])
+brute['z'] = (brute['hours_worked'] - brute['mean']) / np.maximum(brute['std'], 0.5)
+brute = brute[(brute['n'] >= 5) & (brute['z'] >= 1.5)]
+spikes = loose[loose['spike']].assign(date=lambda d: pd.to_datetime(d['date']))
+checked = spikes.merge(brute, on=['emp_id', 'date'], how='outer', indicator=True)
+assert (checked['_merge'] == 'both').all() and np.allclose(checked['z_score'], checked['z'])
+print(f"{len(spikes)} spikes at z >= 1.5 match a pandas rolling('28D') baseline")
+
+# 19. Test Headless Batch Reports (one worker process per period)
+print("\n--- [Test 19] Batch Report CLI ---")
+import json
+import subprocess
+import sys
+from batch_report import discover_periods, main as batch_main, run_batch
+# The CLI module itself must not pull in pandas / NumPy (fast cron start-up)
+probe = "import sys, batch_report; assert not {'pandas', 'numpy', 'logic_engine'} & set(sys.modules)"
+subprocess.run([sys.executable, '-c', probe], check=True)
+halves = {'2024-01a': df_att[df_att['date'] <= '2024-01-15'], '2024-01b': df_att[df_att['date'] > '2024-01-15']}
+with tempfile.TemporaryDirectory() as export_dir:
+    # One period as a sub-directory, one as suffixed Parquet files, one incomplete
+    os.makedirs(os.path.join(export_dir, '2024-01a'))
+    for name, first, second in [('employees', df_emp, df_emp), ('attendance', *halves.values()),
+                                ('performance', df_perf, df_perf)]:
+        first.to_csv(os.path.join(export_dir, '2024-01a', f'{name}.csv'), index=False)
+        second.to_parquet(os.path.join(export_dir, f'{name}_2024-01b.parquet'), index=False)
+    df_emp.to_csv(os.path.join(export_dir, 'employees_2024-02.csv'), index=False)
+    periods = discover_periods(export_dir)
+    assert list(periods) == ['2024-01a', '2024-01b', '2024-02']
+    report_dir = os.path.join(export_dir, 'reports')
+    results, errors = run_batch(periods, report_dir, 'parquet', ['departments', 'leakage', 'cost'], workers=2)
+    assert [r['period'] for r in results] == ['2024-01a', '2024-01b'] and list(errors) == ['2024-02']
+    for period, df in halves.items():
+        half_engine = HRLogicEngine()
+        half_engine.load_data(df_emp, df, df_perf)
+        written = pd.read_parquet(os.path.join(report_dir, period, 'departments.parquet'))
+        pd.testing.assert_frame_equal(written, half_engine.run_department_analysis(), check_dtype=False)
+        assert len(pd.read_parquet(os.path.join(report_dir, period, 'cost.parquet'))) == len(half_engine.run_cost_calculation())
+        assert os.path.exists(os.path.join(report_dir, period, 'leakage_employees.parquet'))
+    # Command line: JSON output plus a manifest; the incomplete period makes the exit status 1
+    assert batch_main([export_dir, '--output-dir', report_dir, '--format', 'json', '--workers', '1']) == 1
+    with open(os.path.join(report_dir, 'manifest.json'), encoding='utf-8') as handle:
+        manifest = json.load(handle)
+    assert [p['period'] for p in manifest['periods']] == ['2024-01a', '2024-01b'] and '2024-02' in manifest['errors']
+    # half_engine holds the last period
+    ranking = pd.read_json(os.path.join(report_dir, '2024-01b', 'ranking.json'))
+    assert ranking['name'].tolist() == half_engine.get_employee_ranking()['name'].tolist()
+
+# 20. Test Result Memo (keyed by method + arguments, dropped by every load)
+print("\n--- [Test 20] Result Memo ---")
+memo_engine = HRLogicEngine()
+memo_engine.load_data(df_emp, df_att[df_att['date'] < dates[-1]], df_perf)
+first = memo_engine.run_department_analysis()
+first['total_hours'] = -1  # callers get copies: this must not leak into the memo
+again = memo_engine.run_department_analysis(None, end=None)
+assert memo_engine.memo_stats == {'hits': 1, 'misses': 1} and (again['total_hours'] > 0).all()
+assert len(memo_engine.stats.to_frame().query("operation == 'run_department_analysis'")) == 1
+memo_engine.run_department_analysis('2024-01-01', '2024-01-14')
+assert memo_engine.memo_stats['misses'] == 2
+generation = memo_engine.generation
+memo_engine.append_attendance(df_att[df_att['date'] == dates[-1]])
+assert memo_engine.generation > generation
+pd.testing.assert_frame_equal(memo_engine.run_department_analysis(), engine.run_department_analysis())
+assert memo_engine.memo_stats['misses'] == 3
+leaks_once, leaks_twice = memo_engine.run_leakage_detection(), memo_engine.run_leakage_detection()
+assert leaks_once is not leaks_twice and leaks_once['employees'].equals(leaks_twice['employees'])
+unmemoized = HRLogicEngine(memo_size=0)
+unmemoized.load_data(df_emp, df_att, df_perf)
+unmemoized.get_employee_ranking()
+unmemoized.get_employee_ranking()
+assert unmemoized.memo_stats == {'hits': 0, 'misses': 0}
+print(memo_engine.memo_stats)
+
+# 21. Test Compact Dtypes (categorical labels, int32 ids, lossless float32 rates)
+print("\n--- [Test 21] Compact Dtypes ---")
+from dtypes import normalize_dtypes
+
+def memory_usage(df):
+    return df.memory_usage(deep=True).sum()
+
+compact_emp = normalize_dtypes(df_emp)
+assert isinstance(compact_emp['department'].dtype, pd.CategoricalDtype) and compact_emp['emp_id'].dtype == 'int32'
+assert compact_emp['hourly_rate'].dtype == 'float32'
+assert normalize_dtypes(df_emp.assign(hourly_rate=df_emp['hourly_rate'] + 0.1))['hourly_rate'].dtype == 'float64'
+assert normalize_dtypes(df_emp.assign(emp_id=df_emp['emp_id'] + 2 ** 40))['emp_id'].dtype == 'int64'
+assert memory_usage(compact_emp) < memory_usage(df_emp.astype({'name': object, 'department': object, 'level': object}))
+for backend in BACKENDS:
+    compact_engine = HRLogicEngine(backend=backend)
+    # Compact inputs load the same data
+    compact_engine.load_data(compact_emp, df_att, normalize_dtypes(df_perf))
+    detail = compact_engine.run_cost_calculation()
+    assert detail['emp_id'].dtype == 'int32' and detail['hourly_rate'].dtype == 'float32'
+    # One dtype per result column whatever the row count: pages (even a short last one), a
+    # three-row ranking and the full detail share the employees' categories, so they concatenate
+    chunks = list(compact_engine.iter_cost_calculation(chunksize=300))
+    assert isinstance(pd.concat(chunks)['name'].dtype, pd.CategoricalDtype)
+    small = compact_engine.get_employee_ranking(n=3)
+    assert len(small) == 3 and len(detail) > len(detail['name'].cat.categories)
+    for result in [small, compact_engine.run_department_analysis(), *compact_engine.run_leakage_detection().values()]:
+        for column in ('name', 'department'):
+            if column in result:
+                assert result[column].dtype == detail[column].dtype, column
+    assert isinstance(pd.concat([small, detail])['name'].dtype, pd.CategoricalDtype)
+    pd.testing.assert_frame_equal(compact_engine.run_department_analysis(), df_dept)
+    # Weekdays too: a one-day pattern has the same categories as the full one
+    one_day = compact_engine.run_work_pattern_analysis('2024-01-02', '2024-01-02')
+    assert one_day['day_of_week'].nunique() == 1
+    assert one_day['day_of_week'].dtype == compact_engine.run_work_pattern_analysis()['day_of_week'].dtype
+    print(f"{backend}: cost detail {memory_usage(detail) / 1024:.0f} KiB, dtypes {sorted(set(map(str, detail.dtypes)))}")
+
+# 22. Test Parameterized Ranking (Top / bottom N, per department, metric, date range)
+print("\n--- [Test 22] Parameterized Ranking ---")
+# Reference totals straight from the cost detail: a day over 8 hours is an overtime day
+daily = df_cost.groupby(['emp_id', 'date'])['hours_worked'].sum()
+reference = pd.DataFrame({
+    'total_hours': df_cost.groupby('emp_id')['hours_worked'].sum(),
+    'overtime_days': (daily > 8).groupby('emp_id').sum(),
+}).join(df_emp.set_index('emp_id')[['name', 'department']])
+reference = reference.reset_index().sort_values(['overtime_days', 'emp_id'], ascending=[False, True])
+top_overtime = engine.get_employee_ranking(n=3, metric='overtime_days', per_department=True)
+assert top_overtime['rank'].tolist() == [1, 2, 3] * reference['department'].nunique()
+expected = reference.groupby('department', sort=True).head(3).sort_values('department', kind='stable')
+assert top_overtime['name'].astype(str).tolist() == expected['name'].tolist()
+assert top_overtime['overtime_days'].tolist() == expected['overtime_days'].tolist()
+bottom = engine.get_employee_ranking(n=5, ascending=True)
+assert bottom['total_hours'].is_monotonic_increasing
+assert abs(bottom['total_hours'].iloc[0] - reference['total_hours'].min()) < 1e-6
+one_department = engine.get_employee_ranking(n=1000, department=df_emp['department'].iloc[0], metric='cost')
+assert set(one_department['department']) == {df_emp['department'].iloc[0]}
+assert one_department['total_labor_cost'].is_monotonic_decreasing
+for options in [{}, {'metric': 'cost', 'n': 7}, {'per_department': True, 'ascending': True, 'n': 2},
+                {'start': '2024-01-08', 'end': '2024-01-21', 'metric': 'overtime_days', 'per_department': True}]:
+    pd.testing.assert_frame_equal(
+        numpy_engine.get_employee_ranking(**options), engine.get_employee_ranking(**options),
+        check_dtype=False, rtol=1e-9,
+    )
+for bad in [{'metric': 'salary'}, {'n': 0}]:
+    try:
+        engine.get_employee_ranking(**bad)
+        assert False, f"{bad} should be rejected"
+    except ValueError:
+        pass
+print(top_overtime.head(6))
+
+# 23. Test Parallel Background Ingest (three files parsed at once, attendance streamed in)
+print("\n--- [Test 23] Parallel Background Ingest ---")
+from parallel_ingest import ParallelIngest
+
+def read_bytes(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+upload = [('employees.xlsx', read_bytes('data/employees.xlsx')), ('attendance.csv', read_bytes('data/attendance.csv')),
+          ('performance.csv', read_bytes('data/performance.csv'))]
+with tempfile.TemporaryDirectory() as cache_dir:
+    cache = IngestCache(cache_dir)
+    for backend in BACKENDS:
+        # Small chunks: the engine ingests while the parser is still going
+        load = ParallelIngest(HRLogicEngine(backend=backend), upload, cache, chunksize=150).start()
+        background_engine, rows = load.result()
+        assert rows == len(df_att) and load.done
+        assert not load.sources  # the finished (cached) load does not keep the uploaded bytes
+        pd.testing.assert_frame_equal(background_engine.run_department_analysis(), df_dept)
+        progress = load.progress()
+        assert progress['stage'] == 'done'
+        assert all(state['done'] and state['fraction'] == 1.0 for state in progress['sources'].values())
+        print(f"{backend}: {rows} rows, parse seconds "
+              f"{ {source: state['seconds'] for source, state in progress['sources'].items()} }")
+    assert (cache.hits, cache.misses) == (3, 3)  # second backend read every file from the cache
+    # A failing attendance file stops the load and leaves no half-written cache file behind
+    broken = upload[:1] + [('attendance.csv', df_att.drop(columns='check_out').to_csv(index=False).encode())] + upload[2:]
+    failed = ParallelIngest(HRLogicEngine(), broken, cache, chunksize=150).start()
+    try:
+        failed.result()
+        assert False, "missing attendance columns should fail the load"
+    except ValueError as exc:
+        assert 'check_out' in str(exc)
+    assert not [name for name in os.listdir(cache_dir) if name.endswith('.tmp')]
+
+    def reject(df_employees, df_performance):
+        raise ValueError("rejected")
+
+    try:
+        ParallelIngest(HRLogicEngine(), upload, cache, validate=reject).start().result()
+        assert False, "validate should be able to reject the reference tables"
+    except ValueError as exc:
+        assert str(exc) == "rejected"
+
+# 24. Test Attendance Validation (bad rows quarantined with a reason, the rest unaffected)
+print("\n--- [Test 24] Attendance Validation & Quarantine ---")
+emp_a, emp_b = df_emp['emp_id'].iloc[0], df_emp['emp_id'].iloc[1]
+bad_rows = pd.DataFrame([
+    {'emp_id': emp_a, 'date': '2024-02-30', 'check_in': '09:00', 'check_out': '18:00'},  # bad_time (no such day)
+    {'emp_id': emp_a, 'date': '2030-01-02', 'check_in': '9시', 'check_out': '18:00'},  # bad_time
+    {'emp_id': 999999, 'date': '2030-01-03', 'check_in': '09:00', 'check_out': '18:00'},  # orphan_emp
+    {'emp_id': emp_b, 'date': '2030-01-04', 'check_in': '09:00', 'check_out': '08:00'},  # checkout_before_checkin
+    {**df_att.iloc[0].to_dict(), 'check_out': '23:00'},  # duplicate of the first row
+])
+# Overnight shift (check-out the next morning) stays valid
+overnight = pd.DataFrame([{'emp_id': emp_b, 'date': '2030-01-05', 'check_in': '22:00', 'check_out': '06:00'}])
+dirty = pd.concat([df_att, bad_rows, overnight], ignore_index=True)
+clean = pd.concat([df_att, overnight], ignore_index=True)
+expected_counts = {'bad_time': 2, 'orphan_emp': 1, 'checkout_before_checkin': 1, 'duplicate': 1}
+for backend in BACKENDS:
+    clean_engine = HRLogicEngine(backend=backend)
+    clean_engine.load_data(df_emp, clean, df_perf)
+    expected = clean_engine.run_department_analysis()
+    assert clean_engine.quarantine_counts()['rows'].sum() == 0
+
+    dirty_engine = HRLogicEngine(backend=backend)
+    dirty_engine.load_data(df_emp, dirty, df_perf)
+    assert dict(dirty_engine.quarantine_counts().values.tolist()) == expected_counts
+    assert dirty_engine.attendance_row_count() == len(clean)
+    pd.testing.assert_frame_equal(dirty_engine.run_department_analysis(), expected)
+    quarantined = dirty_engine.quarantined_attendance()
+    assert quarantined.loc[quarantined['emp_id'] == 999999, 'reason'].tolist() == ['orphan_emp']
+    assert len(dirty_engine.quarantined_attendance(limit=2)) == 2
+
+    # Streamed in small chunks: the duplicate is caught in a later chunk than its original
+    dirty_engine.load_reference_data(df_emp, df_perf)
+    assert dirty_engine.ingest_attendance(io.StringIO(dirty.to_csv(index=False)), chunksize=150) == len(clean)
+    assert dict(dirty_engine.quarantine_counts().values.tolist()) == expected_counts
+    pd.testing.assert_frame_equal(dirty_engine.run_department_analysis(), expected)
+
+    # Appending: repeats within the batch and days already loaded are duplicates as well
+    dirty_engine.load_data(df_emp, df_att, df_perf)
+    assert dirty_engine.append_attendance(pd.concat([bad_rows, overnight, overnight])) == 1
+    assert dict(dirty_engine.quarantine_counts().values.tolist()) == {**expected_counts, 'duplicate': 2}
+    pd.testing.assert_frame_equal(dirty_engine.run_department_analysis(), expected)
+print(dirty_engine.quarantined_attendance())
+
+# A mistyped emp_id in an upload is cached as missing and quarantined, instead of failing the whole load
+bad_id = pd.DataFrame([{'emp_id': 'X12', 'date': '2024-01-02', 'check_in': '09:00', 'check_out': '18:00'}])
+bad_id_upload = [upload[0], ('attendance.csv', pd.concat([df_att, bad_id]).to_csv(index=False).encode()), upload[2]]
+with tempfile.TemporaryDirectory() as cache_dir:
+    cache = IngestCache(cache_dir)
+    for backend in BACKENDS:  # the second load reads the cached file
+        bad_id_engine, rows = ParallelIngest(HRLogicEngine(backend=backend), bad_id_upload, cache, chunksize=150).start().result()
+        assert rows == len(df_att)
+        assert dict(bad_id_engine.quarantine_counts().values.tolist())['orphan_emp'] == 1
+        pd.testing.assert_frame_equal(bad_id_engine.run_department_analysis(), df_dept)
+    assert (cache.hits, cache.misses) == (3, 3)
+
 print("\nSQL Logic Verification Complete.")
@@ -0,0 +1,132 @@
+import numpy as np
+import pandas as pd
+
+from vector_backend import SECONDS_PER_DAY, _epoch_days, _seconds_of_day
+
+# Reason codes of quarantined attendance rows, in the order they are checked: a row is
+# quarantined for the first one that applies.
+#   bad_time                 date missing / not YYYY-MM-DD, or a check-in / check-out that is not HH:MM[:SS]
+#   orphan_emp               emp_id missing or not in employees
+#   checkout_before_checkin  check-out earlier than check-in by more than an overnight shift allows
+#   duplicate                another valid row already has this (emp_id, date); the first one is kept
+REASONS = ('bad_time', 'orphan_emp', 'checkout_before_checkin', 'duplicate')
+QUARANTINE_COLUMNS = ['emp_id', 'date', 'check_in', 'check_out', 'reason']
+
+# A check-out earlier than the check-in is read as an overnight shift (see ATTENDANCE_FACTS_INSERT);
+# a "shift" that would have lasted longer than this is a wrong punch instead
+MAX_SHIFT_HOURS = 16
+
+# The formats both backends parse the same way (SQLite's strftime() and pandas)
+DATE_PATTERN = r'\d{4}-\d{2}-\d{2}'
+CLOCK_PATTERN = r'\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?'
+
+
+def _parse_checked(series, pattern, parser):
+    """
+    Parse a repetitive text column through its distinct values. Returns (values, bad):
+    float64 values (NaN where missing or invalid) and a mask of the present but invalid ones.
+    """
+    codes, uniques = pd.factorize(series)
+    uniques = pd.Index(uniques).astype(str)
+    parsed = np.asarray(parser(uniques), dtype='float64')
+    parsed[~np.asarray(uniques.str.fullmatch(pattern), dtype=bool)] = np.nan
+    values = np.append(parsed, np.nan)[codes]
+    return values, (codes >= 0) & np.isnan(values)
+
+
+def _clock_seconds(uniques):
+    seconds = _seconds_of_day(uniques)
+    seconds[(seconds < 0) | (seconds >= SECONDS_PER_DAY)] = np.nan
+    return seconds
+
+
+class _KeySet:
+    """
+    Growing set of int64 keys for duplicate checks across chunks. Keys are kept as sorted
+    runs that are merged when a newer run grows as large as the one before it, so adding
+    n keys costs O(n log n) overall and a lookup is one searchsorted per (at most log n) run.
+    """
+
+    def __init__(self):
+        self._runs = []
+
+    def contains(self, keys):
+        found = np.zeros(len(keys), dtype=bool)
+        for run in self._runs:
+            position = np.minimum(np.searchsorted(run, keys), len(run) - 1)
+            found |= run[position] == keys
+        return found
+
+    def add(self, keys):
+        """Add keys that are distinct and not in the set yet (no de-duplication is done here)."""
+        run = np.sort(keys)
+        while self._runs and len(self._runs[-1]) <= len(run):
+            # Two sorted runs: the stable (tim)sort merges them in one linear pass
+            run = np.sort(np.concatenate([self._runs.pop(), run]), kind='stable')
+        if len(run):
+            self._runs.append(run)
+
+
+class AttendanceValidator:
+    """
+    Vectorized validation of attendance rows against the loaded employees.
+
+    split() takes a whole attendance frame or one streamed chunk at a time and returns
+    its valid rows and its quarantined ones (with a `reason` from REASONS). Dates and clock
+    times are parsed once per distinct value; every check is an array operation over the
+    chunk. Duplicates are tracked across all chunks passed to the same validator.
+    `counts` holds the quarantined rows per reason so far.
+    """
+
+    def __init__(self, emp_ids, max_shift_hours=MAX_SHIFT_HOURS):
+        self.emp_index = pd.Index(pd.unique(np.asarray(emp_ids)))
+        self.max_shift_seconds = max_shift_hours * 3600
+        self.counts = dict.fromkeys(REASONS, 0)
+        self._seen = _KeySet()
+
+    def reasons(self, df):
+        """int8 index into REASONS for every row of `df` (-1 = valid); records the valid rows' keys."""
+        day, bad_date = _parse_checked(df['date'], DATE_PATTERN, _epoch_days)
+        check_in, bad_in = _parse_checked(df['check_in'], CLOCK_PATTERN, _clock_seconds)
+        check_out, bad_out = _parse_checked(df['check_out'], CLOCK_PATTERN, _clock_seconds)
+        emp = self.emp_index.get_indexer(df['emp_id'])
+
+        reason = np.full(len(df), -1, dtype='int8')
+        reason[np.isnan(day) | bad_in | bad_out] = REASONS.index('bad_time')
+        reason[(reason < 0) & (emp < 0)] = REASONS.index('orphan_emp')
+        with np.errstate(invalid='ignore'):
+            overnight = SECONDS_PER_DAY - check_in + check_out
+            too_long = (check_out < check_in) & (overnight > self.max_shift_seconds)
+        reason[(reason < 0) & too_long] = REASONS.index('checkout_before_checkin')
+
+        # (employee position, epoch day) as one int64 key; only rows that passed so far take part
+        candidates = np.flatnonzero(reason < 0)
+        keys = (emp[candidates].astype('int64') << 32) + (day[candidates] // SECONDS_PER_DAY).astype('int64')
+        repeated = pd.Index(keys).duplicated(keep='first') | self._seen.contains(keys)
+        reason[candidates[repeated]] = REASONS.index('duplicate')
+        self._seen.add(keys[~repeated])
+
+        for code, count in enumerate(np.bincount(reason[reason >= 0], minlength=len(REASONS))):
+            self.counts[REASONS[code]] += int(count)
+        return reason
+
+    def split(self, df):
+        """(valid rows, quarantined rows with QUARANTINE_COLUMNS) of one frame or chunk."""
+        reason = self.reasons(df)
+        bad = reason >= 0
+        quarantined = df.loc[bad, QUARANTINE_COLUMNS[:-1]].assign(
+            reason=pd.Categorical.from_codes(reason[bad], categories=REASONS)
+        )
+        return df[~bad], quarantined.reset_index(drop=True)
+
+
+def quarantine_frame(df, reason):
+    """All rows of an attendance frame as quarantined rows with one `reason`."""
+    return df.reindex(columns=QUARANTINE_COLUMNS[:-1]).reset_index(drop=True).assign(
+        reason=pd.Categorical([reason] * len(df), categories=REASONS)
+    )
+
+
+def reason_counts(counts):
+    """{reason: rows} -> DataFrame (reason, rows) in REASONS order, zeros included."""
+    return pd.DataFrame({'reason': list(REASONS), 'rows': [int(counts.get(r, 0)) for r in REASONS]})
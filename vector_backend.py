@@ -0,0 +1,535 @@
+import pandas as pd
+import numpy as np
+
+from dtypes import DAY_NAMES, result_dtypes
+from leakage import flag_days
+
+SECONDS_PER_DAY = 86400
+
+# A worked day (all of an employee's rows on one date) longer than this counts as an overtime day
+OVERTIME_DAY_MINUTES = 8 * 60
+
+
+def _parse_unique(series, parser):
+    """
+    Parse a highly repetitive text column (dates, clock times) by parsing each
+    distinct value once and broadcasting the result back through the codes.
+    Returns a float64 array with NaN for missing / unparseable values.
+    """
+    codes, uniques = pd.factorize(series)
+    parsed = np.asarray(parser(pd.Index(uniques)), dtype='float64')
+    values = np.full(len(codes), np.nan)
+    valid = codes >= 0
+    values[valid] = parsed[codes[valid]]
+    return values
+
+
+def _epoch_days(dates):
+    parsed = pd.to_datetime(dates, format='%Y-%m-%d', errors='coerce')
+    seconds = parsed.values.astype('datetime64[s]').astype('int64').astype('float64')
+    seconds[parsed.isna()] = np.nan
+    return seconds
+
+
+def _seconds_of_day(times):
+    times = pd.Index(times).astype(str)
+    # SQLite also reads HH:MM; pandas needs the seconds spelled out
+    times = times.where(~times.str.fullmatch(r'\d{2}:\d{2}'), times + ':00')
+    parsed = pd.to_timedelta(times, errors='coerce')
+    seconds = parsed.total_seconds().values.astype('float64')
+    return seconds
+
+
+def _format_clock(seconds):
+    """Format epoch seconds as HH:MM:SS (None where missing), one strftime per distinct value."""
+    seconds_of_day = pd.Series(np.mod(seconds, SECONDS_PER_DAY))
+    codes, uniques = pd.factorize(seconds_of_day)
+    labels = np.array(
+        [f"{int(s) // 3600:02d}:{int(s) % 3600 // 60:02d}:{int(s) % 60:02d}" for s in uniques] + [None],
+        dtype=object,
+    )
+    return labels[codes]
+
+
+def period_spans(periods):
+    """
+    First and last day (days since epoch, NaN when not recognized) of evaluation periods
+    written as 'YYYY-MM', 'YYYY-Qn' or 'YYYY' - the formats PERFORMANCE_PERIODS_BUILD parses.
+    """
+    parts = pd.Series(periods, dtype=object).astype('string').str.extract(
+        r'^([0-9]{4})(?:-([0-9]{2})|-Q([1-4]))?$'
+    ).apply(pd.to_numeric).to_numpy(dtype='float64')
+    year, month, quarter = parts.T
+    first_month = np.where(~np.isnan(month), month, np.where(~np.isnan(quarter), quarter * 3 - 2, 1))
+    months = np.where(~np.isnan(month), 1, np.where(~np.isnan(quarter), 3, 12))
+    valid = ~np.isnan(year) & (first_month >= 1) & (first_month <= 12)
+    # Months since 1970-01 -> first day of that month / of the month after the period
+    start_month = np.where(valid, (year - 1970) * 12 + first_month - 1, 0).astype('int64')
+    first = start_month.astype('datetime64[M]').astype('datetime64[D]').astype('int64')
+    last = (start_month + months).astype('datetime64[M]').astype('datetime64[D]').astype('int64') - 1
+    return np.where(valid, first, np.nan), np.where(valid, last, np.nan)
+
+
+def _top_positions(keys, ids, limit):
+    """
+    Positions of the `limit` smallest keys, ties broken by the smaller id, in that order.
+    np.partition finds the limit-th key without sorting everything; only the keys up to it
+    (the Top-N plus any ties at the boundary) are sorted.
+    """
+    if len(keys) > limit:
+        threshold = np.partition(keys, limit - 1)[limit - 1]
+        candidates = np.flatnonzero(keys <= threshold)
+    else:
+        candidates = np.arange(len(keys))
+    return candidates[np.lexsort((ids[candidates], keys[candidates]))][:limit]
+
+
+def department_frame(departments, headcount, total_minutes, total_cost, records, performance):
+    """
+    Build the run_department_analysis() result from per-department aggregates
+    (arrays indexed by department code). Shared with the parallel aggregation path.
+    `performance` may hold several evaluation periods per department: their rates are averaged.
+    """
+    present = records > 0
+    stats = pd.DataFrame({
+        'department': departments[present],
+        'active_headcount': headcount[present],
+        'total_hours': np.trunc(total_minutes[present] / 60.0).astype('int64'),
+        'total_labor_cost': np.trunc(total_cost[present]).astype('int64'),
+        '_cost': total_cost[present],
+    })
+    rates = performance.groupby('department', as_index=False, sort=False)['target_achievement_rate'].mean()
+    result = stats.merge(rates, on='department', how='inner')
+    result['efficiency_index'] = np.round(
+        (result['target_achievement_rate'] * 100) / (result['_cost'] / 1000000.0), 2
+    )
+    result = result.drop(columns='_cost')
+    return result.sort_values(
+        ['efficiency_index', 'department'], ascending=[False, True], kind='stable'
+    ).reset_index(drop=True)
+
+
+def work_pattern_frame(departments, cell_minutes, cell_counts):
+    """
+    Build the run_work_pattern_analysis() result from per-(department, weekday)
+    sums and counts, flattened as department_code * 7 + weekday.
+    """
+    cells = np.flatnonzero(cell_counts)
+    dept, weekday = np.divmod(cells, 7)
+    # Departments are sorted already; Monday first within each department
+    order = np.lexsort(((weekday + 6) % 7, dept))
+    cells, dept, weekday = cells[order], dept[order], weekday[order]
+    return pd.DataFrame({
+        'department': departments[dept],
+        'day_of_week': np.array(DAY_NAMES, dtype=object)[weekday],
+        'avg_hours': cell_minutes[cells] / cell_counts[cells] / 60.0,
+        'record_count': cell_counts[cells],
+    })
+
+
+class VectorizedBackend:
+    """
+    Pure NumPy / pandas implementation of the HRLogicEngine analyses.
+
+    Departments and employee IDs are integer-encoded once at load time; every
+    analysis is then a handful of bincount / lexsort passes over flat arrays,
+    with no round trip through SQLite.
+    """
+
+    def load(self, df_employees, df_attendance, df_performance):
+        self.load_reference(df_employees, df_performance)
+        self.load_attendance(df_attendance)
+
+    def load_reference(self, df_employees, df_performance):
+        employees = df_employees.reset_index(drop=True)
+        self.emp_ids = employees['emp_id'].to_numpy(dtype='int64')
+        self.emp_index = pd.Index(self.emp_ids)
+        self.emp_names = employees['name'].to_numpy(dtype=object)
+        levels = employees['level'] if 'level' in employees else pd.Series(None, index=employees.index)
+        self.emp_levels = levels.to_numpy(dtype=object)
+        self.emp_rates = employees['hourly_rate'].to_numpy(dtype='float64')
+        # Sorted integer codes, so department order matches SQL's ORDER BY department
+        self.emp_dept, departments = pd.factorize(employees['department'], sort=True, use_na_sentinel=False)
+        self.emp_dept = self.emp_dept.astype('int32')
+        self.departments = np.asarray(departments, dtype=object)
+        # Cost rows gather their labels straight from categoricals with the engine's result
+        # dtypes, instead of building one string object per row and categorizing it again
+        self.result_dtypes = result_dtypes(employees.assign(level=levels))
+        self.emp_categories = {
+            column: pd.Categorical(values, dtype=self.result_dtypes[column])
+            for column, values in [('name', self.emp_names), ('level', self.emp_levels)]
+            if column in self.result_dtypes
+        }
+        self.dept_categories = pd.Categorical(self.departments, dtype=self.result_dtypes['department'])
+        self.performance = df_performance.reset_index(drop=True)
+        periods = self.performance.get('evaluation_period', pd.Series(None, index=self.performance.index))
+        self.perf_start, self.perf_end = period_spans(periods)
+        self.load_attendance(pd.DataFrame(columns=['emp_id', 'date', 'check_in', 'check_out']))
+
+    def load_attendance(self, df_attendance):
+        """
+        Build the attendance fact arrays (the vectorized twin of attendance_facts)
+        and the per-employee / per-department rollups.
+        Rows whose emp_id is not in employees are dropped, matching the SQL inner join.
+        """
+        self.date_labels = np.array([], dtype=object)
+        for name, values in self._facts(df_attendance).items():
+            setattr(self, name, values)
+        self._employee_days_cache = None
+        self._build_rollups()
+
+    def append_attendance(self, df_attendance):
+        """
+        Append new attendance rows, skipping (emp_id, date) pairs already loaded or
+        repeated within the batch, and add their deltas to the rollups.
+        Returns the skipped rows.
+        """
+        df_attendance = df_attendance.reset_index(drop=True)
+        # Compared as integer (emp_id, date code) pairs, without materializing the loaded date strings
+        date_code = self._date_codes(df_attendance['date'])
+        keys = pd.MultiIndex.from_arrays([df_attendance['emp_id'].to_numpy(dtype='int64'), date_code])
+        loaded = pd.MultiIndex.from_arrays([self.emp_ids[self.f_emp], self.f_date])
+        new = ~keys.duplicated(keep='first') & ~keys.isin(loaded)
+        new_rows = df_attendance[new]
+        facts = self._facts(new_rows, date_code[new])
+
+        worked = ~np.isnan(facts['f_minutes'])
+        emp, n_emp = facts['f_emp'][worked], len(self.emp_ids)
+        records = np.bincount(emp, minlength=n_emp)
+        newly_active = (self.emp_records == 0) & (records > 0)
+        self.dept_headcount += np.bincount(self.emp_dept[newly_active], minlength=len(self.departments))
+        self._add_rollups(emp, facts['f_dept'][worked], facts['f_minutes'][worked], facts['f_cost'][worked])
+
+        for name, values in facts.items():
+            setattr(self, name, np.concatenate([getattr(self, name), values]))
+        self._employee_days_cache = None
+        return df_attendance[~new]
+
+    def _date_codes(self, dates):
+        """
+        int32 codes of date strings into self.date_labels, which grows by the dates not seen
+        before (-1 where missing): the fact arrays keep one label per distinct day, not per row.
+        """
+        codes, uniques = pd.factorize(dates)
+        positions = pd.Index(self.date_labels).get_indexer(uniques)
+        unseen = positions < 0
+        positions[unseen] = np.arange(len(self.date_labels), len(self.date_labels) + unseen.sum())
+        self.date_labels = np.concatenate([self.date_labels, np.asarray(uniques, dtype=object)[unseen]])
+        # Missing dates (code -1) pick the appended -1
+        return np.append(positions, -1)[codes].astype('int32')
+
+    def _facts(self, df_attendance, date_code=None):
+        emp_code = self.emp_index.get_indexer(df_attendance['emp_id'].to_numpy())
+        keep = emp_code >= 0
+        attendance = df_attendance[keep]
+        emp_code = emp_code[keep].astype('int32')
+        date_code = self._date_codes(attendance['date']) if date_code is None else date_code[keep]
+
+        day_start = _parse_unique(attendance['date'], _epoch_days)
+        start_ts = day_start + _parse_unique(attendance['check_in'], _seconds_of_day)
+        end_ts = day_start + _parse_unique(attendance['check_out'], _seconds_of_day)
+        # Overnight shift: check_out earlier than check_in means the shift ended the next day
+        end_ts = np.where(end_ts < start_ts, end_ts + SECONDS_PER_DAY, end_ts)
+
+        return {
+            'f_emp': emp_code,
+            'f_dept': self.emp_dept[emp_code],
+            'f_date': date_code,
+            'f_day': np.floor_divide(day_start, SECONDS_PER_DAY),  # days since epoch, NaN if unparseable
+            'f_start': start_ts,
+            'f_end': end_ts,
+            'f_minutes': (end_ts - start_ts) / 60.0,
+            # strftime('%w') convention: 0=Sunday (1970-01-01 was a Thursday)
+            'f_weekday': np.where(
+                np.isnan(day_start), -1, (np.floor_divide(np.nan_to_num(day_start), SECONDS_PER_DAY) + 4) % 7
+            ).astype('int8'),
+            'f_cost': (end_ts - start_ts) / 3600.0 * self.emp_rates[emp_code],
+        }
+
+    def _build_rollups(self):
+        n_emp, n_dept = len(self.emp_ids), len(self.departments)
+        self.emp_minutes, self.emp_cost = np.zeros(n_emp), np.zeros(n_emp)
+        self.emp_records = np.zeros(n_emp, dtype='int64')
+        self.dept_minutes, self.dept_cost = np.zeros(n_dept), np.zeros(n_dept)
+        self.dept_records = np.zeros(n_dept, dtype='int64')
+        worked = self._worked()
+        emp = self.f_emp[worked]
+        self._add_rollups(emp, self.f_dept[worked], self.f_minutes[worked], self.f_cost[worked])
+        # Each employee belongs to exactly one department: distinct headcount per department
+        self.dept_headcount = np.bincount(self.emp_dept[self.emp_records > 0], minlength=n_dept)
+
+    def _add_rollups(self, emp, dept, minutes, cost):
+        n_emp, n_dept = len(self.emp_ids), len(self.departments)
+        self.emp_minutes += np.bincount(emp, weights=minutes, minlength=n_emp)
+        self.emp_cost += np.bincount(emp, weights=cost, minlength=n_emp)
+        self.emp_records += np.bincount(emp, minlength=n_emp)
+        self.dept_minutes += np.bincount(dept, weights=minutes, minlength=n_dept)
+        self.dept_cost += np.bincount(dept, weights=cost, minlength=n_dept)
+        self.dept_records += np.bincount(dept, minlength=n_dept)
+
+    def _worked(self):
+        return ~np.isnan(self.f_minutes)
+
+    def _selected(self, bounds=None):
+        """
+        Worked fact rows, restricted to an inclusive {'start', 'end'} 'YYYY-MM-DD' range when given.
+        The fact arrays are already columnar, so a range is one vectorized comparison
+        instead of the SQL backend's daily rollup tables.
+        """
+        selected = self._worked()
+        if bounds is not None:
+            first, last = (np.datetime64(bounds[key], 'D').astype('int64') for key in ('start', 'end'))
+            selected &= (self.f_day >= first) & (self.f_day <= last)
+        return selected
+
+    def date_span(self):
+        days = self.f_day[self._worked()]
+        if len(days) == 0:
+            return None, None
+        first, last = np.array([days.min(), days.max()]).astype('int64').astype('datetime64[D]')
+        return str(first), str(last)
+
+    def run_cost_calculation(self, bounds=None):
+        return self._cost_frame(self._selected(bounds))
+
+    def iter_cost_calculation(self, bounds=None, chunksize=100_000):
+        """
+        run_cost_calculation() rows in (emp_id, date, load order) order, `chunksize` rows at
+        a time. Only the sorted row positions are held; each chunk's columns are gathered on demand.
+        """
+        rows = np.flatnonzero(self._selected(bounds))
+        rows = rows[np.lexsort((rows, self.f_day[rows], self.emp_ids[self.f_emp[rows]]))]
+        for offset in range(0, len(rows), chunksize):
+            yield self._cost_frame(rows[offset:offset + chunksize])
+
+    def _cost_frame(self, worked):
+        """Cost rows for the given fact positions (or boolean mask)."""
+        emp = self.f_emp[worked]
+        categories = self.emp_categories
+        return pd.DataFrame({
+            'emp_id': self.emp_ids[emp].astype(self.result_dtypes.get('emp_id', 'int64')),
+            'name': categories['name'].take(emp) if 'name' in categories else self.emp_names[emp],
+            'department': self.dept_categories.take(self.f_dept[worked]),
+            'level': categories['level'].take(emp) if 'level' in categories else self.emp_levels[emp],
+            'date': self.date_labels[self.f_date[worked]],
+            'check_in': _format_clock(self.f_start[worked]),
+            'check_out': _format_clock(self.f_end[worked]),
+            'hourly_rate': self.emp_rates[emp].astype(self.result_dtypes.get('hourly_rate', 'float64')),
+            'hours_worked': self.f_minutes[worked] / 60.0,
+            'daily_cost': self.f_cost[worked],
+        })
+
+    def run_department_analysis(self, bounds=None):
+        if bounds is None:
+            return department_frame(
+                self.departments, self.dept_headcount, self.dept_minutes, self.dept_cost,
+                self.dept_records, self.performance,
+            )
+        selected = self._selected(bounds)
+        n_dept = len(self.departments)
+        dept = self.f_dept[selected]
+        total_minutes = np.bincount(dept, weights=self.f_minutes[selected], minlength=n_dept)
+        total_cost = np.bincount(dept, weights=self.f_cost[selected], minlength=n_dept)
+        records = np.bincount(dept, minlength=n_dept)
+        headcount = np.bincount(self.emp_dept[np.unique(self.f_emp[selected])], minlength=n_dept)
+        return department_frame(
+            self.departments, headcount, total_minutes, total_cost, records, self._performance_in(bounds)
+        )
+
+    def _performance_in(self, bounds):
+        """Performance rows whose evaluation period overlaps the range (unrecognized periods always count)."""
+        first, last = (np.datetime64(bounds[key], 'D').astype('int64') for key in ('start', 'end'))
+        undated = np.isnan(self.perf_start)
+        with np.errstate(invalid='ignore'):
+            overlaps = (self.perf_start <= last) & (self.perf_end >= first)
+        return self.performance[undated | overlaps]
+
+    def run_efficiency_trend(self, bounds=None):
+        """
+        Efficiency per (evaluation period, department). Worked minutes / cost are summed per
+        (department, day) with one bincount, then folded into periods with a
+        (departments x days) @ (days x periods) membership product.
+        """
+        columns = ['evaluation_period', 'period_start', 'department', 'total_hours',
+                   'total_labor_cost', 'target_achievement_rate', 'efficiency_index']
+        periods = self.performance.assign(_start=self.perf_start, _end=self.perf_end).dropna(subset=['_start'])
+        periods = periods.drop_duplicates('evaluation_period')
+        selected = self._selected(bounds)
+        if periods.empty or not selected.any():
+            return pd.DataFrame(columns=columns)
+
+        days, day_code = np.unique(self.f_day[selected], return_inverse=True)
+        n_dept, n_days = len(self.departments), len(days)
+        cell = self.f_dept[selected] * n_days + day_code
+        day_minutes = np.bincount(cell, weights=self.f_minutes[selected], minlength=n_dept * n_days)
+        day_cost = np.bincount(cell, weights=self.f_cost[selected], minlength=n_dept * n_days)
+        day_records = np.bincount(cell, minlength=n_dept * n_days)
+
+        start, end = periods['_start'].to_numpy(), periods['_end'].to_numpy()
+        membership = ((days[:, None] >= start) & (days[:, None] <= end)).astype('float64')
+        minutes = day_minutes.reshape(n_dept, n_days) @ membership
+        cost = day_cost.reshape(n_dept, n_days) @ membership
+        records = day_records.reshape(n_dept, n_days) @ membership
+
+        dept, period = np.nonzero(records)
+        stats = pd.DataFrame({
+            'evaluation_period': periods['evaluation_period'].to_numpy(dtype=object)[period],
+            'period_start': start[period].astype('int64').astype('datetime64[D]').astype(str).astype(object),
+            'department': self.departments[dept],
+            'total_hours': np.trunc(minutes[dept, period] / 60.0).astype('int64'),
+            'total_labor_cost': np.trunc(cost[dept, period]).astype('int64'),
+            '_cost': cost[dept, period],
+        })
+        rates = self.performance.groupby(['department', 'evaluation_period'], as_index=False, sort=False)[
+            'target_achievement_rate'].mean()
+        result = stats.merge(rates, on=['department', 'evaluation_period'], how='inner')
+        result['efficiency_index'] = np.round(
+            (result['target_achievement_rate'] * 100) / (result['_cost'] / 1000000.0), 2
+        )
+        return result.sort_values(
+            ['period_start', 'evaluation_period', 'department'], kind='stable'
+        ).reset_index(drop=True)[columns]
+
+    def get_employee_ranking(self, limit=10, bounds=None, department=None, per_department=False,
+                             metric='hours', ascending=False):
+        """Twin of the ranking queries: per-employee totals, then a partial selection (see _top_positions)."""
+        emp_days, days, day_minutes = self._employee_days()
+        overtime = day_minutes > OVERTIME_DAY_MINUTES
+        if bounds is None:
+            emp_minutes, emp_cost, emp_records = self.emp_minutes, self.emp_cost, self.emp_records
+        else:
+            selected = self._selected(bounds)
+            emp, n_emp = self.f_emp[selected], len(self.emp_ids)
+            emp_minutes = np.bincount(emp, weights=self.f_minutes[selected], minlength=n_emp)
+            emp_cost = np.bincount(emp, weights=self.f_cost[selected], minlength=n_emp)
+            emp_records = np.bincount(emp, minlength=n_emp)
+            first, last = (np.datetime64(bounds[key], 'D').astype('int64') for key in ('start', 'end'))
+            overtime &= (days >= first) & (days <= last)
+        emp_overtime = np.bincount(emp_days[overtime], minlength=len(self.emp_ids))
+        totals = {'hours': emp_minutes, 'cost': emp_cost, 'overtime_days': emp_overtime}
+
+        candidates = np.flatnonzero(emp_records)
+        if department is not None:
+            candidates = candidates[self.departments[self.emp_dept[candidates]] == department]
+        values = totals[metric][candidates].astype('float64')
+        keys = values if ascending else -values
+        if per_department:
+            # Departments are sorted codes, so grouping by code gives SQL's ORDER BY department
+            groups = self.emp_dept[candidates]
+            order = np.argsort(groups, kind='stable')
+            edges = np.searchsorted(groups[order], np.arange(len(self.departments) + 1))
+            picked, ranks = [], []
+            for lo, hi in zip(edges[:-1], edges[1:]):
+                members = order[lo:hi]
+                top = members[_top_positions(keys[members], self.emp_ids[candidates[members]], limit)]
+                picked.append(top)
+                ranks.append(np.arange(1, len(top) + 1))
+            positions = np.concatenate(picked) if picked else np.array([], dtype='int64')
+            rank = np.concatenate(ranks) if ranks else np.array([], dtype='int64')
+        else:
+            positions = _top_positions(keys, self.emp_ids[candidates], limit)
+            rank = np.arange(1, len(positions) + 1)
+        top = candidates[positions]
+        return pd.DataFrame({
+            'rank': rank,
+            'name': self.emp_names[top],
+            'department': self.departments[self.emp_dept[top]],
+            'level': self.emp_levels[top],
+            'total_hours': emp_minutes[top] / 60.0,
+            'total_labor_cost': np.trunc(emp_cost[top]).astype('int64'),
+            'overtime_days': emp_overtime[top],
+        })
+
+    def scenario_histogram(self, bounds=None):
+        """Worked days as ScenarioModel input (one row per day, records=1)."""
+        selected = self._selected(bounds)
+        emp = self.f_emp[selected]
+        return pd.DataFrame({
+            'department': self.departments[self.f_dept[selected]],
+            'weekday': self.f_weekday[selected],
+            'level': self.emp_levels[emp],
+            'hourly_rate': self.emp_rates[emp],
+            'worked_minutes': self.f_minutes[selected],
+            'records': np.ones(len(emp), dtype='int64'),
+        })
+
+    def _employee_days(self):
+        """
+        Worked minutes per (employee, day), sorted by employee then day - the twin of
+        employee_day_rollup. Returns (employee codes, epoch days, minutes); cached until the next load.
+        """
+        if self._employee_days_cache is None:
+            worked = self._worked()
+            day = self.f_day[worked].astype('int64')
+            first = day.min() if len(day) else 0
+            span = (day.max() - first + 1) if len(day) else 1
+            keys, inverse = np.unique(self.f_emp[worked].astype('int64') * span + (day - first), return_inverse=True)
+            emp, offset = np.divmod(keys, span)
+            self._employee_days_cache = (emp, offset + first, np.bincount(inverse, weights=self.f_minutes[worked]))
+        return self._employee_days_cache
+
+    def leakage_inputs(self, bounds, window_days, z_threshold, long_day_hours):
+        """
+        Candidate employee-days and missing check-out counts for leakage.rank_leakage(), in the
+        shape of LEAKAGE_QUERY / MISSING_CHECKOUT_QUERY. The rolling baseline over the previous
+        `window_days` calendar days is a difference of running sums: one searchsorted finds
+        where every window starts.
+        """
+        emp, day, minutes = self._employee_days()
+        # Monotonic key per (employee, day) with room for the window below each employee's first day
+        first = day.min() if len(day) else 0
+        stride = (day.max() - first + 1 if len(day) else 1) + window_days
+        key = emp * stride + (day - first + window_days)
+        position = np.arange(len(key))
+        window_start = np.searchsorted(key, key - window_days, side='left')
+        running = np.concatenate([[0.0], np.cumsum(minutes)])
+        running_sq = np.concatenate([[0.0], np.cumsum(minutes * minutes)])
+        baseline_days = position - window_start
+        baseline_sum = running[position] - running[window_start]
+        baseline_sumsq = running_sq[position] - running_sq[window_start]
+
+        in_range = np.ones(len(key), dtype=bool)
+        if bounds is not None:
+            lo, hi = (np.datetime64(bounds[k], 'D').astype('int64') for k in ('start', 'end'))
+            in_range = (day >= lo) & (day <= hi)
+        spike, long_day, _, _ = flag_days(
+            minutes, baseline_days, baseline_sum, baseline_sumsq, z_threshold, long_day_hours
+        )
+        rows = np.flatnonzero(in_range & (spike | long_day))
+        candidate_emp = emp[rows]
+        days = pd.DataFrame({
+            'date': day[rows].astype('datetime64[D]').astype(str).astype(object),
+            'emp_id': self.emp_ids[candidate_emp],
+            'name': self.emp_names[candidate_emp],
+            'department': self.departments[self.emp_dept[candidate_emp]],
+            'level': self.emp_levels[candidate_emp],
+            'hourly_rate': self.emp_rates[candidate_emp],
+            'total_minutes': minutes[rows],
+            'baseline_days': baseline_days[rows],
+            'baseline_sum': baseline_sum[rows],
+            'baseline_sumsq': baseline_sumsq[rows],
+        })
+
+        missing_mask = np.isnan(self.f_end) & ~np.isnan(self.f_start)
+        if bounds is not None:
+            missing_mask &= (self.f_day >= lo) & (self.f_day <= hi)
+        counts = np.bincount(self.f_emp[missing_mask], minlength=len(self.emp_ids))
+        repeated = np.flatnonzero(counts)
+        missing = pd.DataFrame({
+            'emp_id': self.emp_ids[repeated],
+            'name': self.emp_names[repeated],
+            'department': self.departments[self.emp_dept[repeated]],
+            'level': self.emp_levels[repeated],
+            'missing_checkouts': counts[repeated],
+        })
+        return days, missing
+
+    def run_work_pattern_analysis(self, bounds=None):
+        worked = self._selected(bounds)
+        # One integer key per (department, weekday) cell
+        key = self.f_dept[worked] * 7 + self.f_weekday[worked]
+        n_cells = len(self.departments) * 7
+        counts = np.bincount(key, minlength=n_cells)
+        minutes = np.bincount(key, weights=self.f_minutes[worked], minlength=n_cells)
+
+        return work_pattern_frame(self.departments, minutes, counts)